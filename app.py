@@ -1,14 +1,16 @@
-from flask import Flask
-from app.routes import routes
+from app import create_app
+from app.config import APP_DEBUG, HOST, PORT, SCHEDULER_IN_PROCESS
 
-app = Flask(__name__)
-app.register_blueprint(routes)
+# Development server only. In production run:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   python -m app.scheduler              (one scheduler for all workers)
 
-with app.app_context():
-    print("🔥 Registered Routes in Flask:")
-    for rule in app.url_map.iter_rules():
-        print(f"{rule.endpoint} --> {rule.methods} --> {rule.rule}")
+app = create_app()
 
 if __name__ == "__main__":
-    print("🚀 Flask app is running on http://127.0.0.1:5001")
-    app.run(debug=True, port=5001)
+    if SCHEDULER_IN_PROCESS:
+        from app.scheduler import start_scheduler_thread
+        start_scheduler_thread()
+        print("⏰ Workflow scheduler running in-process")
+    print(f"🚀 Flask app is running on http://{HOST}:{PORT}")
+    app.run(host=HOST, port=PORT, debug=APP_DEBUG, threaded=True)
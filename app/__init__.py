@@ -0,0 +1,34 @@
+def create_app():
+    """
+    Application factory used by app.py (dev server), wsgi.py and gunicorn.
+
+    Loads the action catalog eagerly so that, with gunicorn's preload_app,
+    it is built once in the master and shared by every forked worker.
+    Refuses to start on a database the migrations have not reached yet.
+    """
+    from flask import Flask
+    from app.catalog import refresh_catalog
+    from app.config import APP_DUMP_ROUTES, METRICS_ENABLED
+    from app.database import engine, init_app
+    from app.json_provider import FastJSONProvider
+    from app.metrics import init_metrics
+    from app.routes import routes
+    from app.seed_database import check_schema
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    init_app(app)
+    if METRICS_ENABLED:
+        init_metrics(app, engine)
+    app.register_blueprint(routes)
+
+    # ✅ Load the action catalog once at startup (on an up-to-date schema)
+    check_schema()
+    refresh_catalog()
+
+    if APP_DUMP_ROUTES:
+        print("🔥 Registered Routes in Flask:")
+        for rule in app.url_map.iter_rules():
+            print(f"{rule.endpoint} --> {rule.methods} --> {rule.rule}")
+
+    return app
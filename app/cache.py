@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+
+# 🔹 In-process LRU cache
+#
+# Used for compiled plans (app/plans.py) and preprocessed screen-match
+# templates (app/screen_match.py). Callers put the resource version in the
+# key, so entries never need invalidating; stale ones just age out.
+
+class LRUCache:
+    """
+    Thread-safe LRU with hit / miss counters. None is never cached:
+    get() returns None for a missing key.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
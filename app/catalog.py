@@ -0,0 +1,182 @@
+import hashlib
+import threading
+import time
+from types import MappingProxyType
+from flask import Response, request
+from app.config import CATALOG_MAX_AGE, CATALOG_REVALIDATE_SECONDS
+from app.database import SessionLocal
+from app.json_provider import dumps_bytes
+from sqlalchemy import select, update
+from app.models import Action, ActionConfig, CatalogVersion, RIGAction, RIGActionConfig
+from app.response_cache import response_cache
+from app.plans import INTEGER_FIELDS
+from app.validators import compile_validator
+
+# 🔹 In-memory catalog of Action / RIGAction metadata.
+# The catalog only changes when seed_database.py runs, so it is loaded once,
+# serialized once, and swapped atomically on refresh_catalog().
+#
+# Every worker process holds its own copy. Re-seeding or POST /catalog/refresh
+# bumps the catalog_version row (publish_catalog_change), and each worker
+# compares that row with its copy at most every CATALOG_REVALIDATE_SECONDS.
+
+class CatalogEntry:
+    """
+    A precomputed JSON response body with its strong ETag.
+    """
+    __slots__ = ("body", "etag", "status")
+
+    def __init__(self, data, status=200):
+        self.body = dumps_bytes(data)
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.status = status
+
+class Catalog:
+    """
+    Immutable snapshot of the action catalog.
+    """
+    def __init__(self, actions, action_configs, rig_actions, rig_action_configs, version=None):
+        self.version = version
+        # Raw rows, keyed by id (read-only)
+        self.actions = MappingProxyType(actions)
+        self.action_configs = MappingProxyType(action_configs)
+        self.rig_actions = MappingProxyType(rig_actions)
+        self.rig_action_configs = MappingProxyType(rig_action_configs)
+
+        # Compiled selected_value validators, keyed by action / RIG action id
+        self.step_validators = MappingProxyType({
+            action_id: compile_validator(action_configs.get(action_id, ()), INTEGER_FIELDS.get(action["type"], ()))
+            for action_id, action in actions.items()
+        })
+        self.rig_step_validators = MappingProxyType({
+            rig_action_id: compile_validator(rig_action_configs.get(rig_action_id, ()), INTEGER_FIELDS.get(action["type"], ()))
+            for rig_action_id, action in rig_actions.items()
+        })
+
+        entries = {
+            ("actions",): CatalogEntry(list(actions.values())),
+            ("rig_actions",): CatalogEntry(list(rig_actions.values())),
+        }
+        for action_id, configs in action_configs.items():
+            entries[("action_config", action_id)] = CatalogEntry(list(configs))
+        for rig_action_id, action in rig_actions.items():
+            entries[("rig_action", rig_action_id)] = CatalogEntry(action)
+        for rig_action_id, configs in rig_action_configs.items():
+            if configs:
+                entries[("rig_action_config", rig_action_id)] = CatalogEntry(list(configs))
+        self._entries = MappingProxyType(entries)
+
+        # Responses for ids that are not in the catalog (same bodies as before)
+        self._missing = MappingProxyType({
+            "action_config": CatalogEntry([]),
+            "rig_action": CatalogEntry({"error": "RIG Action not found"}, 404),
+            "rig_action_config": CatalogEntry({"message": "No configuration found for this RIG action"}, 404),
+        })
+
+    def entry(self, kind, key=None):
+        if key is None:
+            return self._entries[(kind,)]
+        return self._entries.get((kind, key)) or self._missing[kind]
+
+def load_catalog(db):
+    """
+    Build a Catalog snapshot from the database.
+    """
+    version = current_catalog_version(db)  # Read first: a later bump only triggers another reload
+    actions = {
+        a.id: {"id": a.id, "name": a.name, "type": a.type}
+        for a in db.query(Action).order_by(Action.id)
+    }
+    action_configs = {}
+    for c in db.query(ActionConfig).order_by(ActionConfig.id):
+        action_configs.setdefault(c.action_id, []).append(
+            {"option_name": c.option_name, "valid_values": c.valid_values}
+        )
+    rig_actions = {
+        a.id: {"id": a.id, "name": a.name, "type": a.type}
+        for a in db.query(RIGAction).order_by(RIGAction.id)
+    }
+    rig_action_configs = {}
+    for c in db.query(RIGActionConfig).order_by(RIGActionConfig.id):
+        rig_action_configs.setdefault(c.rig_action_id, []).append(
+            {"option_name": c.option_name, "valid_values": c.valid_values}
+        )
+    return Catalog(
+        actions,
+        {k: tuple(v) for k, v in action_configs.items()},
+        rig_actions,
+        {k: tuple(v) for k, v in rig_action_configs.items()},
+        version,
+    )
+
+def current_catalog_version(db):
+    return db.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar()
+
+def publish_catalog_change(db):
+    """
+    Bump the shared catalog version so every worker reloads (caller commits).
+    """
+    db.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1))
+
+_catalog = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def refresh_catalog():
+    """
+    Reload the catalog from the database and swap it in.
+    """
+    global _catalog, _checked_at
+    with _lock:
+        db = SessionLocal()
+        try:
+            _catalog = load_catalog(db)
+        finally:
+            db.close()
+        _checked_at = time.monotonic()
+    response_cache.clear()  # Cached step / workflow responses embed action names and configs
+    return _catalog
+
+def get_catalog():
+    """
+    Return the current catalog, loading it on first use and reloading it
+    when another process has published a change.
+    """
+    catalog = _catalog
+    if catalog is None:
+        return refresh_catalog()
+    if time.monotonic() - _checked_at >= CATALOG_REVALIDATE_SECONDS and _catalog_changed(catalog):
+        return refresh_catalog()
+    return catalog
+
+def _catalog_changed(catalog):
+    """
+    One primary-key read, done by a single thread per interval.
+    """
+    global _checked_at
+    with _lock:
+        if time.monotonic() - _checked_at < CATALOG_REVALIDATE_SECONDS:
+            return False  # Another thread just checked
+        _checked_at = time.monotonic()
+    db = SessionLocal()
+    try:
+        return current_catalog_version(db) != catalog.version
+    finally:
+        db.close()
+
+def catalog_response(kind, key=None):
+    """
+    Serve a catalog entry with ETag / Cache-Control, answering 304 when the
+    client already has it.
+    """
+    entry = get_catalog().entry(kind, key)
+    if entry.status == 200:
+        headers = {"Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    else:
+        headers = {"Cache-Control": "no-store"}  # The id may exist after the next re-seed
+    if entry.status == 200 and request.if_none_match.contains(entry.etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(entry.body, status=entry.status, mimetype="application/json", headers=headers)
+    response.set_etag(entry.etag)
+    return response
@@ -0,0 +1,273 @@
+import threading
+import time
+import zlib
+from sqlalchemy import delete, event, func, insert, select
+from app.config import CHANGES_POLL_SECONDS, CHANGES_RETENTION_DAYS
+from app.database import SessionLocal, chunked
+from app.history import DAY_MS, now_ms
+from app.json_provider import dumps_bytes
+from app.models import Change, Phone, RIG, RIGSteps, Workflow, WorkflowSteps
+from app.versions import CHANGED_KEY
+
+# 🔹 Change feed
+#
+# Every (table, id) a transaction recorded with mark_changed() is appended
+# to the changes table in that same transaction, just before it commits,
+# so the log can never miss or invent a change. Readers ask for everything
+# after the last seq they applied and get each changed resource's current
+# state inline (or "delete" when it is gone), so an edge node keeps a read
+# replica with one request per batch:
+#
+#   GET /changes?since=<seq>&wait=30    long-poll until something changes
+#   GET /changes?resources=workflows    only some tables (next still skips the rest)
+#   GET /changes/snapshot               gzipped NDJSON of everything, to bootstrap
+#
+# Entries carry current state rather than diffs, so applying a change
+# twice, or after a snapshot that already contains it, is harmless.
+# seq order is commit order because SQLite serializes writers.
+
+FEED_TABLES = ("workflows", "rigs", "phones")
+WRITTEN_KEY = "change_feed_written"
+
+# Long-polls in this process wake as soon as a local commit adds changes;
+# commits from other workers are picked up by polling.
+_feed_commits = 0
+_feed_cond = threading.Condition()
+
+# Callbacks run after each local commit that added feed entries (see on_feed_commit)
+_listeners = []
+
+def on_feed_commit(callback):
+    """
+    Call callback(tables) in the committing thread after every commit in
+    this process that added feed entries; tables is the frozenset of
+    resource tables it touched. Commits made by other processes are never
+    seen here. Keep callbacks quick and thread-safe.
+    """
+    _listeners.append(callback)
+
+def remove_feed_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+def record_changes(db, changed):
+    """
+    Append feed entries for (table, id) pairs (db: Session or Connection,
+    caller commits). For writes that bypass the session, such as
+    maintenance; sessions go through mark_changed(). Returns the set of
+    tables written to (empty when none were).
+    """
+    changed = sorted((table, resource_id) for table, resource_id in changed if table in FEED_TABLES)
+    if changed:
+        created_at = now_ms()
+        db.execute(insert(Change), [
+            {"resource": table, "resource_id": resource_id, "created_at": created_at}
+            for table, resource_id in changed
+        ])
+    return {table for table, _ in changed}
+
+@event.listens_for(SessionLocal, "before_commit")
+def _append_changes(session):
+    tables = record_changes(session, session.info.get(CHANGED_KEY, ()))
+    if tables:
+        session.info.setdefault(WRITTEN_KEY, set()).update(tables)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _wake_waiters(session):
+    global _feed_commits
+    tables = session.info.pop(WRITTEN_KEY, None)
+    if not tables:
+        return
+    with _feed_cond:
+        _feed_commits += 1
+        _feed_cond.notify_all()
+    tables = frozenset(tables)
+    for callback in list(_listeners):
+        callback(tables)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_written(session):
+    session.info.pop(WRITTEN_KEY, None)
+
+# 🔹 Current state of changed resources (db: Session or Connection)
+
+def _workflow_states(db, ids):
+    states = {}
+    for chunk in chunked(ids):
+        for row in db.execute(
+            select(
+                Workflow.id, Workflow.name, Workflow.start_hour, Workflow.end_hour,
+                Workflow.start_day, Workflow.end_day, Workflow.version,
+            ).where(Workflow.id.in_(chunk))
+        ):
+            states[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "start_hour": row.start_hour,
+                "end_hour": row.end_hour,
+                "start_day": row.start_day.value,
+                "end_day": row.end_day.value,
+                "version": row.version,
+                "steps": [],
+            }
+        for workflow_id, step_id, step_order, action_id, selected_value in db.execute(
+            select(
+                WorkflowSteps.workflow_id, WorkflowSteps.id, WorkflowSteps.step_order,
+                WorkflowSteps.action_id, WorkflowSteps.selected_value,
+            )
+            .where(WorkflowSteps.workflow_id.in_(chunk))
+            .order_by(WorkflowSteps.workflow_id, WorkflowSteps.step_order, WorkflowSteps.id)
+        ):
+            if workflow_id in states:
+                states[workflow_id]["steps"].append({
+                    "step_id": step_id, "step_order": step_order,
+                    "action_id": action_id, "selected_value": selected_value,
+                })
+    return states
+
+def _rig_states(db, ids):
+    states = {}
+    for chunk in chunked(ids):
+        for row in db.execute(
+            select(RIG.id, RIG.name, RIG.description, RIG.version).where(RIG.id.in_(chunk))
+        ):
+            states[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "version": row.version,
+                "steps": [],
+            }
+        for rig_id, step_id, step_order, rig_action_id, selected_value in db.execute(
+            select(
+                RIGSteps.rig_id, RIGSteps.id, RIGSteps.step_order,
+                RIGSteps.rig_action_id, RIGSteps.selected_value,
+            )
+            .where(RIGSteps.rig_id.in_(chunk))
+            .order_by(RIGSteps.rig_id, RIGSteps.step_order, RIGSteps.id)
+        ):
+            if rig_id in states:
+                states[rig_id]["steps"].append({
+                    "step_id": step_id, "step_order": step_order,
+                    "rig_action_id": rig_action_id, "selected_value": selected_value,
+                })
+    return states
+
+def _phone_states(db, ids):
+    states = {}
+    for chunk in chunked(ids):
+        for phone_id, rig_id, serial_number in db.execute(
+            select(Phone.id, Phone.rig_id, Phone.serial_number).where(Phone.id.in_(chunk))
+        ):
+            states[phone_id] = {"id": phone_id, "rig_id": rig_id, "serial_number": serial_number}
+    return states
+
+STATE_BUILDERS = {"workflows": _workflow_states, "rigs": _rig_states, "phones": _phone_states}
+RESOURCE_MODELS = {"workflows": Workflow, "rigs": RIG, "phones": Phone}
+
+# 🔹 Reading the feed
+
+def feed_bounds(db):
+    """
+    (oldest retained seq, newest seq); (None, None) while the log is empty.
+    """
+    return tuple(db.execute(select(func.min(Change.seq), func.max(Change.seq))).one())
+
+def changes_after(db, since, limit, resources=FEED_TABLES):
+    """
+    (changes, next_seq, more): changes after since, oldest first, one per
+    resource (its latest seq) with its current state. Only the listed
+    resource tables are returned; next_seq still moves past the others.
+    """
+    rows = db.execute(
+        select(Change.seq, Change.resource, Change.resource_id)
+        .where(Change.seq > since)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], since, False
+
+    latest = {}
+    for seq, resource, resource_id in rows:
+        if resource in resources:
+            latest[(resource, resource_id)] = seq
+    ids = {}
+    for resource, resource_id in latest:
+        ids.setdefault(resource, []).append(resource_id)
+    states = {resource: STATE_BUILDERS[resource](db, resource_ids) for resource, resource_ids in ids.items()}
+
+    changes = []
+    for (resource, resource_id), seq in sorted(latest.items(), key=lambda item: item[1]):
+        data = states[resource].get(resource_id)
+        changes.append({
+            "seq": seq,
+            "resource": resource,
+            "id": resource_id,
+            "op": "upsert" if data is not None else "delete",
+            "data": data,
+        })
+    return changes, rows[-1].seq, more
+
+def wait_for_changes(db, since, limit, wait, resources=FEED_TABLES):
+    """
+    changes_after(), waiting up to wait seconds for the feed to move past
+    since. The read transaction is ended between checks, so the session
+    holds no connection while it waits and the next check sees new commits.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        with _feed_cond:
+            commits = _feed_commits
+        page = changes_after(db, since, limit, resources)
+        remaining = deadline - time.monotonic()
+        if page[1] != since or remaining <= 0:
+            return page
+        db.rollback()
+        with _feed_cond:
+            if _feed_commits == commits:
+                _feed_cond.wait(min(remaining, CHANGES_POLL_SECONDS))
+
+# 🔹 Snapshot export
+
+def snapshot_chunks(engine, seq, batch=500, level=6):
+    """
+    Gzip-compressed NDJSON of every workflow, RIG and phone: a
+    {"seq": seq} header line, then {"resource", "id", "data"} lines in id
+    order. Rows are read after seq was taken, so they may already include
+    later changes; a node applies the feed from seq on top either way.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    with engine.connect() as conn:
+        yield compressor.compress(dumps_bytes({"seq": seq, "resources": list(FEED_TABLES)}) + b"\n")
+        for resource in FEED_TABLES:
+            model, after = RESOURCE_MODELS[resource], 0
+            while True:
+                ids = conn.scalars(select(model.id).where(model.id > after).order_by(model.id).limit(batch)).all()
+                if not ids:
+                    break
+                states = STATE_BUILDERS[resource](conn, ids)
+                chunk = compressor.compress(b"".join(
+                    dumps_bytes({"resource": resource, "id": resource_id, "data": states[resource_id]}) + b"\n"
+                    for resource_id in ids if resource_id in states
+                ))
+                if chunk:
+                    yield chunk
+                after = ids[-1]
+    yield compressor.flush()
+
+# 🔹 Retention
+
+def trim_changes(conn, now=None):
+    """
+    Drop entries older than CHANGES_RETENTION_DAYS, always keeping the
+    newest so the next seq can be told apart from a reset log (caller
+    commits). Returns the number of entries dropped.
+    """
+    now = now_ms() if now is None else now
+    newest = select(func.max(Change.seq)).scalar_subquery()
+    return conn.execute(
+        delete(Change).where(Change.created_at < now - CHANGES_RETENTION_DAYS * DAY_MS, Change.seq < newest)
+    ).rowcount
@@ -1,3 +1,90 @@
 import os
 
-DATABASE_URL = "sqlite:///workflow.db"
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///workflow.db")
+
+# 🔹 Connection Pool Settings
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+
+# 🔹 SQLite Settings (ignored for other backends)
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# 🔹 Catalog (actions / RIG actions) HTTP caching
+CATALOG_MAX_AGE = int(os.environ.get("CATALOG_MAX_AGE", "60"))
+CATALOG_REVALIDATE_SECONDS = float(os.environ.get("CATALOG_REVALIDATE_SECONDS", "5"))  # Check for other workers' refreshes this often
+
+# 🔹 List endpoints (keyset pagination / streaming)
+LIST_MAX_LIMIT = int(os.environ.get("LIST_MAX_LIMIT", "1000"))
+LIST_STREAM_BATCH = int(os.environ.get("LIST_STREAM_BATCH", "500"))
+
+# 🔹 Workflow schedule index (rebuilt at most this often to pick up other workers' edits)
+SCHEDULE_REFRESH_SECONDS = int(os.environ.get("SCHEDULE_REFRESH_SECONDS", "60"))
+
+# 🔹 Workflow scheduler (python -m app.scheduler, or in-process with the app.py dev server)
+SCHEDULER_IN_PROCESS = os.environ.get("SCHEDULER_IN_PROCESS", "0") == "1"
+SCHEDULER_RIG_CONCURRENCY = int(os.environ.get("SCHEDULER_RIG_CONCURRENCY", "8"))  # Phones running at once per RIG
+SCHEDULER_SYNC_SECONDS = float(os.environ.get("SCHEDULER_SYNC_SECONDS", "60"))  # Read the change feed for other processes' edits this often
+
+# 🔹 Execution engine
+DEVICE_DRIVER = os.environ.get("DEVICE_DRIVER", "app.drivers:FakeDriver")
+ENGINE_MAX_CONCURRENCY = int(os.environ.get("ENGINE_MAX_CONCURRENCY", "64"))
+PLAN_CACHE_SIZE = int(os.environ.get("PLAN_CACHE_SIZE", "256"))
+
+# 🔹 Device channel pool (DEVICE_DRIVER=app.device_pool:PooledDriver)
+DEVICE_AGENT_ADDRESS = os.environ.get("DEVICE_AGENT_ADDRESS", "127.0.0.1:7100")  # host:port, may contain {serial}
+DEVICE_POOL_SIZE = int(os.environ.get("DEVICE_POOL_SIZE", "2"))  # Connections per phone
+DEVICE_CONNECT_TIMEOUT = float(os.environ.get("DEVICE_CONNECT_TIMEOUT", "5"))
+DEVICE_COMMAND_TIMEOUT = float(os.environ.get("DEVICE_COMMAND_TIMEOUT", "60"))  # Per batch frame
+DEVICE_HEALTH_CHECK_SECONDS = float(os.environ.get("DEVICE_HEALTH_CHECK_SECONDS", "30"))  # Ping idle connections older than this
+
+# 🔹 Screen matching for swipe_until targets (image targets need numpy)
+SCREEN_TEMPLATE_DIR = os.environ.get("SCREEN_TEMPLATE_DIR", "templates")  # Image target values are paths under this
+SCREEN_MATCH_THRESHOLD = float(os.environ.get("SCREEN_MATCH_THRESHOLD", "0.85"))  # Normalized correlation, 0..1
+SCREEN_TEMPLATE_CACHE_SIZE = int(os.environ.get("SCREEN_TEMPLATE_CACHE_SIZE", "256"))
+
+# 🔹 Run history (write-behind buffer flushed in batched transactions)
+HISTORY_ENABLED = os.environ.get("HISTORY_ENABLED", "1") == "1"
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", "500"))
+HISTORY_FLUSH_SECONDS = float(os.environ.get("HISTORY_FLUSH_SECONDS", "1"))
+HISTORY_MAX_BUFFER = int(os.environ.get("HISTORY_MAX_BUFFER", "100000"))  # Events beyond this are dropped
+HISTORY_EVENT_RETENTION_DAYS = int(os.environ.get("HISTORY_EVENT_RETENTION_DAYS", "7"))  # Then rolled up hourly
+HISTORY_RUN_RETENTION_DAYS = int(os.environ.get("HISTORY_RUN_RETENTION_DAYS", "90"))
+HISTORY_ROLLUP_RETENTION_DAYS = int(os.environ.get("HISTORY_ROLLUP_RETENTION_DAYS", "365"))
+
+# 🔹 Response cache for workflow / RIG detail reads (per process).
+# Entries are dropped on local commits; edits made by other workers are
+# noticed by a version check at most this often.
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "4096"))
+RESPONSE_CACHE_REVALIDATE_SECONDS = float(os.environ.get("RESPONSE_CACHE_REVALIDATE_SECONDS", "2"))
+
+# 🔹 Change feed (GET /changes long-poll, GET /changes/snapshot)
+CHANGES_PAGE_SIZE = int(os.environ.get("CHANGES_PAGE_SIZE", "1000"))
+CHANGES_MAX_WAIT_SECONDS = float(os.environ.get("CHANGES_MAX_WAIT_SECONDS", "30"))  # A waiting request holds a worker thread
+CHANGES_POLL_SECONDS = float(os.environ.get("CHANGES_POLL_SECONDS", "1"))  # Re-check for other workers' commits this often
+CHANGES_RETENTION_DAYS = int(os.environ.get("CHANGES_RETENTION_DAYS", "30"))  # Older nodes must re-bootstrap from a snapshot
+
+# 🔹 Web server
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", "5001"))
+APP_DEBUG = os.environ.get("APP_DEBUG", "0") == "1"
+APP_DUMP_ROUTES = os.environ.get("APP_DUMP_ROUTES", "0") == "1"
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", str(os.cpu_count() or 1)))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+WEB_GRACEFUL_TIMEOUT = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", "30"))
+
+# 🔹 Metrics (/metrics, Prometheus text format)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", "0"))  # 0 = slow-request log off
+
+# 🔹 Bulk phone enrollment
+BULK_MAX_PHONES = int(os.environ.get("BULK_MAX_PHONES", "10000"))
+
+# 🔹 Bulk deletes (POST /workflows/bulk_delete, /rigs/bulk_delete)
+BULK_MAX_DELETE = int(os.environ.get("BULK_MAX_DELETE", "10000"))
+
+# 🔹 Step program fan-out (POST /rigs/<id>/steps/copy_to)
+COPY_MAX_TARGETS = int(os.environ.get("COPY_MAX_TARGETS", "1000"))
@@ -1,11 +1,83 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL  # Ensure DATABASE_URL is correctly set
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from app.config import (  # Ensure DATABASE_URL is correctly set
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# ✅ Initialize Database Connection (pooled)
+engine_options = {"pool_pre_ping": True, "pool_recycle": DB_POOL_RECYCLE}
+if IS_SQLITE:
+    # Connections are handed between worker threads, so let the pool own them
+    engine_options["connect_args"] = {
+        "check_same_thread": False,
+        "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+if not DATABASE_URL.endswith(":memory:"):
+    engine_options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+engine = create_engine(DATABASE_URL, **engine_options)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        WAL lets readers run alongside a writer; busy_timeout makes writers
+        wait for the lock instead of failing with "database is locked".
+        foreign_keys turns on the ON DELETE rules from the migrations.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+def insert_ignore(model):
+    """
+    INSERT that skips rows violating a unique constraint (set-based upsert).
+    """
+    if IS_SQLITE:
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model).on_conflict_do_nothing()
+
+IN_CHUNK = 500  # Stay well under SQLite's bound-parameter limit
+
+def chunked(values, size=IN_CHUNK):
+    """
+    Split a list into slices small enough for one IN (...) clause.
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def existing_ids(db, model, ids):
+    """
+    The subset of ids that exist in model's table, sorted.
+    """
+    found = []
+    for chunk in chunked(sorted(set(ids))):
+        found.extend(db.scalars(select(model.id).where(model.id.in_(chunk))))
+    return found
 
-# ✅ Initialize Database Connection
-engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ✅ Request-scoped Session (one per thread, removed at the end of each request)
+db = scoped_session(SessionLocal)
+
 # ✅ Define Base (DON'T import models here)
 Base = declarative_base()
 
@@ -16,5 +88,23 @@ def get_db():
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+def shutdown_session(exception=None):
+    """
+    Teardown hook: roll back anything left uncommitted and return the
+    connection to the pool.
+    """
+    if exception is not None:
+        db.rollback()
+    db.remove()
+
+def init_app(app):
+    """
+    Register the request-scoped session lifecycle on a Flask app.
+    """
+    app.teardown_appcontext(shutdown_session)
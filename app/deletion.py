@@ -0,0 +1,40 @@
+from sqlalchemy import delete, select, update
+from app.database import chunked, existing_ids
+from app.models import Workflow, WorkflowSteps, RIG, RIGSteps, Phone
+from app.versions import mark_changed
+
+# 🔹 Set-based cascading deletes
+#
+# Children are removed with one DELETE / UPDATE per chunk of parent ids,
+# in the caller's transaction. The FK ON DELETE rules would do the same,
+# but only when the database enforces them; doing it explicitly keeps
+# workflow_steps / rig_steps / phones clean either way.
+
+def _bulk(statement):
+    return statement.execution_options(synchronize_session=False)
+
+def delete_workflows(db, workflow_ids):
+    """
+    Delete workflows and their steps (caller commits). Returns the ids
+    that existed and were deleted.
+    """
+    deleted = existing_ids(db, Workflow, workflow_ids)
+    for chunk in chunked(deleted):
+        db.execute(_bulk(delete(WorkflowSteps).where(WorkflowSteps.workflow_id.in_(chunk))))
+        db.execute(_bulk(delete(Workflow).where(Workflow.id.in_(chunk))))
+    mark_changed(db, Workflow, deleted)
+    return deleted
+
+def delete_rigs(db, rig_ids):
+    """
+    Delete RIGs and their steps and unassign their phones (caller commits).
+    Returns the ids that existed and were deleted.
+    """
+    deleted = existing_ids(db, RIG, rig_ids)
+    for chunk in chunked(deleted):
+        mark_changed(db, Phone, db.scalars(select(Phone.id).where(Phone.rig_id.in_(chunk))).all())
+        db.execute(_bulk(delete(RIGSteps).where(RIGSteps.rig_id.in_(chunk))))
+        db.execute(_bulk(update(Phone).where(Phone.rig_id.in_(chunk)).values(rig_id=None)))
+        db.execute(_bulk(delete(RIG).where(RIG.id.in_(chunk))))
+    mark_changed(db, RIG, deleted)
+    return deleted
@@ -0,0 +1,227 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from app.config import (
+    DEVICE_AGENT_ADDRESS, DEVICE_POOL_SIZE, DEVICE_CONNECT_TIMEOUT, DEVICE_COMMAND_TIMEOUT,
+    DEVICE_HEALTH_CHECK_SECONDS,
+)
+from app.device_protocol import MAX_FRAME_BYTES, encode_frame, encode_op, read_frame
+from app.drivers import BatchError, DeviceDriver, DeviceError
+
+# 🔹 Pooled device driver
+#
+# Keeps up to DEVICE_POOL_SIZE long-lived agent connections per phone
+# (see app/device_protocol.py) instead of connecting for every command.
+# Connections idle for longer than DEVICE_HEALTH_CHECK_SECONDS are pinged
+# before reuse and replaced when the ping fails; a connection that errors
+# mid-frame is dropped and the next command opens a fresh one. The engine
+# sends each run of non-delay workflow steps as one frame (run_batch).
+#
+#   DEVICE_DRIVER=app.device_pool:PooledDriver
+#   python -m app.device_server          local stand-in agent for testing
+
+class _Connection:
+    __slots__ = ("reader", "writer", "last_used")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.writer.close()
+
+class _PhoneChannels:
+    """
+    Connection pool and counters of one phone.
+    """
+    def __init__(self, serial, size):
+        self.serial = serial
+        self.idle = deque()
+        self.slots = asyncio.Semaphore(size)
+        self.open = 0
+        self.queued = 0  # Frames waiting for a free connection
+        self.in_flight = 0
+        self.frames = 0
+        self.commands = 0
+        self.reconnects = 0
+        self.errors = 0
+        self.rtt_last = 0.0
+        self.rtt_total = 0.0
+
+    def stats(self):
+        return {
+            "connections": self.open,
+            "idle": len(self.idle),
+            "queue_depth": self.queued + self.in_flight,
+            "frames": self.frames,
+            "commands": self.commands,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            "rtt_ms_last": round(self.rtt_last * 1000, 3),
+            "rtt_ms_avg": round(self.rtt_total / self.frames * 1000, 3) if self.frames else None,
+        }
+
+class PooledDriver(DeviceDriver):
+    pipelined = True
+
+    def __init__(self, address=DEVICE_AGENT_ADDRESS, pool_size=DEVICE_POOL_SIZE,
+                 connect_timeout=DEVICE_CONNECT_TIMEOUT, command_timeout=DEVICE_COMMAND_TIMEOUT,
+                 health_check_seconds=DEVICE_HEALTH_CHECK_SECONDS):
+        self.address = address
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.health_check_seconds = health_check_seconds
+        self._phones = {}
+        self._frame_ids = itertools.count(1)
+
+    def _channels(self, serial):
+        channels = self._phones.get(serial)
+        if channels is None:
+            channels = self._phones[serial] = _PhoneChannels(serial, self.pool_size)
+        return channels
+
+    async def _open(self, channels):
+        host, _, port = self.address.format(serial=channels.serial).rpartition(":")
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, int(port), limit=MAX_FRAME_BYTES), self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise DeviceError(f"{channels.serial}: cannot reach device agent at {host}:{port} ({e or type(e).__name__})")
+        connection = _Connection(reader, writer)
+        try:
+            writer.write(encode_frame({"hello": channels.serial}))
+            reply = await asyncio.wait_for(read_frame(reader), self.connect_timeout)
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            connection.close()
+            raise DeviceError(f"{channels.serial}: device agent handshake failed ({e or type(e).__name__})")
+        except BaseException:
+            connection.close()  # Cancelled mid-handshake
+            raise
+        if not reply or not reply.get("ok"):
+            connection.close()
+            raise DeviceError(f"{channels.serial}: {reply.get('error') if reply else 'connection closed'}")
+        channels.open += 1
+        return connection
+
+    def _discard(self, channels, connection):
+        connection.close()
+        channels.open -= 1
+
+    async def _exchange(self, channels, connection, cmds):
+        """
+        Send one frame and wait for its reply; drops the connection on any
+        transport error or cancellation.
+        """
+        frame_id = next(self._frame_ids)
+        started = time.perf_counter()
+        channels.in_flight += 1
+        try:
+            connection.writer.write(encode_frame({"id": frame_id, "cmds": cmds}))
+            await connection.writer.drain()
+            reply = await asyncio.wait_for(read_frame(connection.reader), self.command_timeout)
+            if reply is None or reply.get("id") != frame_id:
+                raise ValueError("connection closed" if reply is None else "reply out of order")
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            channels.errors += 1
+            self._discard(channels, connection)
+            raise DeviceError(f"{channels.serial}: device channel failed ({e or type(e).__name__})")
+        except BaseException:
+            # Cancelled mid-frame: its reply may still arrive, so the
+            # connection can never be handed out again
+            self._discard(channels, connection)
+            raise
+        finally:
+            channels.in_flight -= 1
+        connection.last_used = time.monotonic()
+        channels.rtt_last = time.perf_counter() - started
+        channels.rtt_total += channels.rtt_last
+        channels.frames += 1
+        channels.commands += len(cmds)
+        return reply
+
+    async def _acquire(self, channels):
+        """
+        An idle connection that passed its health check, or a new one.
+        """
+        while channels.idle:
+            connection = channels.idle.pop()
+            if time.monotonic() - connection.last_used < self.health_check_seconds:
+                return connection
+            try:
+                await self._exchange(channels, connection, [])
+                return connection
+            except DeviceError:
+                channels.reconnects += 1
+        return await self._open(channels)
+
+    async def _send(self, serial, cmds):
+        channels = self._channels(serial)
+        channels.queued += 1
+        try:
+            await channels.slots.acquire()
+        finally:
+            channels.queued -= 1
+        try:
+            connection = await self._acquire(channels)
+            reply = await self._exchange(channels, connection, cmds)
+            channels.idle.append(connection)
+        finally:
+            channels.slots.release()
+        return reply
+
+    @staticmethod
+    def _raise_for(serial, reply, ops=None):
+        error = reply.get("error")
+        if error is None:
+            return
+        message = f"{serial}: {error.get('message')}"
+        if ops is None:
+            raise DeviceError(message)
+        raise BatchError(message, error["index"], [ms / 1000 for ms in reply.get("ms", ())],
+                         not_found=error.get("code") == "not_found")
+
+    async def _command(self, serial, *cmd):
+        reply = await self._send(serial, [list(cmd)])
+        self._raise_for(serial, reply)
+        return reply["results"][0]
+
+    async def connect(self, serial):
+        """
+        Warm the pool: opens (or health-checks) one connection.
+        """
+        await self._send(serial, [])
+
+    async def disconnect(self, serial):
+        pass  # Connections stay open for the next run
+
+    async def click(self, serial, x, y):
+        await self._command(serial, "click", x, y)
+
+    async def type_text(self, serial, text):
+        await self._command(serial, "type_text", text)
+
+    async def swipe(self, serial, direction):
+        await self._command(serial, "swipe", direction)
+
+    async def find(self, serial, target_type, value, step_id=None):
+        return bool(await self._command(serial, "find", target_type, value, step_id))
+
+    async def run_batch(self, serial, ops):
+        reply = await self._send(serial, [encode_op(op) for op in ops])
+        self._raise_for(serial, reply, ops)
+        return [ms / 1000 for ms in reply["ms"]]
+
+    def stats(self):
+        """
+        {serial: connections / queue depth / round-trip latency counters}.
+        """
+        return {serial: channels.stats() for serial, channels in self._phones.items()}
+
+    async def close(self):
+        for channels in self._phones.values():
+            while channels.idle:
+                self._discard(channels, channels.idle.pop())
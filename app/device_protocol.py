@@ -0,0 +1,58 @@
+import json
+from app.json_provider import dumps_bytes
+from app.plans import Click, Swipe, SwipeUntil, TypeText
+
+# 🔹 Device agent protocol
+#
+# Newline-delimited JSON over TCP, one long-lived connection per channel:
+#
+#   -> {"hello": "<serial>"}                      first frame on a connection
+#   <- {"ok": true} | {"error": "..."}
+#   -> {"id": 7, "cmds": [["click", 10, 20], ["swipe", "Up"], ...]}
+#   <- {"id": 7, "results": [null, null, ...], "ms": [3.1, 12.0, ...], "error": null}
+#
+# The agent runs the commands of a frame in order and stops at the first
+# failure, reporting {"index": i, "message": "...", "code": "device" |
+# "not_found"} with results / ms covering the commands that ran (the failed
+# one included). An empty cmds list is a ping.
+#
+# Commands: click x y, type_text text, swipe direction,
+# find type value step_id (-> bool), swipe_until direction type value
+# max_swipes step_id (-> swipes used; "not_found" when the target never
+# appeared). step_id is the WorkflowSteps row, so the agent can keep an
+# image target's preprocessed template per step (app/screen_match.py); it
+# may be null.
+
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# Workflow ops that can share a batch frame (everything but delays)
+BATCHED_OPS = (Click, TypeText, Swipe, SwipeUntil)
+
+def encode_frame(obj):
+    return dumps_bytes(obj) + b"\n"
+
+async def read_frame(reader):
+    """
+    Next frame from a StreamReader, or None at EOF. Raises ValueError on
+    a malformed frame.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.endswith(b"\n"):
+        raise ValueError("truncated frame")
+    return json.loads(line)
+
+def encode_op(op):
+    """
+    Command list for a batched workflow op.
+    """
+    if isinstance(op, Click):
+        return ["click", op.x, op.y]
+    if isinstance(op, TypeText):
+        return ["type_text", op.text]
+    if isinstance(op, Swipe):
+        return ["swipe", op.direction]
+    if isinstance(op, SwipeUntil):
+        return ["swipe_until", op.direction, op.target_type, op.value, op.max_swipes, op.step_id]
+    raise ValueError(f"{type(op).__name__} cannot be batched")
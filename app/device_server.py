@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import os
+import time
+from app.device_protocol import MAX_FRAME_BYTES, encode_frame, read_frame
+from app.drivers import DeviceError, FakeDriver
+from app.screen_match import ScreenMatcher, load_frame
+
+# 🔹 Stand-in device agent
+#
+# Speaks the device agent protocol (app/device_protocol.py) for any number
+# of serials and executes commands on a FakeDriver, so PooledDriver and the
+# engine can be exercised end to end without phones:
+#
+#   python -m app.device_server --port 7100 --latency 0.005 --target word:OK=3
+#   DEVICE_DRIVER=app.device_pool:PooledDriver python -m app.engine 1
+#
+# With --screens DIR, image targets are matched for real: each phone shows
+# the screenshots in DIR in name order, one swipe per screenshot, and
+# find / swipe_until run ScreenMatcher on the current one (image target
+# values are paths under SCREEN_TEMPLATE_DIR; needs numpy). Word targets
+# still come from --target.
+
+class TargetNotFound(Exception):
+    pass
+
+class ScreenDeck:
+    """
+    Screenshots every stand-in phone scrolls through: each swipe shows the
+    next one, and the last one stays.
+    """
+    def __init__(self, frames):
+        if not frames:
+            raise ValueError("a screen deck needs at least one screenshot")
+        self.frames = frames
+        self._positions = {}
+
+    @classmethod
+    def from_dir(cls, path):
+        return cls([load_frame(os.path.join(path, name)) for name in sorted(os.listdir(path))
+                    if not name.startswith(".")])
+
+    def current(self, serial):
+        return self.frames[self._positions.get(serial, 0)]
+
+    def swiped(self, serial):
+        self._positions[serial] = min(self._positions.get(serial, 0) + 1, len(self.frames) - 1)
+
+class DeviceServer:
+    def __init__(self, driver=None, screens=None, matcher=None):
+        self.driver = driver or FakeDriver()
+        self.screens = screens
+        self.matcher = matcher or (ScreenMatcher() if screens is not None else None)
+        self.frames = 0
+        self._writers = set()
+
+    async def _find(self, serial, target_type, value, step_id=None):
+        if self.screens is None or target_type != "image":
+            return await self.driver.find(serial, target_type, value, step_id)
+        # Templates are cached per step_id; the match itself runs off the event loop
+        frame = self.screens.current(serial)
+        return await asyncio.to_thread(self.matcher.find, frame, target_type, value, step_id) is not None
+
+    async def _swipe(self, serial, direction):
+        result = await self.driver.swipe(serial, direction)
+        if self.screens is not None:
+            self.screens.swiped(serial)
+        return result
+
+    async def _swipe_until(self, serial, direction, target_type, value, max_swipes, step_id=None):
+        for swipes in range(max_swipes):
+            if await self._find(serial, target_type, value, step_id):
+                return swipes
+            await self._swipe(serial, direction)
+        if not await self._find(serial, target_type, value, step_id):
+            raise TargetNotFound(f"{target_type} {value!r} not found after {max_swipes} swipes")
+        return max_swipes
+
+    async def _execute(self, serial, cmd):
+        name, *args = cmd
+        if name == "click":
+            return await self.driver.click(serial, *args)
+        if name == "type_text":
+            return await self.driver.type_text(serial, *args)
+        if name == "swipe":
+            return await self._swipe(serial, *args)
+        if name == "find":
+            return await self._find(serial, *args)
+        if name == "swipe_until":
+            return await self._swipe_until(serial, *args)
+        raise DeviceError(f"Unknown command {name}")
+
+    async def _run_frame(self, serial, frame):
+        results, ms, error = [], [], None
+        for index, cmd in enumerate(frame.get("cmds", ())):
+            started = time.perf_counter()
+            try:
+                results.append(await self._execute(serial, cmd))
+            except TargetNotFound as e:
+                error = {"index": index, "message": str(e), "code": "not_found"}
+            except (DeviceError, TypeError, ValueError) as e:
+                error = {"index": index, "message": str(e), "code": "device"}
+            ms.append(round((time.perf_counter() - started) * 1000, 3))
+            if error is not None:
+                break
+        self.frames += 1
+        return {"id": frame.get("id"), "results": results, "ms": ms, "error": error}
+
+    async def handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            hello = await read_frame(reader)
+            serial = hello.get("hello") if isinstance(hello, dict) else None
+            if not serial:
+                writer.write(encode_frame({"error": "expected hello"}))
+                return
+            try:
+                await self.driver.connect(serial)
+            except DeviceError as e:
+                writer.write(encode_frame({"error": str(e)}))
+                return
+            writer.write(encode_frame({"ok": True}))
+            while (frame := await read_frame(reader)) is not None:
+                writer.write(encode_frame(await self._run_frame(serial, frame)))
+                await writer.drain()
+        except (OSError, ValueError):
+            pass  # Client went away or sent garbage: drop the connection
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @property
+    def connections(self):
+        return len(self._writers)
+
+    def drop_connections(self):
+        """
+        Close every client connection (simulates an agent restart).
+        """
+        for writer in list(self._writers):
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=7100):
+        """
+        Start listening; port 0 picks a free port (see server.sockets).
+        """
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_FRAME_BYTES)
+
+def _target(raw):
+    spec, _, swipes = raw.rpartition("=")
+    target_type, _, value = spec.partition(":")
+    if target_type not in ("word", "image") or not value:
+        raise argparse.ArgumentTypeError("expected word:VALUE=SWIPES or image:VALUE=SWIPES")
+    return (target_type, value), int(swipes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in device agent backed by FakeDriver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per command")
+    parser.add_argument("--target", type=_target, action="append", default=[],
+                        help="word:VALUE=SWIPES / image:VALUE=SWIPES visible after that many swipes")
+    parser.add_argument("--fail", action="append", default=[], help="serial that refuses connections")
+    parser.add_argument("--screens", help="directory of screenshots to match image targets against")
+    args = parser.parse_args()
+    screens = ScreenDeck.from_dir(args.screens) if args.screens else None
+
+    async def main():
+        driver = FakeDriver(args.latency, dict(args.target), args.fail)
+        server = await DeviceServer(driver, screens).start(args.host, args.port)
+        print(f"📱 Stand-in device agent listening on {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,114 @@
+import asyncio
+import importlib
+
+# 🔹 Device drivers
+#
+# The engine only talks to phones through this interface, so the transport
+# (ADB, a device agent, ...) can be swapped without touching plans or routes.
+# Every method is a coroutine and must not block the event loop.
+
+class DeviceError(RuntimeError):
+    """
+    The device rejected a command or could not be reached.
+    """
+
+class BatchError(DeviceError):
+    """
+    A batch stopped at ops[index]. timings holds the seconds of every op
+    that ran, the failed one included; not_found marks a swipe_until whose
+    target never appeared.
+    """
+    def __init__(self, message, index, timings, not_found=False):
+        super().__init__(message)
+        self.index = index
+        self.timings = timings
+        self.not_found = not_found
+
+class DeviceDriver:
+    """
+    Base class for device drivers. serial is Phone.serial_number.
+    """
+    # True when run_batch() is implemented; the engine then sends runs of
+    # consecutive non-delay workflow ops as one batch
+    pipelined = False
+
+    async def connect(self, serial):
+        pass
+
+    async def disconnect(self, serial):
+        pass
+
+    async def click(self, serial, x, y):
+        raise NotImplementedError
+
+    async def type_text(self, serial, text):
+        raise NotImplementedError
+
+    async def swipe(self, serial, direction):
+        raise NotImplementedError
+
+    async def find(self, serial, target_type, value, step_id=None):
+        """
+        Return True when the word / image target is on screen. step_id (the
+        WorkflowSteps row) lets the device cache an image target's template.
+        """
+        raise NotImplementedError
+
+    async def run_batch(self, serial, ops):
+        """
+        Run click / type / swipe / swipe_until ops in order in one round
+        trip. Returns the seconds each op took; raises BatchError.
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class FakeDriver(DeviceDriver):
+    """
+    In-process driver for tests and dry runs: records every command per
+    serial and reports a find() target as visible after a set number of
+    swipes (targets maps (target_type, value) -> swipes needed).
+    """
+    def __init__(self, latency=0.0, targets=None, fail_serials=()):
+        self.latency = latency
+        self.targets = dict(targets or {})
+        self.fail_serials = set(fail_serials)
+        self.calls = {}
+        self._swipes = {}
+
+    async def _record(self, serial, *call):
+        if serial in self.fail_serials:
+            raise DeviceError(f"{serial} is offline")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.setdefault(serial, []).append(call)
+
+    async def connect(self, serial):
+        await self._record(serial, "connect")
+
+    async def disconnect(self, serial):
+        self.calls.setdefault(serial, []).append(("disconnect",))
+
+    async def click(self, serial, x, y):
+        await self._record(serial, "click", x, y)
+
+    async def type_text(self, serial, text):
+        await self._record(serial, "type_text", text)
+
+    async def swipe(self, serial, direction):
+        await self._record(serial, "swipe", direction)
+        self._swipes[serial] = self._swipes.get(serial, 0) + 1
+
+    async def find(self, serial, target_type, value, step_id=None):
+        await self._record(serial, "find", target_type, value)
+        needed = self.targets.get((target_type, value))
+        return needed is not None and self._swipes.get(serial, 0) >= needed
+
+def load_driver(path, **options):
+    """
+    Instantiate a driver from a "module:ClassName" path.
+    """
+    module_name, _, class_name = path.partition(":")
+    driver_class = getattr(importlib.import_module(module_name), class_name)
+    return driver_class(**options)
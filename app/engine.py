@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from app.config import DEVICE_DRIVER, ENGINE_MAX_CONCURRENCY, HISTORY_ENABLED
+from app.database import SessionLocal
+from app.device_protocol import BATCHED_OPS
+from app.drivers import BatchError, DeviceError, load_driver
+from app.history import RunRecorder, history_writer, now_ms
+from app.plans import (
+    Click, Delay, PlanError, RunWorkflow, Swipe, SwipeUntil, SwitchPhone, TypeText,
+    get_rig_plan,
+)
+
+# 🔹 Execution engine
+#
+# Each phone on a RIG walks the RIG plan in its own asyncio task, so dozens
+# of phones run in parallel on one event loop. Delays are asyncio.sleep()
+# timers, never blocking sleeps.
+#
+# RIG semantics: steps apply to every phone until a switch_phone step, after
+# which they apply only to the selected phone (until the next switch).
+#
+# With a pipelined driver, each run of consecutive non-delay workflow ops
+# goes to the phone as one batch (one round trip instead of one per op).
+
+class StepFailed(RuntimeError):
+    def __init__(self, message, step_id):
+        super().__init__(message)
+        self.step_id = step_id
+
+class PhoneResult:
+    __slots__ = ("phone_id", "serial", "status", "steps", "error", "failed_step", "seconds")
+
+    def __init__(self, phone_id, serial):
+        self.phone_id = phone_id
+        self.serial = serial
+        self.status = "pending"
+        self.steps = 0
+        self.error = None
+        self.failed_step = None
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+async def run_op(driver, serial, op):
+    """
+    Execute one workflow op on a phone.
+    """
+    if isinstance(op, Click):
+        await driver.click(serial, op.x, op.y)
+    elif isinstance(op, TypeText):
+        await driver.type_text(serial, op.text)
+    elif isinstance(op, Swipe):
+        await driver.swipe(serial, op.direction)
+    elif isinstance(op, SwipeUntil):
+        for _ in range(op.max_swipes):
+            if await driver.find(serial, op.target_type, op.value, op.step_id):
+                return
+            await driver.swipe(serial, op.direction)
+        if not await driver.find(serial, op.target_type, op.value, op.step_id):
+            raise StepFailed(f"{op.target_type} {op.value!r} not found after {op.max_swipes} swipes", op.step_id)
+    elif isinstance(op, Delay):
+        await asyncio.sleep(op.seconds)
+    else:
+        raise StepFailed(f"Unsupported op {type(op).__name__}", getattr(op, "step_id", None))
+
+async def run_step(driver, serial, op, result, recorder=None, workflow_id=None):
+    """
+    run_op() plus the step count and, with a recorder, a timed step event.
+    """
+    if recorder is None:
+        await run_op(driver, serial, op)
+    else:
+        started_at, started = now_ms(), time.perf_counter()
+        ok = False
+        try:
+            await run_op(driver, serial, op)
+            ok = True
+        finally:
+            recorder.step(op, workflow_id, started_at, time.perf_counter() - started, ok)
+    result.steps += 1
+
+async def run_batch(driver, serial, ops, result, recorder=None, workflow_id=None):
+    """
+    Send ops through driver.run_batch(); step events get the per-op
+    timings the device reported.
+    """
+    started_at = now_ms()
+    failure = None
+    try:
+        timings = await driver.run_batch(serial, ops)
+    except BatchError as e:
+        failure, timings = e, e.timings
+    if recorder is not None:
+        for index, (op, seconds) in enumerate(zip(ops, timings)):
+            recorder.step(op, workflow_id, started_at, seconds, failure is None or index < failure.index)
+            started_at += int(seconds * 1000)
+    if failure is None:
+        result.steps += len(ops)
+        return
+    result.steps += failure.index
+    # Device errors inside a batch still name the op they stopped at
+    raise StepFailed(str(failure), ops[failure.index].step_id if failure.index < len(ops) else None) from failure
+
+async def run_workflow_plan(driver, serial, plan, result, recorder=None):
+    if not driver.pipelined:
+        for op in plan.ops:
+            await run_step(driver, serial, op, result, recorder, plan.workflow_id)
+        return
+    batch = []
+    for op in plan.ops:
+        if isinstance(op, BATCHED_OPS):
+            batch.append(op)
+            continue
+        if batch:
+            await run_batch(driver, serial, batch, result, recorder, plan.workflow_id)
+            batch = []
+        await run_step(driver, serial, op, result, recorder, plan.workflow_id)
+    if batch:
+        await run_batch(driver, serial, batch, result, recorder, plan.workflow_id)
+
+async def run_phone(driver, ops, phone_id, serial, semaphore, recorder=None):
+    result = PhoneResult(phone_id, serial)
+    started = time.monotonic()
+    async with semaphore:
+        result.status = "running"
+        selected = None  # None = every phone
+        try:
+            await driver.connect(serial)
+            for op in ops:
+                if isinstance(op, SwitchPhone):
+                    selected = op.phone_id
+                    continue
+                if selected is not None and selected != phone_id:
+                    continue
+                if isinstance(op, RunWorkflow):
+                    await run_workflow_plan(driver, serial, op.plan, result, recorder)
+                else:
+                    await run_step(driver, serial, op, result, recorder)
+            result.status = "completed"
+        except StepFailed as e:
+            result.status, result.error, result.failed_step = "failed", str(e), e.step_id
+        except DeviceError as e:
+            result.status, result.error = "failed", str(e)
+        except Exception as e:
+            # Anything else the driver raises (OSError, timeouts, missing
+            # methods) fails this phone only; the other phones keep running
+            # and the run is still recorded. Cancellation propagates.
+            result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            try:
+                await driver.disconnect(serial)
+            except Exception:
+                pass  # The phone's result is already decided
+    result.seconds = time.monotonic() - started
+    if recorder is not None:
+        recorder.finish(result)
+    return result
+
+def _recorder(history, phone_id, rig_id=None, workflow_id=None):
+    return RunRecorder(history, phone_id, rig_id, workflow_id) if history is not None else None
+
+async def run_rig_plan(driver, rig_plan, max_concurrency=ENGINE_MAX_CONCURRENCY, history=None):
+    """
+    Run a compiled RIG plan on all of its phones concurrently.
+    Returns one PhoneResult per phone, in phone id order. With a
+    HistoryWriter, every phone's run and steps are recorded.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(
+        run_phone(driver, rig_plan.ops, phone_id, serial, semaphore,
+                  _recorder(history, phone_id, rig_id=rig_plan.rig_id))
+        for phone_id, serial in rig_plan.phones
+    ))
+
+async def run_workflow_on_phones(driver, workflow_plan, phones, max_concurrency=ENGINE_MAX_CONCURRENCY,
+                                 history=None, rig_id=None, semaphore=None):
+    """
+    Run one workflow plan on the given (phone_id, serial) pairs concurrently.
+    Pass a shared semaphore to cap concurrency across several calls.
+    """
+    ops = (RunWorkflow(None, workflow_plan.workflow_id, workflow_plan),)
+    semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(
+        run_phone(driver, ops, phone_id, serial, semaphore,
+                  _recorder(history, phone_id, rig_id=rig_id, workflow_id=workflow_plan.workflow_id))
+        for phone_id, serial in phones
+    ))
+
+def run_rig(rig_id, driver=None, history=history_writer if HISTORY_ENABLED else None):
+    """
+    Compile and run a RIG synchronously (CLI / scripts).
+    """
+    db = SessionLocal()
+    try:
+        plan = get_rig_plan(db, rig_id)
+    finally:
+        db.close()
+    if plan is None:
+        raise PlanError(f"RIG {rig_id} not found")
+    driver = driver or load_driver(DEVICE_DRIVER)
+
+    async def main():
+        try:
+            return await run_rig_plan(driver, plan, history=history)
+        finally:
+            await driver.close()
+
+    return asyncio.run(main())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a RIG's steps on its phones")
+    parser.add_argument("rig_id", type=int)
+    parser.add_argument("--driver", default=DEVICE_DRIVER, help="module:ClassName of the device driver")
+    args = parser.parse_args()
+    driver = load_driver(args.driver)
+    try:
+        results = run_rig(args.rig_id, driver)
+    except PlanError as e:
+        raise SystemExit(f"❌ Cannot compile RIG {args.rig_id}: {e} (step {e.step_id})")
+    print(json.dumps([r.to_dict() for r in results], indent=2))
+    if hasattr(driver, "stats"):
+        print(f"🔹 Device channels: {json.dumps(driver.stats())}", file=sys.stderr)
@@ -0,0 +1,82 @@
+import csv
+import io
+from sqlalchemy import select, update
+from app.database import chunked, insert_ignore
+from app.models import Phone, RIG
+from app.versions import bump_versions, mark_changed
+
+# 🔹 Bulk phone enrollment
+#
+# Serial numbers are validated in Python, inserted with one
+# INSERT ... ON CONFLICT DO NOTHING, optionally assigned to a RIG with one
+# UPDATE, and reported row by row as created / existing / error.
+
+SERIAL_MAX_LENGTH = Phone.__table__.c.serial_number.type.length
+
+def parse_serials_csv(text):
+    """
+    First column of each row; a leading "serial_number" header is skipped.
+    """
+    serials = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row:
+            continue
+        value = row[0].strip()
+        if not serials and value.lower() in ("serial_number", "serial"):
+            continue
+        serials.append(value)
+    return serials
+
+def _phones_by_serial(db, serials):
+    found = {}
+    for chunk in chunked(serials):
+        for phone_id, serial, rig_id in db.execute(
+            select(Phone.id, Phone.serial_number, Phone.rig_id).where(Phone.serial_number.in_(chunk))
+        ):
+            found[serial] = (phone_id, rig_id)
+    return found
+
+def enroll_phones(db, serials, rig_id=None):
+    """
+    Create every phone that doesn't exist yet and optionally move all of
+    them to rig_id (caller commits). Returns (results, counts).
+    """
+    results, valid, seen = [], [], set()
+    for serial in serials:
+        if not isinstance(serial, str) or not serial.strip():
+            results.append({"serial_number": serial, "status": "error", "error": "serial_number must be a non-empty string"})
+        elif len(serial.strip()) > SERIAL_MAX_LENGTH:
+            results.append({"serial_number": serial, "status": "error", "error": f"serial_number longer than {SERIAL_MAX_LENGTH}"})
+        elif serial.strip() in seen:
+            results.append({"serial_number": serial, "status": "error", "error": "Duplicate in request"})
+        else:
+            serial = serial.strip()
+            seen.add(serial)
+            valid.append(serial)
+            results.append({"serial_number": serial, "status": None})
+
+    existing = _phones_by_serial(db, valid)
+    missing = [s for s in valid if s not in existing]
+    if missing:
+        db.execute(insert_ignore(Phone), [{"serial_number": s, "rig_id": rig_id} for s in missing])
+    phones = _phones_by_serial(db, valid) if missing else existing
+    mark_changed(db, Phone, [phones[s][0] for s in missing if s in phones])
+
+    if rig_id is not None:
+        moved = [phone_id for s, (phone_id, old_rig) in existing.items() if old_rig != rig_id]
+        mark_changed(db, Phone, moved)
+        for chunk in chunked(moved):
+            db.execute(
+                update(Phone).where(Phone.id.in_(chunk)).values(rig_id=rig_id)
+                .execution_options(synchronize_session=False)
+            )
+        old_rigs = {old_rig for phone_id, old_rig in existing.values() if old_rig not in (None, rig_id)}
+        bump_versions(db, RIG, old_rigs | {rig_id})
+
+    counts = {"created": 0, "existing": 0, "error": 0}
+    for result in results:
+        if result["status"] is None:
+            result["status"] = "existing" if result["serial_number"] in existing else "created"
+            result["id"] = phones[result["serial_number"]][0]
+        counts[result["status"]] += 1
+    return results, counts
@@ -0,0 +1,310 @@
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+from sqlalchemy import case, delete, func, insert, or_, select
+from app.config import (
+    HISTORY_BATCH_SIZE, HISTORY_FLUSH_SECONDS, HISTORY_MAX_BUFFER,
+    HISTORY_EVENT_RETENTION_DAYS, HISTORY_RUN_RETENTION_DAYS, HISTORY_ROLLUP_RETENTION_DAYS,
+)
+from app.database import engine
+from app.models import Run, StepEvent, StepRollup
+from app.plans import Click, Delay, Swipe, SwipeUntil, TypeText
+
+# 🔹 Run history
+#
+# The engine records one Run per phone execution and one StepEvent per
+# executed op. Recording only appends to an in-memory buffer (safe to call
+# from the event loop); a background thread writes the buffer with two
+# executemany INSERTs per transaction, every HISTORY_FLUSH_SECONDS or as soon
+# as HISTORY_BATCH_SIZE rows are waiting. Past their retention, step events
+# are folded into hourly step_rollups (see compact_history).
+
+logger = logging.getLogger("app.history")
+
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+
+OP_ACTIONS = {
+    Click: "click",
+    TypeText: "type_input",
+    Swipe: "swipe",
+    SwipeUntil: "swipe_until",
+    Delay: "set_time_delay",
+}
+
+def now_ms():
+    return int(time.time() * 1000)
+
+def new_run_id():
+    """
+    Random positive 63-bit id, so workers and processes never need to ask
+    the database for one before the run is flushed.
+    """
+    return random.getrandbits(63) or 1
+
+class HistoryWriter:
+    """
+    Thread-safe write-behind buffer for runs and step events.
+    """
+    def __init__(self, engine, batch_size=HISTORY_BATCH_SIZE, flush_seconds=HISTORY_FLUSH_SECONDS,
+                 max_buffer=HISTORY_MAX_BUFFER):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._runs = []
+        self._events = []
+        self._thread = None
+        self._closed = False
+
+    def _append(self, kind, row):
+        if self._pid != os.getpid():  # Forked (gunicorn worker): start clean
+            self._reset()
+        with self._cond:
+            if len(self._runs) + len(self._events) >= self.max_buffer:
+                self.dropped += 1
+                return
+            (self._runs if kind == "runs" else self._events).append(row)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._loop, name="history-writer", daemon=True)
+                self._thread.start()
+            if len(self._runs) + len(self._events) >= self.batch_size:
+                self._cond.notify()
+
+    def record_run(self, row):
+        self._append("runs", row)
+
+    def record_step(self, row):
+        self._append("events", row)
+
+    def pending(self):
+        with self._cond:
+            return len(self._runs) + len(self._events)
+
+    def flush(self):
+        """
+        Write everything buffered so far in one transaction. Returns the
+        number of rows written; on a database error the rows go back to the
+        front of the buffer for the next attempt.
+        """
+        with self._flush_lock:
+            with self._cond:
+                runs, self._runs = self._runs, []
+                events, self._events = self._events, []
+            if not runs and not events:
+                return 0
+            try:
+                with self.engine.begin() as conn:
+                    if runs:
+                        conn.execute(insert(Run), runs)
+                    if events:
+                        conn.execute(insert(StepEvent), events)
+            except Exception:
+                logger.exception("history flush failed; %d rows kept for retry", len(runs) + len(events))
+                with self._cond:
+                    self._runs[:0] = runs
+                    self._events[:0] = events
+                return 0
+            self.written += len(runs) + len(events)
+            return len(runs) + len(events)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._runs) + len(self._events) < self.batch_size:
+                    self._cond.wait(self.flush_seconds)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        """
+        Stop the background thread and write what is left.
+        """
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout=10)
+        self.flush()
+
+history_writer = HistoryWriter(engine)
+atexit.register(history_writer.close)
+
+class RunRecorder:
+    """
+    Collects one phone's run into a HistoryWriter.
+    """
+    __slots__ = ("writer", "run_id", "phone_id", "rig_id", "workflow_id", "started_at")
+
+    def __init__(self, writer, phone_id, rig_id=None, workflow_id=None):
+        self.writer = writer
+        self.run_id = new_run_id()
+        self.phone_id = phone_id
+        self.rig_id = rig_id
+        self.workflow_id = workflow_id
+        self.started_at = now_ms()
+
+    def step(self, op, workflow_id, started_at, seconds, ok):
+        self.writer.record_step({
+            "run_id": self.run_id,
+            "phone_id": self.phone_id,
+            "rig_id": self.rig_id,
+            "workflow_id": workflow_id,
+            "step_id": op.step_id,
+            "action": OP_ACTIONS.get(type(op), type(op).__name__),
+            "started_at": started_at,
+            "duration_ms": int(seconds * 1000),
+            "ok": ok,
+        })
+
+    def finish(self, result):
+        self.writer.record_run({
+            "id": self.run_id,
+            "phone_id": self.phone_id,
+            "rig_id": self.rig_id,
+            "workflow_id": self.workflow_id,
+            "status": result.status,
+            "started_at": self.started_at,
+            "duration_ms": int(result.seconds * 1000),
+            "steps": result.steps,
+            "failed_step_id": result.failed_step,
+            "error": result.error[:255] if result.error else None,
+        })
+
+# 🔹 Retention / rollup
+
+def compact_history(conn, now=None):
+    """
+    Fold step events older than HISTORY_EVENT_RETENTION_DAYS into hourly
+    rollups, then drop expired events, runs and rollups (caller commits).
+    The cutoff is aligned to the hour, so each hour is rolled up once.
+    Returns {label: rows affected}.
+    """
+    now = now_ms() if now is None else now
+    event_cutoff = (now - HISTORY_EVENT_RETENTION_DAYS * DAY_MS) // HOUR_MS * HOUR_MS
+    hour = (StepEvent.started_at // HOUR_MS) * HOUR_MS
+    rollup = (
+        select(
+            hour, StepEvent.phone_id, StepEvent.rig_id, StepEvent.workflow_id, StepEvent.action,
+            func.count(), func.sum(case((StepEvent.ok, 0), else_=1)),
+            func.sum(StepEvent.duration_ms), func.max(StepEvent.duration_ms),
+        )
+        .where(StepEvent.started_at < event_cutoff)
+        .group_by(hour, StepEvent.phone_id, StepEvent.rig_id, StepEvent.workflow_id, StepEvent.action)
+    )
+    columns = ["hour", "phone_id", "rig_id", "workflow_id", "action", "count", "failures", "total_ms", "max_ms"]
+    return {
+        "hourly rollup rows written": conn.execute(
+            insert(StepRollup).from_select(columns, rollup)
+        ).rowcount,
+        "step events expired": conn.execute(
+            delete(StepEvent).where(StepEvent.started_at < event_cutoff)
+        ).rowcount,
+        "runs expired": conn.execute(
+            delete(Run).where(Run.started_at < now - HISTORY_RUN_RETENTION_DAYS * DAY_MS)
+        ).rowcount,
+        "rollups expired": conn.execute(
+            delete(StepRollup).where(StepRollup.hour < now - HISTORY_ROLLUP_RETENTION_DAYS * DAY_MS)
+        ).rowcount,
+    }
+
+# 🔹 Queries (all range scans on an (owner, time) index)
+
+def runs_between(db, owner, owner_id, since, until, limit):
+    """
+    Runs of a phone / RIG / workflow started in [since, until), newest first.
+    A workflow's runs include the RIG runs that invoked it, found through
+    their step events (so only while those are kept, see compact_history).
+    """
+    owned = getattr(Run, f"{owner}_id") == owner_id
+    if owner == "workflow":
+        invoked = select(StepEvent.run_id).where(
+            StepEvent.workflow_id == owner_id, StepEvent.started_at >= since
+        )
+        owned = or_(owned, Run.id.in_(invoked))
+    return db.execute(
+        select(
+            Run.id, Run.phone_id, Run.rig_id, Run.workflow_id, Run.status, Run.started_at,
+            Run.duration_ms, Run.steps, Run.failed_step_id, Run.error,
+        )
+        .where(owned, Run.started_at >= since, Run.started_at < until)
+        .order_by(Run.started_at.desc())
+        .limit(limit)
+    ).all()
+
+def run_steps(db, run_id):
+    """
+    Step events of one run in execution order.
+    """
+    return db.execute(
+        select(
+            StepEvent.step_id, StepEvent.workflow_id, StepEvent.action, StepEvent.started_at,
+            StepEvent.duration_ms, StepEvent.ok,
+        )
+        .where(StepEvent.run_id == run_id)
+        .order_by(StepEvent.started_at, StepEvent.id)
+    ).all()
+
+def action_stats(db, owner, owner_id, since, until):
+    """
+    Per-action count / failures / avg_ms / max_ms for a phone / RIG /
+    workflow over [since, until): raw events where they are still kept,
+    plus the hourly rollups of older ones.
+    """
+    totals = {}
+
+    def add(action, count, failures, total_ms, max_ms):
+        entry = totals.setdefault(action, [0, 0, 0, 0])
+        entry[0] += count
+        entry[1] += failures or 0
+        entry[2] += total_ms or 0
+        entry[3] = max(entry[3], max_ms or 0)
+
+    event_owner = getattr(StepEvent, f"{owner}_id")
+    for row in db.execute(
+        select(
+            StepEvent.action, func.count(), func.sum(case((StepEvent.ok, 0), else_=1)),
+            func.sum(StepEvent.duration_ms), func.max(StepEvent.duration_ms),
+        )
+        .where(event_owner == owner_id, StepEvent.started_at >= since, StepEvent.started_at < until)
+        .group_by(StepEvent.action)
+    ):
+        add(*row)
+
+    rollup_owner = getattr(StepRollup, f"{owner}_id")
+    for row in db.execute(
+        select(
+            StepRollup.action, func.sum(StepRollup.count), func.sum(StepRollup.failures),
+            func.sum(StepRollup.total_ms), func.max(StepRollup.max_ms),
+        )
+        .where(rollup_owner == owner_id, StepRollup.hour >= since, StepRollup.hour < until)
+        .group_by(StepRollup.action)
+    ):
+        add(*row)
+
+    return [
+        {
+            "action": action,
+            "count": count,
+            "failures": failures,
+            "avg_ms": round(total_ms / count, 1) if count else None,
+            "max_ms": max_ms,
+        }
+        for action, (count, failures, total_ms, max_ms) in sorted(totals.items())
+    ]
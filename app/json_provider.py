@@ -0,0 +1,51 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+
+# 🔹 Fast JSON encoding
+#
+# orjson is used when it is installed (pip install orjson); otherwise the
+# stdlib encoder. Both produce the same compact, key-sorted output Flask's
+# jsonify did, so payloads are unchanged.
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+def dumps_bytes(obj, default=None):
+    """
+    Compact, key-sorted JSON as bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=default, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when available. Types orjson
+    doesn't handle natively (dates, Decimal, ...) fall back to Flask's
+    default() so they serialize exactly as before.
+    """
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = _ORJSON_OPTIONS if self.sort_keys else _ORJSON_OPTIONS & ~orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        # Skip the str round trip: encode straight to the response body
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,104 @@
+import enum
+from flask import Response, jsonify, request
+from sqlalchemy import select
+from app.config import LIST_MAX_LIMIT, LIST_STREAM_BATCH
+from app.database import db, engine
+from app.json_provider import dumps_bytes
+
+# 🔹 Shared list endpoint helper: keyset pagination on id, field selection,
+# and opt-in streaming straight from a server-side cursor.
+#
+#   ?limit=N&after=<id>      page of at most N rows with id > after;
+#                            X-Next-After header holds the next cursor
+#   ?fields=id,name          only return these columns
+#   ?stream=ndjson|json      stream rows as NDJSON or a chunked JSON array
+
+class ListArgsError(ValueError):
+    pass
+
+def _int_arg(name, minimum):
+    raw = request.args.get(name)
+    if raw is None:
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ListArgsError(f"{name} must be an integer")
+    if value < minimum:
+        raise ListArgsError(f"{name} must be >= {minimum}")
+    return value
+
+def page_args():
+    """
+    Parse ?limit= and ?after= (either may be None); raises ListArgsError.
+    """
+    return _int_arg("limit", 1), _int_arg("after", 0)
+
+def _parse_fields(default_fields, allowed_fields):
+    raw = request.args.get("fields")
+    if not raw:
+        return list(default_fields)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        raise ListArgsError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed_fields)}")
+    return fields
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+def _row_dict(row, fields):
+    return {f: _plain(row._mapping[f]) for f in fields}
+
+def _stream(stmt, fields, mode):
+    """
+    Yield encoded rows from a dedicated connection (the request session is
+    already gone by the time the response body is iterated).
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=LIST_STREAM_BATCH).execute(stmt)
+        if mode == "ndjson":
+            for row in result:
+                yield dumps_bytes(_row_dict(row, fields)) + b"\n"
+            return
+        first = True
+        yield b"["
+        for row in result:
+            yield (b"" if first else b",") + dumps_bytes(_row_dict(row, fields))
+            first = False
+        yield b"]"
+
+def list_response(model, default_fields, allowed_fields, *filters):
+    """
+    Build a paginated / streamed list response for model.
+    """
+    try:
+        limit, after = page_args()
+        fields = _parse_fields(default_fields, allowed_fields)
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mode = request.args.get("stream")
+    if mode not in (None, "ndjson", "json"):
+        return jsonify({"error": "stream must be 'ndjson' or 'json'"}), 400
+
+    columns = [getattr(model, f) for f in dict.fromkeys(["id", *fields])]
+    stmt = select(*columns).where(*filters).order_by(model.id)
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+
+    if mode:
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        mimetype = "application/x-ndjson" if mode == "ndjson" else "application/json"
+        return Response(_stream(stmt, fields, mode), mimetype=mimetype)
+
+    if limit is not None:
+        limit = min(limit, LIST_MAX_LIMIT)
+        stmt = stmt.limit(limit + 1)  # One extra row tells us if there is a next page
+
+    rows = db.execute(stmt).all()
+    response = jsonify([_row_dict(r, fields) for r in rows[:limit]])
+    if limit is not None and len(rows) > limit:
+        response.headers["X-Next-After"] = str(rows[limit - 1].id)
+    return response
@@ -0,0 +1,139 @@
+import argparse
+import os
+from sqlalchemy import delete, exists, func, select, update
+from app.database import chunked, engine, IS_SQLITE
+from app.changes import record_changes, trim_changes
+from app.history import compact_history
+from app.models import (
+    Action, ActionConfig, Workflow, WorkflowSteps,
+    RIG, RIGAction, RIGActionConfig, RIGSteps, Phone,
+)
+
+# 🔹 Offline maintenance: purge orphans, compact run history, then
+# VACUUM / ANALYZE
+#
+#   python -m app.maintenance [--dry-run] [--skip-vacuum]
+#
+# Orphans are rows whose parent is gone, left behind by deletes that ran
+# before the cascading deletes or with FK enforcement off. Steps and configs
+# are deleted; phones are only unassigned. Each check is one set-based
+# statement. Unassigned phones, and workflows / RIGs that lost steps, get a
+# change feed entry (and the workflows / RIGs a version bump) like the
+# API's own writes, so edge replicas see the purge. VACUUM rewrites the
+# whole database file and needs an exclusive lock, so run this with the
+# API stopped.
+
+def _missing(parent_id_column, child_column):
+    return ~exists().where(parent_id_column == child_column)
+
+ORPHAN_CHECKS = [
+    # (label, table, orphan condition, "delete" | "unassign",
+    #  (model, column) naming the resources whose state changed, or None)
+    ("workflow_steps without workflow", WorkflowSteps,
+     _missing(Workflow.id, WorkflowSteps.workflow_id), "delete", None),
+    ("workflow_steps without action", WorkflowSteps,
+     _missing(Action.id, WorkflowSteps.action_id), "delete", (Workflow, WorkflowSteps.workflow_id)),
+    ("rig_steps without RIG", RIGSteps,
+     _missing(RIG.id, RIGSteps.rig_id), "delete", None),
+    ("rig_steps without RIG action", RIGSteps,
+     _missing(RIGAction.id, RIGSteps.rig_action_id), "delete", (RIG, RIGSteps.rig_id)),
+    ("action_configs without action", ActionConfig,
+     _missing(Action.id, ActionConfig.action_id), "delete", None),
+    ("rig_action_configs without RIG action", RIGActionConfig,
+     _missing(RIGAction.id, RIGActionConfig.rig_action_id), "delete", None),
+    ("phones assigned to a missing RIG", Phone,
+     Phone.rig_id.is_not(None) & _missing(RIG.id, Phone.rig_id), "unassign", (Phone, Phone.id)),
+]
+
+def count_orphans(conn):
+    """
+    Return {label: number of orphan rows}.
+    """
+    return {
+        label: conn.execute(select(func.count()).select_from(model).where(condition)).scalar()
+        for label, model, condition, _, _ in ORPHAN_CHECKS
+    }
+
+def purge_orphans(conn):
+    """
+    Delete orphan steps / configs and unassign orphan phones (caller
+    commits). Returns {label: rows affected}.
+    """
+    purged, changed = {}, {}
+    for label, model, condition, action, feed in ORPHAN_CHECKS:
+        if action == "unassign":
+            statement = update(model).where(condition).values(rig_id=None)
+        else:
+            statement = delete(model).where(condition)
+        if feed is None:
+            purged[label] = conn.execute(statement).rowcount
+            continue
+        resource, column = feed
+        ids = conn.scalars(statement.returning(column)).all()  # One id per affected row
+        purged[label] = len(ids)
+        changed.setdefault(resource, set()).update(ids)
+
+    for resource, ids in changed.items():
+        if resource is not Phone:
+            for chunk in chunked(sorted(ids)):
+                conn.execute(update(resource).where(resource.id.in_(chunk)).values(version=resource.version + 1))
+    record_changes(conn, {(resource.__tablename__, i) for resource, ids in changed.items() for i in ids})
+    return purged
+
+def database_size():
+    """
+    Size in bytes of the SQLite database file plus its WAL (None for other
+    databases).
+    """
+    path = engine.url.database
+    if not IS_SQLITE or not path or path == ":memory:":
+        return None
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def vacuum_analyze():
+    """
+    Reclaim free pages and refresh the query planner's statistics. Runs
+    outside a transaction, as VACUUM requires.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if IS_SQLITE:
+            conn.exec_driver_sql("VACUUM")
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        else:
+            conn.exec_driver_sql("VACUUM ANALYZE")
+
+def run(dry_run=False, vacuum=True):
+    history, expired = {}, 0
+    with engine.begin() as conn:
+        if dry_run:
+            counts = count_orphans(conn)
+        else:
+            counts = purge_orphans(conn)
+            history = compact_history(conn)  # Roll up / expire old run history
+            expired = trim_changes(conn)  # Feed entries past CHANGES_RETENTION_DAYS
+    verb = "Found" if dry_run else "Purged"
+    for label, count in counts.items():
+        print(f"🔹 {verb} {count} {label}")
+    for label, count in history.items():
+        print(f"🔹 History: {label}: {count}")
+    if not dry_run:
+        print(f"🔹 Change feed: {expired} entries expired")
+    if dry_run or not vacuum:
+        return counts
+
+    size_before = database_size()
+    vacuum_analyze()
+    size_after = database_size()
+    if size_before is not None:
+        print(f"✅ VACUUM / ANALYZE done: {size_before:,} -> {size_after:,} bytes")
+    else:
+        print("✅ VACUUM / ANALYZE done")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge orphan rows, then VACUUM / ANALYZE (run with the API stopped)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count orphans")
+    parser.add_argument("--skip-vacuum", action="store_true", help="Purge without VACUUM / ANALYZE")
+    args = parser.parse_args()
+    run(dry_run=args.dry_run, vacuum=not args.skip_vacuum)
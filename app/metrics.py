@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from app.config import SLOW_REQUEST_MS
+
+# 🔹 Per-endpoint request / SQL metrics
+#
+# Flask hooks time each request; SQLAlchemy cursor events count the SQL
+# statements it issues. Totals are kept per (endpoint, method) in plain dicts
+# under one lock and rendered in Prometheus text format on GET /metrics.
+# Each gunicorn worker keeps its own counters (labelled with pid).
+
+logger = logging.getLogger("app.metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+class EndpointStats:
+    __slots__ = ("latency", "sql_per_request", "statuses", "sql_statements", "sql_seconds", "sql_rows", "response_bytes")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_per_request = Histogram(SQL_COUNT_BUCKETS)
+        self.statuses = {}
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.sql_rows = 0
+        self.response_bytes = 0
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, method, status, seconds, sql_count, sql_seconds, sql_rows, response_bytes):
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = EndpointStats()
+            stats.latency.observe(seconds)
+            stats.sql_per_request.observe(sql_count)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.sql_statements += sql_count
+            stats.sql_seconds += sql_seconds
+            stats.sql_rows += sql_rows
+            stats.response_bytes += response_bytes
+
+    def totals(self):
+        """
+        (requests, sql_statements) summed over every endpoint.
+        """
+        with self._lock:
+            stats = list(self._endpoints.values())
+            return sum(s.latency.count for s in stats), sum(s.sql_statements for s in stats)
+
+    def render(self):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            pid = os.getpid()
+            lines = []
+
+            def histogram(name, help_text, attr):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (endpoint, method), stats in items:
+                    h = getattr(stats, attr)
+                    labels = f'endpoint="{endpoint}",method="{method}",pid="{pid}"'
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {h.sum:g}")
+                    lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+            def counter(name, help_text, attr):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (endpoint, method), stats in items:
+                    labels = f'endpoint="{endpoint}",method="{method}",pid="{pid}"'
+                    lines.append(f"{name}{{{labels}}} {getattr(stats, attr):g}")
+
+            histogram("http_request_duration_seconds", "Request latency.", "latency")
+            histogram("http_request_sql_statements_per_request", "SQL statements issued per request.", "sql_per_request")
+
+            lines.append("# HELP http_requests_total Requests by status code.")
+            lines.append("# TYPE http_requests_total counter")
+            for (endpoint, method), stats in items:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}",pid="{pid}"}} {count}'
+                    )
+
+            counter("http_request_sql_statements_total", "SQL statements issued.", "sql_statements")
+            counter("http_request_sql_seconds_total", "Time spent executing SQL.", "sql_seconds")
+            counter("http_request_sql_rows_total", "Rows written by INSERT/UPDATE/DELETE (SQLite reports no count for SELECT).", "sql_rows")
+            counter("http_response_bytes_total", "Response body bytes (streamed bodies are not counted).", "response_bytes")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# 🔹 Hooks
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_seconds = 0.0
+    g.sql_rows = 0
+    g.sql_log = [] if SLOW_REQUEST_MS else None
+
+def _after_request(response):
+    started = g.get("metrics_started")
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.endpoint or "<unmatched>"
+    metrics.record(
+        endpoint, request.method, response.status_code, seconds,
+        g.sql_count, g.sql_seconds, g.sql_rows,
+        response.content_length or 0,
+    )
+    if SLOW_REQUEST_MS and seconds * 1000 >= SLOW_REQUEST_MS:
+        logger.warning(
+            "Slow request %s %s -> %s in %.1f ms, %d SQL statements (%.1f ms):\n%s",
+            request.method, request.full_path, response.status_code, seconds * 1000,
+            g.sql_count, g.sql_seconds * 1000,
+            "\n".join(f"  {ms:7.2f} ms  {statement}" for ms, statement in g.sql_log),
+        )
+    return response
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or "metrics_started" not in g:
+        return
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    g.sql_count += 1
+    g.sql_seconds += elapsed
+    if cursor.rowcount > 0:
+        g.sql_rows += cursor.rowcount
+    if g.sql_log is not None:
+        g.sql_log.append((elapsed * 1000, " ".join(statement.split())[:500]))
+
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+def init_metrics(app, engine):
+    """
+    Install request / SQL instrumentation and the GET /metrics route.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
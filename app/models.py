@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, Enum, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base  # ✅ Import Base only (No other database imports here)
 import enum  # ✅ Import Python Enum for WeekdayEnum
@@ -21,6 +21,9 @@ class Workflow(Base):
     end_hour = Column(Integer, nullable=False)
     start_day = Column(Enum(WeekdayEnum, name="weekday_enum"), nullable=False)
     end_day = Column(Enum(WeekdayEnum, name="weekday_enum"), nullable=False)
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # ✅ Bumped on every step change
+
+    steps = relationship("WorkflowSteps", back_populates="workflow", order_by="WorkflowSteps.step_order", passive_deletes=True)
 
 class Action(Base):
     __tablename__ = "actions"
@@ -28,50 +31,179 @@ class Action(Base):
     name = Column(String(100), nullable=False)
     type = Column(Enum('click', 'type_input', 'swipe', 'swipe_until', 'set_time_delay', name="action_type_enum"), nullable=False)
 
+    configs = relationship("ActionConfig", back_populates="action")
+
 class ActionConfig(Base):
     __tablename__ = "action_configs"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    action_id = Column(Integer, ForeignKey('actions.id'))
+    action_id = Column(Integer, ForeignKey('actions.id', ondelete="CASCADE"))
     option_name = Column(String(100), nullable=False)
     valid_values = Column(JSON, nullable=False)
 
+    action = relationship("Action", back_populates="configs")
+
+    __table_args__ = (
+        Index("ix_action_configs_action_id", "action_id"),
+    )
+
 class WorkflowSteps(Base):
     __tablename__ = "workflow_steps"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    workflow_id = Column(Integer, ForeignKey('workflows.id'))
+    workflow_id = Column(Integer, ForeignKey('workflows.id', ondelete="CASCADE"))
     action_id = Column(Integer, ForeignKey('actions.id'))
     selected_value = Column(JSON, nullable=False)  # ✅ Ensure this is JSON (for consistency)
     step_order = Column(Integer, nullable=False)
 
+    workflow = relationship("Workflow", back_populates="steps")
+    action = relationship("Action")
+
+    __table_args__ = (
+        Index("ix_workflow_steps_workflow_id_step_order", "workflow_id", "step_order"),
+    )
+
 class RIG(Base):
     __tablename__ = "rigs"
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     description = Column(String(255))
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # ✅ Bumped on step / phone changes
+
+    phones = relationship("Phone", back_populates="rig", passive_deletes=True)
+    steps = relationship("RIGSteps", back_populates="rig", order_by="RIGSteps.step_order", passive_deletes=True)
 
 class Phone(Base):
     __tablename__ = "phones"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    rig_id = Column(Integer, ForeignKey('rigs.id'))
+    rig_id = Column(Integer, ForeignKey('rigs.id', ondelete="SET NULL"), index=True)
     serial_number = Column(String(50), unique=True, nullable=False)
 
+    rig = relationship("RIG", back_populates="phones")
+
 class RIGAction(Base):
     __tablename__ = "rig_actions"
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     type = Column(Enum('switch_phone', 'set_time_delay', 'add_workflow', name="rig_action_type_enum"), nullable=False)
 
+    configs = relationship("RIGActionConfig", back_populates="rig_action")
+
 class RIGActionConfig(Base):
     __tablename__ = "rig_action_configs"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    rig_action_id = Column(Integer, ForeignKey('rig_actions.id'))
+    rig_action_id = Column(Integer, ForeignKey('rig_actions.id', ondelete="CASCADE"))
     option_name = Column(String(100), nullable=False)
     valid_values = Column(JSON, nullable=False)
 
+    rig_action = relationship("RIGAction", back_populates="configs")
+
+    __table_args__ = (
+        Index("ix_rig_action_configs_rig_action_id", "rig_action_id"),
+    )
+
 class RIGSteps(Base):
     __tablename__ = "rig_steps"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    rig_id = Column(Integer, ForeignKey('rigs.id'))
+    rig_id = Column(Integer, ForeignKey('rigs.id', ondelete="CASCADE"))
     rig_action_id = Column(Integer, ForeignKey('rig_actions.id'))
     selected_value = Column(JSON, nullable=False)  # ✅ Ensure this is JSON
     step_order = Column(Integer, nullable=False)
+
+    rig = relationship("RIG", back_populates="steps")
+    rig_action = relationship("RIGAction")
+
+    __table_args__ = (
+        Index("ix_rig_steps_rig_id_step_order", "rig_id", "step_order"),
+    )
+
+# 🔹 Run history (append-only, written in batches by app.history)
+#
+# No foreign keys: history outlives the phones / RIGs / workflows it
+# mentions. Times are Unix epoch milliseconds so range filters stay integer
+# comparisons on the (owner, started_at) indexes.
+
+RunId = BigInteger().with_variant(Integer, "sqlite")  # INTEGER PRIMARY KEY = rowid on SQLite
+
+class Run(Base):
+    __tablename__ = "runs"
+    id = Column(RunId, primary_key=True, autoincrement=False)  # ✅ Assigned by the writer, see history.new_run_id()
+    phone_id = Column(Integer, nullable=False)
+    rig_id = Column(Integer)
+    workflow_id = Column(Integer)  # Set for direct workflow runs
+    status = Column(String(20), nullable=False)
+    started_at = Column(BigInteger, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    steps = Column(Integer, nullable=False)
+    failed_step_id = Column(Integer)
+    error = Column(String(255))
+
+    __table_args__ = (
+        Index("ix_runs_phone_id_started_at", "phone_id", "started_at"),
+        Index("ix_runs_rig_id_started_at", "rig_id", "started_at"),
+        Index("ix_runs_workflow_id_started_at", "workflow_id", "started_at"),
+    )
+
+class StepEvent(Base):
+    __tablename__ = "step_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(RunId, nullable=False)
+    phone_id = Column(Integer, nullable=False)
+    rig_id = Column(Integer)
+    workflow_id = Column(Integer)  # Workflow the step belongs to (None for RIG-level steps)
+    step_id = Column(Integer)
+    action = Column(String(20), nullable=False)
+    started_at = Column(BigInteger, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    ok = Column(Boolean, nullable=False)
+
+    __table_args__ = (
+        Index("ix_step_events_run_id", "run_id"),
+        Index("ix_step_events_phone_id_started_at", "phone_id", "started_at"),
+        Index("ix_step_events_rig_id_started_at", "rig_id", "started_at"),
+        Index("ix_step_events_workflow_id_started_at", "workflow_id", "started_at"),
+    )
+
+class StepRollup(Base):
+    """
+    Hourly per-action totals that replace step_events past their retention.
+    """
+    __tablename__ = "step_rollups"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hour = Column(BigInteger, nullable=False)  # Start of the hour, epoch ms
+    phone_id = Column(Integer, nullable=False)
+    rig_id = Column(Integer)
+    workflow_id = Column(Integer)
+    action = Column(String(20), nullable=False)
+    count = Column(Integer, nullable=False)
+    failures = Column(Integer, nullable=False)
+    total_ms = Column(BigInteger, nullable=False)
+    max_ms = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_step_rollups_phone_id_hour", "phone_id", "hour"),
+        Index("ix_step_rollups_rig_id_hour", "rig_id", "hour"),
+        Index("ix_step_rollups_workflow_id_hour", "workflow_id", "hour"),
+    )
+
+# 🔹 Change feed (see app/changes.py)
+
+class Change(Base):
+    """
+    One row per workflow / RIG / phone changed by a committed transaction.
+    AUTOINCREMENT keeps seq from ever being reused after rows are trimmed.
+    """
+    __tablename__ = "changes"
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    resource = Column(String(20), nullable=False)  # Table name: workflows / rigs / phones
+    resource_id = Column(Integer, nullable=False)
+    created_at = Column(BigInteger, nullable=False)  # Epoch ms
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class CatalogVersion(Base):
+    """
+    Single row bumped whenever the action catalog is re-seeded or refreshed,
+    so every worker process notices and reloads its in-memory copy.
+    """
+    __tablename__ = "catalog_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
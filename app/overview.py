@@ -0,0 +1,66 @@
+from sqlalchemy import func, select
+from app.models import RIG, RIGAction, RIGSteps, Phone
+
+# 🔹 Fleet overview
+#
+# One page of RIGs plus per-RIG phone / step counts and referenced workflow
+# ids, in a fixed number of grouped queries. A keyset page is a contiguous
+# id range, so the aggregates filter on rig_id BETWEEN first AND last (an
+# index range scan) instead of binding every id.
+
+def rig_overview(db, limit, after=None, with_serials=False):
+    """
+    Return (items, next_after) for at most limit RIGs with id > after.
+    """
+    stmt = select(RIG.id, RIG.name).order_by(RIG.id).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(RIG.id > after)
+    rigs = db.execute(stmt).all()
+    next_after = rigs[limit - 1].id if len(rigs) > limit else None
+    rigs = rigs[:limit]
+    if not rigs:
+        return [], None
+
+    items = {
+        rig_id: {"id": rig_id, "name": name, "phone_count": 0, "step_count": 0, "workflow_ids": []}
+        for rig_id, name in rigs
+    }
+    first, last = rigs[0].id, rigs[-1].id
+
+    if with_serials:
+        for item in items.values():
+            item["phone_serials"] = []
+        for rig_id, serial in db.execute(
+            select(Phone.rig_id, Phone.serial_number)
+            .where(Phone.rig_id.between(first, last))
+            .order_by(Phone.rig_id, Phone.id)
+        ):
+            items[rig_id]["phone_serials"].append(serial)
+            items[rig_id]["phone_count"] += 1
+    else:
+        for rig_id, count in db.execute(
+            select(Phone.rig_id, func.count())
+            .where(Phone.rig_id.between(first, last))
+            .group_by(Phone.rig_id)
+        ):
+            items[rig_id]["phone_count"] = count
+
+    for rig_id, count in db.execute(
+        select(RIGSteps.rig_id, func.count())
+        .where(RIGSteps.rig_id.between(first, last))
+        .group_by(RIGSteps.rig_id)
+    ):
+        items[rig_id]["step_count"] = count
+
+    workflow_id = RIGSteps.selected_value["workflow_id"].as_integer()
+    for rig_id, referenced in db.execute(
+        select(RIGSteps.rig_id, workflow_id)
+        .join(RIGAction, RIGAction.id == RIGSteps.rig_action_id)
+        .where(RIGSteps.rig_id.between(first, last), RIGAction.type == "add_workflow")
+        .group_by(RIGSteps.rig_id, workflow_id)
+        .order_by(RIGSteps.rig_id, workflow_id)
+    ):
+        if referenced is not None:
+            items[rig_id]["workflow_ids"].append(referenced)
+
+    return list(items.values()), next_after
@@ -0,0 +1,268 @@
+from typing import NamedTuple
+from sqlalchemy import select
+from app.cache import LRUCache
+from app.config import PLAN_CACHE_SIZE
+from app.models import Action, Phone, RIG, RIGAction, RIGSteps, Workflow, WorkflowSteps
+from app.validators import as_integer
+from app.versions import current_version, current_versions
+
+# 🔹 Execution plans
+#
+# A plan is an immutable tuple of small ops with selected_value already
+# parsed and type-checked, so the engine never touches the database or JSON
+# while a run is in progress. Compiled plans are cached by (id, version);
+# see app/versions.py for how versions are bumped.
+
+SWIPE_DIRECTIONS = ("Up", "Down", "Left", "Right")
+SWIPE_UNTIL_MAX_SWIPES = 20
+
+# selected_value fields read as integers, by Action / RIGAction type; the
+# catalog's validators hold them to whole numbers too (app/validators.py)
+INTEGER_FIELDS = {
+    "click": ("x", "y"),
+    "swipe_until": ("max_swipes",),
+    "switch_phone": ("phone_id",),
+    "add_workflow": ("workflow_id",),
+}
+
+class PlanError(ValueError):
+    """
+    A step cannot be compiled (unknown action or bad selected_value).
+    """
+    def __init__(self, message, step_id=None):
+        super().__init__(message)
+        self.step_id = step_id
+
+# Workflow ops
+class Click(NamedTuple):
+    step_id: int
+    x: int
+    y: int
+
+class TypeText(NamedTuple):
+    step_id: int
+    text: str
+
+class Swipe(NamedTuple):
+    step_id: int
+    direction: str
+
+class SwipeUntil(NamedTuple):
+    step_id: int
+    direction: str
+    target_type: str  # "word" or "image"
+    value: str
+    max_swipes: int
+
+class Delay(NamedTuple):
+    step_id: int
+    seconds: float
+
+# RIG ops
+class SwitchPhone(NamedTuple):
+    step_id: int
+    phone_id: int
+
+class RunWorkflow(NamedTuple):
+    step_id: int
+    workflow_id: int
+    plan: "WorkflowPlan"
+
+class WorkflowPlan(NamedTuple):
+    workflow_id: int
+    version: int
+    ops: tuple
+
+class RigPlan(NamedTuple):
+    rig_id: int
+    version: int
+    phones: tuple  # ((phone_id, serial_number), ...)
+    ops: tuple
+    workflow_versions: tuple  # ((workflow_id, version), ...) the plan was built from
+
+def _field(step_id, value, key, kind):
+    if not isinstance(value, dict) or key not in value:
+        raise PlanError(f"selected_value.{key} is required", step_id)
+    raw = value[key]
+    try:
+        if kind is str:
+            if not isinstance(raw, str):
+                raise TypeError
+            return raw
+        if isinstance(raw, bool):
+            raise TypeError
+        if kind is int:
+            number = as_integer(raw)  # Same rule as the validator: never truncate
+            if number is None:
+                raise ValueError
+            return number
+        return kind(raw)
+    except (TypeError, ValueError):
+        raise PlanError(f"selected_value.{key} must be {kind.__name__}", step_id)
+
+def _direction(step_id, value):
+    direction = _field(step_id, value, "direction", str)
+    if direction not in SWIPE_DIRECTIONS:
+        raise PlanError(f"selected_value.direction must be one of {', '.join(SWIPE_DIRECTIONS)}", step_id)
+    return direction
+
+def _delay(step_id, value):
+    seconds = _field(step_id, value, "seconds", float)
+    if seconds < 0:
+        raise PlanError("selected_value.seconds must be >= 0", step_id)
+    return Delay(step_id, seconds)
+
+def compile_workflow_op(step_id, action_type, value):
+    if action_type == "click":
+        return Click(step_id, _field(step_id, value, "x", int), _field(step_id, value, "y", int))
+    if action_type == "type_input":
+        return TypeText(step_id, _field(step_id, value, "text", str))
+    if action_type == "swipe":
+        return Swipe(step_id, _direction(step_id, value))
+    if action_type == "swipe_until":
+        target_type = _field(step_id, value, "type", str)
+        if target_type not in ("word", "image"):
+            raise PlanError("selected_value.type must be word or image", step_id)
+        return SwipeUntil(
+            step_id,
+            _direction(step_id, value),
+            target_type,
+            _field(step_id, value, "value", str),
+            _field(step_id, value, "max_swipes", int) if "max_swipes" in value else SWIPE_UNTIL_MAX_SWIPES,
+        )
+    if action_type == "set_time_delay":
+        return _delay(step_id, value)
+    raise PlanError(f"Unknown action type {action_type}", step_id)
+
+def _workflow_plans(db, workflow_versions):
+    """
+    Compile several workflows ({id: version}) with one joined query.
+    """
+    workflow_ids = list(workflow_versions)
+    ops = {workflow_id: [] for workflow_id in workflow_ids}
+    rows = db.execute(
+        select(WorkflowSteps.workflow_id, WorkflowSteps.id, Action.type, WorkflowSteps.selected_value)
+        .join(Action, Action.id == WorkflowSteps.action_id)
+        .where(WorkflowSteps.workflow_id.in_(workflow_ids))
+        .order_by(WorkflowSteps.workflow_id, WorkflowSteps.step_order, WorkflowSteps.id)
+    )
+    for workflow_id, step_id, action_type, value in rows:
+        ops[workflow_id].append(compile_workflow_op(step_id, action_type, value))
+    return {
+        workflow_id: WorkflowPlan(workflow_id, workflow_versions[workflow_id], tuple(o))
+        for workflow_id, o in ops.items()
+    }
+
+def compile_workflow(db, workflow_id, version):
+    return _workflow_plans(db, {workflow_id: version})[workflow_id]
+
+def compile_rig(db, rig_id, version):
+    """
+    Compile a RIG's steps, inlining the (cached) plan of every referenced workflow.
+    """
+    steps = db.execute(
+        select(RIGSteps.id, RIGAction.type, RIGSteps.selected_value)
+        .join(RIGAction, RIGAction.id == RIGSteps.rig_action_id)
+        .where(RIGSteps.rig_id == rig_id)
+        .order_by(RIGSteps.step_order, RIGSteps.id)
+    ).all()
+    phones = tuple(db.execute(
+        select(Phone.id, Phone.serial_number).where(Phone.rig_id == rig_id).order_by(Phone.id)
+    ).tuples())
+    phone_ids = {phone_id for phone_id, _ in phones}
+
+    workflow_ids = {
+        _field(step_id, value, "workflow_id", int)
+        for step_id, action_type, value in steps if action_type == "add_workflow"
+    }
+    workflow_versions = current_versions(db, Workflow, workflow_ids)
+    workflows = _cached_workflow_plans(db, workflow_versions)
+
+    ops = []
+    for step_id, action_type, value in steps:
+        if action_type == "switch_phone":
+            phone_id = _field(step_id, value, "phone_id", int)
+            if phone_id not in phone_ids:
+                raise PlanError(f"Phone {phone_id} is not on RIG {rig_id}", step_id)
+            ops.append(SwitchPhone(step_id, phone_id))
+        elif action_type == "set_time_delay":
+            ops.append(_delay(step_id, value))
+        elif action_type == "add_workflow":
+            workflow_id = _field(step_id, value, "workflow_id", int)
+            if workflow_id not in workflows:
+                raise PlanError(f"Workflow {workflow_id} not found", step_id)
+            ops.append(RunWorkflow(step_id, workflow_id, workflows[workflow_id]))
+        else:
+            raise PlanError(f"Unknown RIG action type {action_type}", step_id)
+    return RigPlan(rig_id, version, phones, tuple(ops), tuple(sorted(workflow_versions.items())))
+
+# 🔹 Plan cache
+
+# Keys include the resource version (see app/cache.py)
+plan_cache = LRUCache(PLAN_CACHE_SIZE)
+
+def _cached_workflow_plans(db, workflow_versions):
+    plans, missing = {}, {}
+    for workflow_id, version in workflow_versions.items():
+        plan = plan_cache.get(("workflow", workflow_id, version))
+        if plan is None:
+            missing[workflow_id] = version
+        else:
+            plans[workflow_id] = plan
+    if missing:
+        for workflow_id, plan in _workflow_plans(db, missing).items():
+            plan_cache.put(("workflow", workflow_id, plan.version), plan)
+            plans[workflow_id] = plan
+    return plans
+
+def get_workflow_plan(db, workflow_id):
+    """
+    Return the compiled plan for the workflow's current version (compiling
+    at most once per version), or None when the workflow does not exist.
+    """
+    version = current_version(db, Workflow, workflow_id)
+    if version is None:
+        return None
+    return _cached_workflow_plans(db, {workflow_id: version})[workflow_id]
+
+def get_rig_plan(db, rig_id):
+    """
+    Return the compiled plan for the RIG's current version, or None when the
+    RIG does not exist. A cached plan is reused only while every workflow it
+    inlines is still at the same version.
+    """
+    version = current_version(db, RIG, rig_id)
+    if version is None:
+        return None
+    key = ("rig", rig_id, version)
+    plan = plan_cache.get(key)
+    if plan is not None:
+        referenced = dict(plan.workflow_versions)
+        if current_versions(db, Workflow, list(referenced)) == referenced:
+            return plan
+    plan = compile_rig(db, rig_id, version)
+    plan_cache.put(key, plan)
+    return plan
+
+def plan_to_dict(plan):
+    """
+    JSON-friendly view of a compiled plan.
+    """
+    def op_dict(op):
+        item = {"op": type(op).__name__}
+        for name, value in op._asdict().items():
+            item[name] = plan_to_dict(value) if name == "plan" else value
+        return item
+
+    if isinstance(plan, RigPlan):
+        return {
+            "rig_id": plan.rig_id,
+            "version": plan.version,
+            "phones": [{"id": phone_id, "serial_number": serial} for phone_id, serial in plan.phones],
+            "ops": [op_dict(op) for op in plan.ops],
+        }
+    return {
+        "workflow_id": plan.workflow_id,
+        "version": plan.version,
+        "ops": [op_dict(op) for op in plan.ops],
+    }
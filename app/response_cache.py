@@ -0,0 +1,162 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, current_app, request
+from sqlalchemy import event
+from app.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_REVALIDATE_SECONDS
+from app.database import db, SessionLocal
+from app.versions import CHANGED_KEY, current_version
+
+# 🔹 Write-invalidated response cache
+#
+# Rendered GET responses for one workflow / RIG are kept per process, grouped
+# by (table, id) with one entry per variant (steps, detail, ...) and tagged
+# with the resource version they were rendered at. A commit that changed the resource (see versions.mark_changed)
+# drops its entries right away; edits committed by other workers are caught
+# by re-reading the version once the entry is older than
+# RESPONSE_CACHE_REVALIDATE_SECONDS. Fresh hits touch no database at all.
+
+class CachedResponse:
+    __slots__ = ("body", "status", "etag", "version", "checked_at")
+
+    def __init__(self, body, status, version):
+        self.body = body
+        self.status = status
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.version = version
+        self.checked_at = time.monotonic()
+
+class _Flight:
+    """
+    One in-progress render that concurrent misses for the same key wait on.
+    """
+    __slots__ = ("done", "result", "stale")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.stale = False
+
+class ResponseCache:
+    """
+    Thread-safe LRU (by resource) of rendered responses with per-resource
+    invalidation and coalesced misses.
+    """
+    def __init__(self, maxsize, revalidate_seconds):
+        self.maxsize = maxsize
+        self.revalidate_seconds = revalidate_seconds
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.coalesced = 0
+        self._items = OrderedDict()  # (table, id) -> {variant: CachedResponse}
+        self._flights = {}  # (table, id, variant) -> _Flight
+        self._lock = threading.Lock()
+
+    def respond(self, model, resource_id, variant, render):
+        """
+        Serve the cached response for (model, resource_id, variant), calling
+        render() (any Flask view return value) only on a miss. Answers
+        304 when the client's If-None-Match still matches.
+        """
+        resource = (model.__tablename__, resource_id)
+        with self._lock:
+            variants = self._items.get(resource)
+            entry = variants.get(variant) if variants else None
+            if entry is not None:
+                self._items.move_to_end(resource)
+
+        if entry is not None and time.monotonic() - entry.checked_at >= self.revalidate_seconds:
+            # Another worker may have changed it: one primary-key lookup decides
+            self.revalidations += 1
+            if current_version(db, model, resource_id) == entry.version:
+                entry.checked_at = time.monotonic()
+            else:
+                entry = None
+
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = self._fill(resource, variant, model, render)
+        return self._to_response(entry)
+
+    def _fill(self, resource, variant, model, render):
+        key = resource + (variant,)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.result is not None:
+                self.coalesced += 1
+                return flight.result
+            # The leader failed; render this request on its own
+            return self._render(model, resource[1], render)
+
+        try:
+            entry = self._render(model, resource[1], render)
+            flight.result = entry
+            if entry.status == 200 and entry.version is not None:
+                with self._lock:
+                    if not flight.stale:
+                        self._items.setdefault(resource, {})[variant] = entry
+                        self._items.move_to_end(resource)
+                        while len(self._items) > self.maxsize:
+                            self._items.popitem(last=False)
+            return entry
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    @staticmethod
+    def _render(model, resource_id, render):
+        # Version first: an edit landing in between only makes the entry look older
+        version = current_version(db, model, resource_id)
+        response = current_app.make_response(render())
+        return CachedResponse(response.get_data(), response.status_code, version)
+
+    @staticmethod
+    def _to_response(entry):
+        headers = {"Cache-Control": "no-cache"}  # Clients revalidate; unchanged -> 304
+        if entry.status == 200 and request.if_none_match.contains(entry.etag):
+            response = Response(status=304, headers=headers)
+        else:
+            response = Response(entry.body, status=entry.status, mimetype="application/json", headers=headers)
+        if entry.status == 200:
+            response.set_etag(entry.etag)
+        return response
+
+    def invalidate(self, table, resource_id):
+        """
+        Drop every cached variant of one resource. Renders already in flight
+        for it are not stored, and later misses start a fresh render.
+        """
+        with self._lock:
+            self._items.pop((table, resource_id), None)
+            for key in [k for k in self._flights if k[0] == table and k[1] == resource_id]:
+                self._flights.pop(key).stale = True
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            for flight in self._flights.values():
+                flight.stale = True
+            self._flights.clear()
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_REVALIDATE_SECONDS)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session):
+    for table, resource_id in session.info.pop(CHANGED_KEY, ()):
+        response_cache.invalidate(table, resource_id)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(CHANGED_KEY, None)
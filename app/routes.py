@@ -4,6 +4,8 @@ from routes.rig_routes import rig_routes
 from routes.action_routes import action_routes
 from routes.phone_routes import phone_routes
 from routes.rig_action_routes import rig_action_routes
+from routes.history_routes import history_routes
+from routes.change_routes import change_routes
 
 # Create the main Blueprint
 routes = Blueprint("routes", __name__)
@@ -14,3 +16,5 @@ routes.register_blueprint(rig_routes, url_prefix="")
 routes.register_blueprint(action_routes, url_prefix="")
 routes.register_blueprint(phone_routes, url_prefix="")
 routes.register_blueprint(rig_action_routes, url_prefix="")
+routes.register_blueprint(history_routes, url_prefix="")
+routes.register_blueprint(change_routes, url_prefix="")
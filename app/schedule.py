@@ -0,0 +1,226 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from app.config import SCHEDULE_REFRESH_SECONDS
+from app.database import SessionLocal
+from app.models import Workflow, WeekdayEnum
+
+# 🔹 Week-hour schedule index
+#
+# A workflow is active on every day from start_day to end_day (wrapping past
+# Sunday) between start_hour and end_hour (wrapping past midnight when
+# end_hour <= start_hour; equal hours mean all day). The week is split into
+# 168 hour slots, and each slot holds the frozenset of workflow ids active in
+# it, so "what is active at T" is a single list lookup.
+
+logger = logging.getLogger("app.schedule")
+
+HOURS_PER_WEEK = 7 * 24
+DAY_INDEX = {day.value: i for i, day in enumerate(WeekdayEnum)}  # MO=0 ... SU=6, like datetime.weekday()
+
+def _day(value):
+    return DAY_INDEX[value.value if isinstance(value, WeekdayEnum) else value]
+
+def valid_hour(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 23
+
+def window_slots(start_day, end_day, start_hour, end_hour):
+    """
+    Return (active_slots, start_slots) for a schedule window.
+    Raises ValueError unless both hours are integers 0-23.
+    """
+    if not (valid_hour(start_hour) and valid_hour(end_hour)):
+        raise ValueError(f"hours must be integers 0-23, got {start_hour!r} / {end_hour!r}")
+    first = _day(start_day)
+    days = (_day(end_day) - first) % 7 + 1
+    length = (end_hour - start_hour) % 24 or 24
+
+    active, starts = set(), set()
+    for d in range(days):
+        start = ((first + d) % 7) * 24 + start_hour
+        starts.add(start)
+        active.update((start + h) % HOURS_PER_WEEK for h in range(length))
+    return frozenset(active), frozenset(starts)
+
+def week_slot(moment):
+    return moment.weekday() * 24 + moment.hour
+
+def next_window_start(start_slots, moment):
+    """
+    First time strictly after moment at which one of start_slots begins.
+    """
+    week_start = (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    starts = []
+    for slot in start_slots:
+        start = week_start + timedelta(hours=slot)
+        if start <= moment:
+            start += timedelta(days=7)
+        starts.append(start)
+    return min(starts)
+
+MIN_YEAR, MAX_YEAR = 2, 9998
+
+def parse_moment(raw):
+    """
+    ?at= value: ISO 8601 or Unix seconds (local time); now when missing.
+    """
+    if not raw:
+        return datetime.now()
+    try:
+        seconds = float(raw)
+    except ValueError:
+        moment = datetime.fromisoformat(raw)  # ValueError on bad input
+        if moment.tzinfo is not None:
+            moment = moment.astimezone().replace(tzinfo=None)
+    else:
+        if not math.isfinite(seconds):
+            raise ValueError(f"{raw} is not a finite timestamp")
+        try:
+            moment = datetime.fromtimestamp(seconds)
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"{raw} is out of range") from e
+    # 🔹 Keep a year of slack on both ends so range / window arithmetic can't overflow
+    if not MIN_YEAR <= moment.year <= MAX_YEAR:
+        raise ValueError(f"year must be between {MIN_YEAR} and {MAX_YEAR}")
+    return moment
+
+WINDOW_UNITS = {"m": 1, "h": 60, "d": 24 * 60}
+
+def parse_window(raw, default_minutes=60):
+    """
+    ?window= value: "90m", "6h", "2d" or plain minutes, at most one week.
+    """
+    if not raw:
+        minutes = default_minutes
+    elif raw[-1] in WINDOW_UNITS:
+        minutes = int(raw[:-1]) * WINDOW_UNITS[raw[-1]]
+    else:
+        minutes = int(raw)
+    if not 0 < minutes <= HOURS_PER_WEEK * 60:
+        raise ValueError("window must be between 1 minute and 7 days")
+    return timedelta(minutes=minutes)
+
+class ScheduleIndex:
+    """
+    Incrementally maintained slot -> workflow ids index.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workflows = {}  # id -> (name, active_slots, start_slots)
+        self._active = [frozenset()] * HOURS_PER_WEEK
+        self._starts = [frozenset()] * HOURS_PER_WEEK
+        self.built_at = time.monotonic()
+
+    def add(self, workflow_id, name, start_day, end_day, start_hour, end_hour):
+        active, starts = window_slots(start_day, end_day, start_hour, end_hour)
+        with self._lock:
+            self._discard(workflow_id)
+            self._workflows[workflow_id] = (name, active, starts)
+            # Copy-on-write so readers never see a set being mutated
+            for slot in active:
+                self._active[slot] = self._active[slot] | {workflow_id}
+            for slot in starts:
+                self._starts[slot] = self._starts[slot] | {workflow_id}
+
+    def add_workflow(self, workflow):
+        self.add(workflow.id, workflow.name, workflow.start_day, workflow.end_day,
+                 workflow.start_hour, workflow.end_hour)
+
+    def remove(self, workflow_id):
+        with self._lock:
+            self._discard(workflow_id)
+
+    def start_slots(self):
+        """
+        Snapshot of {workflow id: week-hour slots where its window opens}.
+        """
+        with self._lock:
+            return {workflow_id: starts for workflow_id, (_, _, starts) in self._workflows.items()}
+
+    def _discard(self, workflow_id):
+        entry = self._workflows.pop(workflow_id, None)
+        if entry is None:
+            return
+        _, active, starts = entry
+        for slot in active:
+            self._active[slot] = self._active[slot] - {workflow_id}
+        for slot in starts:
+            self._starts[slot] = self._starts[slot] - {workflow_id}
+
+    def _describe(self, ids):
+        workflows = self._workflows
+        return [{"id": i, "name": workflows[i][0]} for i in sorted(ids) if i in workflows]
+
+    def active_at(self, moment):
+        """
+        Workflows whose window covers moment.
+        """
+        return self._describe(self._active[week_slot(moment)])
+
+    def upcoming(self, moment, window):
+        """
+        Workflows whose window opens in (moment, moment + window], in order.
+        """
+        end = moment + window
+        hour = moment.replace(minute=0, second=0, microsecond=0)
+        if hour <= moment:
+            hour += timedelta(hours=1)
+
+        result = []
+        while hour <= end:
+            for item in self._describe(self._starts[week_slot(hour)]):
+                item["starts_at"] = hour.isoformat()
+                result.append(item)
+            hour += timedelta(hours=1)
+        return result
+
+def build_schedule_index(db):
+    """
+    Index every workflow; rows with an unusable window are logged and left out.
+    """
+    index = ScheduleIndex()
+    rows = db.execute(select(
+        Workflow.id, Workflow.name, Workflow.start_day, Workflow.end_day,
+        Workflow.start_hour, Workflow.end_hour
+    ))
+    for row in rows:
+        try:
+            index.add(*row)
+        except (KeyError, ValueError) as e:
+            logger.warning("workflow %s left out of the schedule index: %s", row.id, e)
+    return index
+
+_index = None
+_build_lock = threading.Lock()
+
+def _stale(index):
+    return index is None or time.monotonic() - index.built_at > SCHEDULE_REFRESH_SECONDS
+
+def refresh_schedule_index(only_if_stale=False):
+    """
+    Rebuild the process-wide index from the database. With only_if_stale,
+    a thread that waited for another's rebuild uses that one instead.
+    """
+    global _index
+    with _build_lock:
+        if only_if_stale and not _stale(_index):
+            return _index
+        db = SessionLocal()
+        try:
+            _index = build_schedule_index(db)
+        finally:
+            db.close()
+    return _index
+
+def get_schedule_index():
+    """
+    Return the process-wide index, rebuilding it when it is older than
+    SCHEDULE_REFRESH_SECONDS (other workers may have edited workflows).
+    """
+    index = _index
+    if _stale(index):
+        index = refresh_schedule_index(only_if_stale=True)
+    return index
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import heapq
+import logging
+import signal
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select
+from app.changes import changes_after, feed_bounds, on_feed_commit, remove_feed_listener
+from app.config import (
+    CHANGES_PAGE_SIZE, DEVICE_DRIVER, HISTORY_ENABLED, SCHEDULER_RIG_CONCURRENCY, SCHEDULER_SYNC_SECONDS,
+)
+from app.database import SessionLocal
+from app.drivers import load_driver
+from app.engine import run_workflow_on_phones
+from app.history import history_writer
+from app.models import Phone, RIGAction, RIGSteps
+from app.plans import PlanError, get_workflow_plan
+from app.schedule import build_schedule_index, next_window_start
+
+# 🔹 Workflow scheduler
+#
+# Keeps one heap entry per workflow: the next time one of its schedule
+# windows opens. When a window opens, the workflow runs on the phones of
+# every RIG that references it through an add_workflow step, with at most
+# SCHEDULER_RIG_CONCURRENCY phones per RIG busy at once.
+#
+# The scheduler owns its index: it is built once at startup, then kept up
+# to date from the change feed (app/changes.py). The loop sleeps until the
+# earliest heap entry is due or the next feed read, whichever comes first:
+#   - workflow commits made in this process (SCHEDULER_IN_PROCESS) wake it
+#     at once through on_feed_commit();
+#   - edits made by other processes (the API workers, when it runs as a
+#     daemon) are only seen by reading the feed every SCHEDULER_SYNC_SECONDS
+#     (60 s by default): one primary-key range read on the changes table,
+#     never a scan of every workflow. A window that opened since the
+#     previous read fires late instead of being skipped.
+# An idle daemon therefore wakes once per SCHEDULER_SYNC_SECONDS, no more.
+#
+#   python -m app.scheduler          run as a daemon
+#   SCHEDULER_IN_PROCESS=1           run inside the app.py development server
+
+logger = logging.getLogger("app.scheduler")
+
+def dispatch_targets(db, workflow_id):
+    """
+    (plan, {rig_id: [(phone_id, serial), ...]}) for a workflow; plan is None
+    when the workflow no longer exists. Raises PlanError.
+    """
+    plan = get_workflow_plan(db, workflow_id)
+    if plan is None:
+        return None, {}
+    referencing_rigs = (
+        select(RIGSteps.rig_id)
+        .join(RIGAction, RIGAction.id == RIGSteps.rig_action_id)
+        .where(RIGAction.type == "add_workflow", RIGSteps.selected_value["workflow_id"].as_integer() == workflow_id)
+    )
+    targets = {}
+    for rig_id, phone_id, serial in db.execute(
+        select(Phone.rig_id, Phone.id, Phone.serial_number)
+        .where(Phone.rig_id.in_(referencing_rigs))
+        .order_by(Phone.rig_id, Phone.id)
+    ):
+        targets.setdefault(rig_id, []).append((phone_id, serial))
+    return plan, targets
+
+def _load_index():
+    """
+    (index of every workflow, feed seq it is current as of).
+    """
+    db = SessionLocal()
+    try:
+        # Position first: edits landing during the build are replayed, harmlessly
+        _, newest = feed_bounds(db)
+        return build_schedule_index(db), newest or 0
+    finally:
+        db.close()
+
+def _read_workflow_changes(since):
+    """
+    (every workflow change after since, next seq), without waiting;
+    changes is None when entries after since were already trimmed.
+    """
+    db = SessionLocal()
+    try:
+        oldest, newest = feed_bounds(db)
+        if since > (newest or 0) or (oldest is not None and since < oldest - 1):
+            return None, since
+        changes, more = [], True
+        while more:
+            page, since, more = changes_after(db, since, CHANGES_PAGE_SIZE, ("workflows",))
+            changes.extend(page)
+        return changes, since
+    finally:
+        db.close()
+
+def _load_targets(workflow_id):
+    db = SessionLocal()
+    try:
+        return dispatch_targets(db, workflow_id)
+    finally:
+        db.close()
+
+class WorkflowScheduler:
+    def __init__(self, driver, rig_concurrency=SCHEDULER_RIG_CONCURRENCY, history=None,
+                 sync_seconds=SCHEDULER_SYNC_SECONDS):
+        self.driver = driver
+        self.rig_concurrency = rig_concurrency
+        self.history = history
+        self.sync_seconds = sync_seconds
+        self.dispatched = 0
+        self.index = None
+        self._feed_seq = 0
+        self._feed_due = False  # A local commit touched workflows
+        self._last_read = None  # When the index was last brought up to date
+        self._heap = []  # (fire_at, workflow_id, generation)
+        self._starts = {}  # workflow_id -> start slots the heap entry was built from
+        self._generation = {}  # workflow_id -> generation of its live heap entry
+        self._rig_semaphores = {}
+        self._tasks = set()
+        self._loop = None
+        self._wake = None
+        self._stopping = False
+
+    def notify(self):
+        """
+        Wake the loop (thread-safe).
+        """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def stop(self):
+        self._stopping = True
+        self.notify()
+
+    def sync(self, index, now=None):
+        """
+        Reschedule only the workflows whose windows changed, from now (or
+        from an earlier moment, so windows opened since then fire at once);
+        entries of changed or deleted workflows go stale and are skipped
+        when popped.
+        """
+        now = now or datetime.now()
+        current = index.start_slots()
+        for workflow_id in self._starts.keys() - current.keys():
+            del self._starts[workflow_id]
+            del self._generation[workflow_id]
+        for workflow_id, starts in current.items():
+            if self._starts.get(workflow_id) != starts:
+                self._starts[workflow_id] = starts
+                generation = self._generation[workflow_id] = self._generation.get(workflow_id, 0) + 1
+                heapq.heappush(self._heap, (next_window_start(starts, now), workflow_id, generation))
+        if len(self._heap) > 2 * len(self._generation) + 64:
+            self._heap = [e for e in self._heap if self._generation.get(e[1]) == e[2]]
+            heapq.heapify(self._heap)
+
+    def _fire_due(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, workflow_id, generation = heapq.heappop(self._heap)
+            if self._generation.get(workflow_id) != generation:
+                continue  # Stale: the workflow was edited or deleted
+            task = asyncio.ensure_future(self._dispatch(workflow_id, fire_at))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            heapq.heappush(self._heap, (next_window_start(self._starts[workflow_id], fire_at), workflow_id, generation))
+
+    def _rig_semaphore(self, rig_id):
+        semaphore = self._rig_semaphores.get(rig_id)
+        if semaphore is None:
+            semaphore = self._rig_semaphores[rig_id] = asyncio.Semaphore(self.rig_concurrency)
+        return semaphore
+
+    async def _dispatch(self, workflow_id, fire_at):
+        try:
+            plan, targets = await asyncio.to_thread(_load_targets, workflow_id)
+        except PlanError as e:
+            logger.warning("workflow %s not dispatched: %s (step %s)", workflow_id, e, e.step_id)
+            return
+        if plan is None or not targets:
+            return
+        self.dispatched += 1
+        results = await asyncio.gather(*(
+            run_workflow_on_phones(
+                self.driver, plan, phones, history=self.history, rig_id=rig_id,
+                semaphore=self._rig_semaphore(rig_id),
+            )
+            for rig_id, phones in targets.items()
+        ))
+        statuses = [r.status for rig_results in results for r in rig_results]
+        logger.info(
+            "workflow %s (window %s): %d/%d phones completed on RIGs %s",
+            workflow_id, fire_at.isoformat(), statuses.count("completed"), len(statuses), sorted(targets),
+        )
+
+    def apply_changes(self, changes):
+        """
+        Update the index from change feed entries for workflows.
+        """
+        for change in changes:
+            workflow_id, data = change["id"], change["data"]
+            if change["op"] == "delete":
+                self.index.remove(workflow_id)
+                continue
+            try:
+                self.index.add(workflow_id, data["name"], data["start_day"], data["end_day"],
+                               data["start_hour"], data["end_hour"])
+            except (KeyError, ValueError) as e:
+                logger.warning("workflow %s left out of the schedule: %s", workflow_id, e)
+                self.index.remove(workflow_id)
+
+    def _on_feed_commit(self, tables):
+        if "workflows" in tables:
+            self._feed_due = True
+            self.notify()
+
+    async def _read_feed(self):
+        """
+        Bring the index up to date from the change feed and reschedule.
+        """
+        read_at = datetime.now()
+        try:
+            changes, seq = await asyncio.to_thread(_read_workflow_changes, self._feed_seq)
+            if changes is None:
+                logger.warning("change feed trimmed past seq %s; rebuilding the schedule", self._feed_seq)
+                self.index, seq = await asyncio.to_thread(_load_index)
+            else:
+                self.apply_changes(changes)
+        except Exception:
+            logger.exception("reading the change feed failed; retrying in %gs", self.sync_seconds)
+            return
+        self._feed_seq = seq
+        # Edits committed since the last read may open windows that are already past
+        self.sync(self.index, self._last_read)
+        self._last_read = read_at
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        on_feed_commit(self._on_feed_commit)
+        try:
+            self._last_read = datetime.now()
+            self.index, self._feed_seq = await asyncio.to_thread(_load_index)
+            self.sync(self.index)
+            next_read = time.monotonic() + self.sync_seconds
+            while not self._stopping:
+                if self._feed_due or time.monotonic() >= next_read:
+                    self._feed_due = False
+                    await self._read_feed()
+                    next_read = time.monotonic() + self.sync_seconds
+                now = datetime.now()
+                self._fire_due(now)
+                timeout = next_read - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+        finally:
+            remove_feed_listener(self._on_feed_commit)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+def start_scheduler_thread(driver=None):
+    """
+    Run a scheduler on its own event loop in a daemon thread.
+    """
+    scheduler = WorkflowScheduler(driver or load_driver(DEVICE_DRIVER),
+                                  history=history_writer if HISTORY_ENABLED else None)
+    threading.Thread(target=asyncio.run, args=(scheduler.run(),), name="workflow-scheduler", daemon=True).start()
+    return scheduler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run workflows on their RIGs' phones when their schedule windows open")
+    parser.add_argument("--driver", default=DEVICE_DRIVER, help="module:ClassName of the device driver")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    async def main():
+        driver = load_driver(args.driver)
+        scheduler = WorkflowScheduler(driver, history=history_writer if HISTORY_ENABLED else None)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, scheduler.stop)
+        try:
+            await scheduler.run()
+        finally:
+            await driver.close()
+
+    asyncio.run(main())
@@ -0,0 +1,384 @@
+import math
+import os
+import re
+from typing import NamedTuple
+from app.cache import LRUCache
+from app.config import SCREEN_MATCH_THRESHOLD, SCREEN_TEMPLATE_CACHE_SIZE, SCREEN_TEMPLATE_DIR
+
+# 🔹 Screen matching for swipe_until
+#
+# A device agent answering find / swipe_until checks the current screenshot
+# after every swipe, so each check has to stay in the millisecond range on
+# an ARM board:
+#   - image targets: normalized cross-correlation (FFT + integral images)
+#     on a downscaled pyramid level, then a small full-resolution search
+#     around the best coarse peaks only;
+#   - word targets: a token index built once per frame from the screen's
+#     text elements (UI dump / OCR output), then O(1) lookups.
+# Frames wrap the screenshot buffer without copying it; templates are
+# loaded and preprocessed once per WorkflowSteps row and cached.
+#
+# Image targets need numpy (pip install -r requirements-agent.txt); word
+# targets do not. Pillow adds template formats beyond .npy / PGM / PPM.
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+MIN_SEARCH_SIDE = 12  # Smallest template side worth matching on a coarse level
+MAX_LEVELS = 4  # Coarsest level searched: 1/16 of the frame's width and height
+# Coarse peaks refined at full resolution. Downscaling blurs fine detail,
+# so coarse scores are only used to rank positions; the threshold applies
+# to the full-resolution score.
+COARSE_CANDIDATES = 3
+
+_TOKEN = re.compile(r"\w+")
+_PNM_FIELD = re.compile(rb"(?:\s+|#[^\n]*\n)*(\S+)")
+
+class MatcherError(ValueError):
+    """
+    A template or frame cannot be used (unreadable, flat, wrong size, or
+    numpy missing for image targets).
+    """
+
+class Match(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+    score: float
+
+def _require_numpy():
+    if np is None:
+        raise MatcherError("image targets need numpy (pip install numpy)")
+
+def _downscale(image):
+    """
+    Half-size level by 2x2 averaging.
+    """
+    h, w = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    return (image[0:h:2, 0:w:2] + image[1:h:2, 0:w:2] + image[0:h:2, 1:w:2] + image[1:h:2, 1:w:2]) * 0.25
+
+def _gray(pixels):
+    """
+    float64 luma of an H x W x C uint8 view.
+    """
+    if pixels.shape[2] < 3:
+        return pixels[:, :, 0].astype(np.float64)
+    return pixels[:, :, 0] * 0.299 + pixels[:, :, 1] * 0.587 + pixels[:, :, 2] * 0.114
+
+def _pyramid_level(image, index):
+    """
+    Level index (1 / 2**index of the width and height) of a gray H x W or
+    color H x W x C image: decimate to 1 / 2**(index - 1), then average
+    2x2 blocks, so only 1 / 4**(index - 1) of the pixels are ever read.
+    """
+    if index == 0:
+        return image if image.ndim == 2 else _gray(image)
+    step = 1 << (index - 1)
+    view = image[::step, ::step]
+    return _downscale(view if view.ndim == 2 else _gray(view))
+
+def _integral(image):
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    np.cumsum(image, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    return integral
+
+def _integrals(image):
+    """
+    Integral images of pixels and squared pixels.
+    """
+    return _integral(image), _integral(image * image)
+
+def _window_sums(integral, h, w):
+    """
+    Sum of every h x w window (valid positions).
+    """
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+def _ncc(image, template, image_fft=None, template_fft=None, integrals=None):
+    """
+    Normalized cross-correlation of a zero-mean template (template.pixels)
+    at every valid position of image, in [-1, 1].
+    """
+    H, W = image.shape
+    h, w = template.pixels.shape
+    if image_fft is None:
+        image_fft = np.fft.rfft2(image)
+    if template_fft is None:
+        template_fft = np.conj(np.fft.rfft2(template.pixels, s=(H, W)))
+    if integrals is None:
+        integrals = _integrals(image)
+    # Circular correlation; positions up to (H - h, W - w) never wrap
+    corr = np.fft.irfft2(image_fft * template_fft, s=(H, W))[:H - h + 1, :W - w + 1]
+    sums = _window_sums(integrals[0], h, w)
+    variance = _window_sums(integrals[1], h, w) - sums * sums / (h * w)
+    denominator = np.sqrt(np.maximum(variance, 0)) * template.norm
+    scores = np.zeros_like(corr)
+    np.divide(corr, denominator, out=scores, where=denominator > 1e-6)
+    return scores
+
+class _Level(NamedTuple):
+    pixels: "np.ndarray"  # Zero-mean template
+    norm: float
+
+class Template:
+    """
+    A preprocessed image target: zero-mean pyramid levels and the level
+    the coarse search runs on.
+    """
+    def __init__(self, gray):
+        _require_numpy()
+        gray = np.asarray(gray, dtype=np.float64)
+        if gray.ndim != 2 or min(gray.shape) < 2:
+            raise MatcherError("template must be a 2-D image of at least 2x2 pixels")
+        self.height, self.width = gray.shape
+        self.levels = []
+        while True:
+            level = _pyramid_level(gray, len(self.levels))
+            centered = level - level.mean()
+            self.levels.append(_Level(centered, math.sqrt(float((centered * centered).sum()))))
+            if len(self.levels) > MAX_LEVELS or min(level.shape) // 2 < MIN_SEARCH_SIDE:
+                break
+        if self.levels[0].norm == 0:
+            raise MatcherError("template is a flat color and cannot be matched")
+        self.search_level = max(i for i, level in enumerate(self.levels) if level.norm > 0)
+        self._ffts = {}  # frame level shape -> conj(rfft2) of the search level
+
+    def search_fft(self, shape):
+        fft = self._ffts.get(shape)
+        if fft is None:
+            if len(self._ffts) >= 8:  # Frames come in very few sizes
+                self._ffts.clear()
+            fft = self._ffts[shape] = np.conj(np.fft.rfft2(self.levels[self.search_level].pixels, s=shape))
+        return fft
+
+class TextIndex:
+    """
+    Casefolded tokens of the screen's text elements, for word targets.
+    elements: strings or (text, (x, y, width, height)) pairs.
+    """
+    def __init__(self, elements):
+        self.tokens = {}  # token -> box of the first element containing it
+        self.lines = []  # (" token token ... ", box) per element, for phrases
+        for element in elements:
+            text, box = (element, None) if isinstance(element, str) else element
+            tokens = _TOKEN.findall(text.casefold())
+            for token in tokens:
+                self.tokens.setdefault(token, box)
+            self.lines.append((f" {' '.join(tokens)} ", box))
+
+    def find(self, value):
+        tokens = _TOKEN.findall(value.casefold())
+        if not tokens:
+            return None
+        if len(tokens) == 1:
+            if tokens[0] not in self.tokens:
+                return None
+            box = self.tokens[tokens[0]]
+        else:
+            phrase = f" {' '.join(tokens)} "
+            box = next((box for line, box in self.lines if phrase in line), False)
+            if box is False:
+                return None
+        return Match(*(box or (0, 0, 0, 0)), 1.0)
+
+class Frame:
+    """
+    One screenshot: 8-bit gray / RGB / RGBA rows in any buffer (bytes,
+    bytearray, memoryview, mmap), wrapped without copying, plus the text
+    elements the device reported for the same screen. Pyramid levels and
+    the text index are built on first use and shared by every check made
+    against this frame.
+    """
+    def __init__(self, buffer, width, height, channels=4, text=()):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.text = text
+        self._levels = {}
+        self._ffts = {}
+        self._integrals = {}
+        self._text_index = None
+
+    def pixels(self):
+        """
+        H x W x C uint8 view of the buffer (no copy).
+        """
+        _require_numpy()
+        try:
+            return np.frombuffer(self.buffer, dtype=np.uint8, count=self.width * self.height * self.channels) \
+                .reshape(self.height, self.width, self.channels)
+        except ValueError as e:
+            raise MatcherError(f"frame buffer does not hold {self.width}x{self.height}x{self.channels} pixels: {e}")
+
+    def level(self, index):
+        """
+        Gray pyramid level, 1 / 2**index of the frame's width and height.
+        """
+        image = self._levels.get(index)
+        if image is None:
+            image = self._levels[index] = _pyramid_level(self.pixels(), index)
+        return image
+
+    def level_integrals(self, index):
+        integrals = self._integrals.get(index)
+        if integrals is None:
+            integrals = self._integrals[index] = _integrals(self.level(index))
+        return integrals
+
+    def region(self, top, bottom, left, right):
+        """
+        Full-resolution gray pixels of a rectangle.
+        """
+        if 0 in self._levels:
+            return self._levels[0][top:bottom, left:right]
+        return _gray(self.pixels()[top:bottom, left:right])
+
+    def level_fft(self, index):
+        fft = self._ffts.get(index)
+        if fft is None:
+            fft = self._ffts[index] = np.fft.rfft2(self.level(index))
+        return fft
+
+    def text_index(self):
+        if self._text_index is None:
+            self._text_index = TextIndex(self.text)
+        return self._text_index
+
+def find_template(frame, template, threshold=SCREEN_MATCH_THRESHOLD):
+    """
+    Best match of template in frame scoring at least threshold, or None.
+    """
+    level = template.search_level
+    image = frame.level(level)
+    coarse = template.levels[level]
+    if image.shape[0] < coarse.pixels.shape[0] or image.shape[1] < coarse.pixels.shape[1]:
+        return None
+    scores = _ncc(image, coarse, frame.level_fft(level), template.search_fft(image.shape), frame.level_integrals(level))
+    if level == 0:
+        y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        score = float(scores[y, x])
+        return Match(int(x), int(y), template.width, template.height, score) if score >= threshold else None
+
+    flat = scores.ravel()
+    count = min(COARSE_CANDIDATES, flat.size)
+    candidates = np.argpartition(flat, -count)[-count:]
+    # Peaks next to each other share one search region (in coarse pixels)
+    regions = []
+    for index in candidates[np.argsort(flat[candidates])[::-1]]:
+        y, x = divmod(int(index), scores.shape[1])
+        for region in regions:
+            if region[0] - 2 <= y <= region[1] + 2 and region[2] - 2 <= x <= region[3] + 2:
+                region[:] = min(region[0], y), max(region[1], y), min(region[2], x), max(region[3], x)
+                break
+        else:
+            regions.append([y, y, x, x])
+
+    scale = 1 << level
+    best = None
+    for first_y, last_y, first_x, last_x in regions:
+        # Full-resolution search within one coarse pixel of the peaks
+        top, left = max(first_y * scale - scale, 0), max(first_x * scale - scale, 0)
+        crop = frame.region(top, last_y * scale + scale + template.height, left, last_x * scale + scale + template.width)
+        if crop.shape[0] < template.height or crop.shape[1] < template.width:
+            continue
+        fine = _ncc(crop, template.levels[0])
+        fy, fx = np.unravel_index(int(np.argmax(fine)), fine.shape)
+        score = float(fine[fy, fx])
+        if score >= threshold and (best is None or score > best.score):
+            best = Match(int(left + fx), int(top + fy), template.width, template.height, score)
+    return best
+
+# 🔹 Template files
+
+def _read_pnm(data):
+    """
+    Gray (P5) or RGB (P6) binary PNM with 8-bit samples.
+    """
+    fields, position = [], 0
+    while len(fields) < 4:
+        match = _PNM_FIELD.match(data, position)
+        if match is None:
+            raise MatcherError("truncated PNM header")
+        fields.append(match.group(1))
+        position = match.end()
+    magic, width, height, maxval = fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+    if magic not in (b"P5", b"P6") or maxval > 255:
+        raise MatcherError("only 8-bit binary PGM (P5) / PPM (P6) templates are supported without Pillow")
+    channels = 1 if magic == b"P5" else 3
+    pixels = np.frombuffer(data, dtype=np.uint8, count=width * height * channels, offset=position + 1)
+    return _gray(pixels.reshape(height, width, channels))
+
+def load_template(path):
+    """
+    Grayscale pixels of a template image: .npy arrays and PGM / PPM files
+    natively, any other format through Pillow when it is installed.
+    """
+    _require_numpy()
+    try:
+        if path.endswith(".npy"):
+            pixels = np.load(path, allow_pickle=False)
+            return pixels if pixels.ndim == 2 else _gray(pixels)
+        with open(path, "rb") as f:
+            data = f.read()
+    except (OSError, ValueError) as e:
+        raise MatcherError(f"cannot read template {path}: {e}")
+    if data[:2] in (b"P5", b"P6"):
+        return _read_pnm(data)
+    try:
+        from PIL import Image
+    except ImportError:  # Optional dependency
+        raise MatcherError(f"{path}: install Pillow for templates other than .npy / PGM / PPM")
+    with Image.open(path) as image:
+        return np.asarray(image.convert("L"), dtype=np.float64)
+
+def load_frame(path, text=()):
+    """
+    Gray Frame of a screenshot file (any format load_template reads), for
+    the stand-in device agent and offline checks.
+    """
+    pixels = np.clip(np.rint(load_template(path)), 0, 255).astype(np.uint8)
+    return Frame(pixels.tobytes(), pixels.shape[1], pixels.shape[0], 1, text)
+
+# 🔹 Matcher
+
+class ScreenMatcher:
+    """
+    Evaluates swipe_until targets against frames. Image target values are
+    paths under template_dir, read with loader(path); their preprocessed
+    templates are cached per (WorkflowSteps id, value).
+    """
+    def __init__(self, template_dir=SCREEN_TEMPLATE_DIR, threshold=SCREEN_MATCH_THRESHOLD,
+                 cache_size=SCREEN_TEMPLATE_CACHE_SIZE, loader=load_template):
+        self.template_dir = os.path.abspath(template_dir)
+        self.threshold = threshold
+        self.loader = loader
+        self.templates = LRUCache(cache_size)
+
+    def _path(self, value):
+        path = os.path.abspath(os.path.join(self.template_dir, value))
+        if os.path.commonpath([path, self.template_dir]) != self.template_dir:
+            raise MatcherError(f"template {value!r} is outside the template directory")
+        return path
+
+    def template(self, value, step_id=None):
+        key = (step_id, value)
+        template = self.templates.get(key)
+        if template is None:
+            template = Template(self.loader(self._path(value)))
+            self.templates.put(key, template)
+        return template
+
+    def find(self, frame, target_type, value, step_id=None):
+        """
+        Match of a word / image target on frame, or None.
+        """
+        if target_type == "word":
+            return frame.text_index().find(value)
+        if target_type == "image":
+            return find_template(frame, self.template(value, step_id), self.threshold)
+        raise MatcherError(f"Unknown target type {target_type}")
@@ -1,12 +1,41 @@
-from app.database import engine, SessionLocal
-from app.models import Base, Action, ActionConfig, RIGAction, RIGActionConfig  # ✅ Import RIGActionConfig
+import os
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from app.config import DATABASE_URL
+from app.database import SessionLocal, engine
+from app.catalog import publish_catalog_change, refresh_catalog
+from app.models import Action, ActionConfig, RIGAction, RIGActionConfig  # ✅ Import RIGActionConfig
 
-# ✅ Create Tables
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def _alembic_config():
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", DATABASE_URL)
+    config.attributes["configure_logger"] = False
+    return config
+
+# ✅ Create / Upgrade Tables
 def init_db():
     """
-    Create tables only once.
+    Bring the schema up to date by running the Alembic migrations.
+    Safe to run on an existing workflow.db (upgrades it in place).
+    """
+    command.upgrade(_alembic_config(), "head")
+
+def check_schema():
+    """
+    Raise RuntimeError unless the database is at the latest migration.
     """
-    Base.metadata.create_all(engine)
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current or 'none (pre-migration workflow.db)'}, "
+            f"this code needs {head}. Upgrade it first: python main.py (or alembic upgrade head)."
+        )
 
 # ✅ Predefined Actions & Configurations
 def seed_database():
@@ -14,6 +43,7 @@ def seed_database():
     Seeds the database with predefined actions and configurations.
     """
     db = SessionLocal()
+    seeded = False
 
     # Check if actions already exist (Prevent duplicate insertions)
     if db.query(Action).first() is None:
@@ -25,6 +55,7 @@ def seed_database():
             Action(id=5, name="Set Time Delay", type="set_time_delay"),
         ]
         db.add_all(actions)
+        seeded = True
         db.commit()
 
     # Check if action configs exist
@@ -41,6 +72,7 @@ def seed_database():
             ActionConfig(action_id=5, option_name="Time", valid_values={"seconds": "numeric"})
         ]
         db.add_all(configs)
+        seeded = True
         db.commit()
 
     # ✅ Populate RIGAction (Fix Missing Entries)
@@ -51,6 +83,7 @@ def seed_database():
             RIGAction(id=3, name="Add Workflow", type="add_workflow"),
         ]
         db.add_all(rig_actions)
+        seeded = True
         db.commit()
 
     # ✅ Populate RIGActionConfig (Fix Missing Configs)
@@ -61,9 +94,14 @@ def seed_database():
             RIGActionConfig(rig_action_id=3, option_name="Workflow", valid_values={"workflow_id": "numeric"}),
         ]
         db.add_all(rig_action_configs)
+        seeded = True
         db.commit()
 
+    if seeded:
+        publish_catalog_change(db)  # ✅ Running workers reload their catalog
+        db.commit()
     db.close()
+    refresh_catalog()  # ✅ Pick up the new catalog in this process
     print("✅ Database Seeding Completed!")
 
 # ✅ Initialize Database and Seed Data
@@ -0,0 +1,191 @@
+from sqlalchemy import delete, func, insert, select, true, update
+from app.database import chunked
+from app.versions import bump_version
+
+# 🔹 Shared helpers for WorkflowSteps / RIGSteps bulk writes
+
+# step_order values are spaced STEP_ORDER_GAP apart so a step can be moved
+# anywhere by giving it the midpoint of its new neighbours (one row update).
+# The list is only renumbered when two neighbours end up adjacent.
+STEP_ORDER_GAP = 1024
+
+def validate_step(item, action_key, validators):
+    """
+    Check one step against the catalog's compiled validators
+    ({action id: validator}). Returns (step, error); error is a dict with
+    "error" and, for bad selected_value fields, a per-field "fields" map.
+    """
+    if not isinstance(item, dict):
+        return None, {"error": "Step must be an object"}
+    action_id = item.get(action_key)
+    if not isinstance(action_id, int) or isinstance(action_id, bool):
+        return None, {"error": f"{action_key} must be an integer"}
+    validator = validators.get(action_id)
+    if validator is None:
+        return None, {"error": f"Unknown {action_key} {action_id}"}
+    if "selected_value" not in item:
+        return None, {"error": "selected_value is required"}
+    fields = validator(item["selected_value"])
+    if fields:
+        return None, {"error": "Invalid selected_value", "fields": fields}
+    return {action_key: action_id, "selected_value": item["selected_value"]}, None
+
+def parse_steps_payload(data, action_key, validators):
+    """
+    Validate an ordered array of steps (or {"steps": [...]}) in one pass.
+
+    Returns (steps, errors); errors is a list of error dicts with an "index".
+    """
+    if isinstance(data, dict):
+        data = data.get("steps")
+    if not isinstance(data, list):
+        return None, [{"index": None, "error": "Expected a JSON array of steps"}]
+
+    steps, errors = [], []
+    for index, item in enumerate(data):
+        step, error = validate_step(item, action_key, validators)
+        if error:
+            errors.append(dict(error, index=index))
+        else:
+            steps.append(step)
+    return steps, errors
+
+def next_step_order(db, model, parent_key, parent_id):
+    """
+    step_order to use for a step appended after the current last one.
+    Only race-free once the transaction holds the write lock (append_steps).
+    """
+    last = db.execute(
+        select(func.max(model.step_order)).where(getattr(model, parent_key) == parent_id)
+    ).scalar()
+    return (last or 0) + STEP_ORDER_GAP
+
+def insert_steps(db, model, parent_key, parent_id, steps, first_order=STEP_ORDER_GAP):
+    """
+    Insert already-validated steps with one batched INSERT ... RETURNING,
+    numbering them from first_order in array order. Returns the new ids in order.
+    """
+    if not steps:
+        return []
+    rows = [
+        dict(step, **{parent_key: parent_id, "step_order": first_order + i * STEP_ORDER_GAP})
+        for i, step in enumerate(steps)
+    ]
+    # RETURNING rows come back unordered (asking for parameter order makes
+    # SQLite fall back to one INSERT per row); each new step_order is unique,
+    # so it puts the ids back in array order.
+    inserted = db.execute(insert(model).returning(model.id, model.step_order), rows).all()
+    return [step_id for step_id, _ in sorted(inserted, key=lambda row: row.step_order)]
+
+def append_steps(db, model, parent_key, parent_model, parent_id, steps):
+    """
+    Append steps after the current last one and bump the parent's version
+    (caller commits). Returns the new ids in order.
+    """
+    # The version UPDATE goes first: it takes SQLite's write lock (the parent
+    # row's lock elsewhere) before max(step_order) is read, so two concurrent
+    # appends queue up instead of both numbering from the same max.
+    bump_version(db, parent_model, parent_id)
+    first_order = next_step_order(db, model, parent_key, parent_id)
+    return insert_steps(db, model, parent_key, parent_id, steps, first_order)
+
+def replace_steps(db, model, parent_key, parent_id, steps):
+    """
+    Replace every step of a workflow / RIG with the given list (caller commits).
+    """
+    db.execute(delete(model).where(getattr(model, parent_key) == parent_id))
+    return insert_steps(db, model, parent_key, parent_id, steps)
+
+def copy_steps(db, model, parent_key, parent_model, source_id, target_ids, append=False):
+    """
+    Copy every step of source_id onto each target with one INSERT ... SELECT
+    per chunk of targets (caller commits). By default the targets' steps are
+    replaced; with append=True the copies go after their existing steps.
+    Returns the number of rows inserted.
+    """
+    steps = model.__table__
+    source = steps.alias("source")
+    target = parent_model.__table__
+    value_columns = [c.name for c in steps.c if c.name not in ("id", parent_key, "step_order")]
+
+    first = db.execute(select(func.min(source.c.step_order)).where(source.c[parent_key] == source_id)).scalar()
+    if append:
+        existing = steps.alias("existing")
+        last = (
+            select(func.coalesce(func.max(existing.c.step_order), 0))
+            .where(existing.c[parent_key] == target.c.id)
+            .scalar_subquery()
+        )
+        step_order = last + STEP_ORDER_GAP + (source.c.step_order - (first or 0))
+    else:
+        step_order = source.c.step_order
+
+    copied = 0
+    for chunk in chunked(list(target_ids)):
+        if not append:
+            db.execute(delete(model).where(getattr(model, parent_key).in_(chunk)))
+        if first is None:
+            continue  # Nothing to copy
+        rows = (
+            select(target.c.id, *(source.c[name] for name in value_columns), step_order)
+            .select_from(source.join(target, true()))  # Every source step x every target
+            .where(source.c[parent_key] == source_id, target.c.id.in_(chunk))
+            .order_by(target.c.id, source.c.step_order, source.c.id)
+        )
+        copied += db.execute(insert(steps).from_select([parent_key, *value_columns, "step_order"], rows)).rowcount
+    return copied
+
+def renumber_steps(db, model, parent_key, parent_id):
+    """
+    Respace every step of a workflow / RIG to multiples of STEP_ORDER_GAP,
+    keeping the current order (caller commits).
+    """
+    ids = db.scalars(
+        select(model.id)
+        .where(getattr(model, parent_key) == parent_id)
+        .order_by(model.step_order, model.id)
+    ).all()
+    if ids:
+        db.execute(update(model), [
+            {"id": step_id, "step_order": (i + 1) * STEP_ORDER_GAP} for i, step_id in enumerate(ids)
+        ])
+
+def move_step(db, model, parent_key, parent_id, step, index):
+    """
+    Move step to 0-based position index among its siblings (clamped to the
+    end), touching only the moved row unless the gap has run out (caller commits).
+    """
+    siblings = (
+        select(model.step_order)
+        .where(getattr(model, parent_key) == parent_id, model.id != step.id)
+        .order_by(model.step_order, model.id)
+    )
+    if index <= 0:
+        before = None
+        after = db.scalars(siblings.limit(1)).first()
+    else:
+        neighbours = db.scalars(siblings.offset(index - 1).limit(2)).all()
+        if not neighbours:
+            # Past the end: go after the current last step
+            before = db.execute(
+                select(func.max(model.step_order))
+                .where(getattr(model, parent_key) == parent_id, model.id != step.id)
+            ).scalar()
+            after = None
+        else:
+            before = neighbours[0]
+            after = neighbours[1] if len(neighbours) > 1 else None
+
+    if before is None and after is None:
+        return  # Only step in the list
+    if before is None:
+        step.step_order = after - STEP_ORDER_GAP
+    elif after is None:
+        step.step_order = before + STEP_ORDER_GAP
+    elif after - before > 1:
+        step.step_order = (before + after) // 2
+    else:
+        # Gap exhausted: respace the list once, then retry (always fits)
+        renumber_steps(db, model, parent_key, parent_id)
+        db.refresh(step)
+        move_step(db, model, parent_key, parent_id, step, index)
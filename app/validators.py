@@ -0,0 +1,143 @@
+import math
+import re
+
+# 🔹 selected_value validators compiled from ActionConfig / RIGActionConfig
+#
+# valid_values specs understood (per field):
+#   "numeric" / "number" / "seconds"  int, float or numeric string
+#   "integer"                         whole number (int, 6.0 or "6")
+#   "string" / "text"                 any string
+#   "0-1000"                          number within the range (inclusive)
+#   ["Up", "Down", ...]               one of the listed strings
+#
+# A config row is either {"field": spec, ...} (seed_database.py) or the older
+# {"values": [spec]} form keyed by option_name (rows written by main.py).
+# Validators are compiled once per catalog load and return {field: error}.
+# Fields the plan compiler reads as integers (plans.INTEGER_FIELDS) are
+# passed as integer_fields, and their numeric / range specs also require a
+# whole number, so nothing accepted here is truncated when a plan is built.
+
+RANGE_SPEC = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$")
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = value
+    elif isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+def as_integer(value):
+    """
+    value as an int when it is a whole number (or a string of one), else None.
+    """
+    number = _as_number(value)
+    if number is None or number != int(number):
+        return None
+    return int(number)
+
+def _numeric(value):
+    if _as_number(value) is None:
+        return "must be a number"
+
+def _integer(value):
+    if as_integer(value) is None:
+        return "must be an integer"
+
+def _string(value):
+    if not isinstance(value, str):
+        return "must be a string"
+
+def _any(value):
+    return None
+
+TYPE_SPECS = {
+    "numeric": _numeric,
+    "number": _numeric,
+    "seconds": _numeric,
+    "integer": _integer,
+    "string": _string,
+    "text": _string,
+}
+
+def _range(low, high, integer=False):
+    message = f"must be {'an integer' if integer else 'a number'} between {low:g} and {high:g}"
+
+    def check(value):
+        number = as_integer(value) if integer else _as_number(value)
+        if number is None or not low <= number <= high:
+            return message
+    return check
+
+def _choice(options):
+    allowed = frozenset(options)
+    message = f"must be one of {', '.join(map(str, options))}"
+
+    def check(value):
+        if not isinstance(value, str) or value not in allowed:
+            return message
+    return check
+
+def compile_spec(spec, integer=False):
+    """
+    Turn one field spec into a check(value) -> error message or None.
+    With integer=True, numeric specs only accept whole numbers.
+    """
+    if isinstance(spec, list):
+        return _choice(spec)
+    if isinstance(spec, str):
+        if spec in TYPE_SPECS:
+            check = TYPE_SPECS[spec]
+            return _integer if integer and check is _numeric else check
+        match = RANGE_SPEC.match(spec)
+        if match:
+            return _range(float(match.group(1)), float(match.group(2)), integer)
+    return _any  # Unknown spec: don't block writes on a catalog we can't read
+
+def _legacy_spec(values, integer=False):
+    # {"values": ["0-1000"]} / {"values": ["text"]} / {"values": ["up", "down"]}
+    if len(values) == 1 and isinstance(values[0], str):
+        single = compile_spec(values[0], integer)
+        if single is not _any:
+            return single
+    return compile_spec(list(values))
+
+def compile_validator(configs, integer_fields=()):
+    """
+    Build a validator for one action from its config rows
+    ({"option_name", "valid_values"} dicts). integer_fields names the
+    fields that must hold whole numbers.
+    """
+    fields = {}
+    for config in configs:
+        valid_values = config["valid_values"]
+        if not isinstance(valid_values, dict):
+            continue
+        if set(valid_values) == {"values"} and isinstance(valid_values["values"], list):
+            name = config["option_name"]
+            fields[name] = _legacy_spec(valid_values["values"], name in integer_fields)
+        else:
+            for name, spec in valid_values.items():
+                fields[name] = compile_spec(spec, name in integer_fields)
+    checks = tuple(fields.items())
+
+    def validate(selected_value):
+        if not isinstance(selected_value, dict):
+            return {"selected_value": "must be an object"}
+        errors = {}
+        for name, check in checks:
+            if name not in selected_value:
+                errors[name] = "is required"
+                continue
+            message = check(selected_value[name])
+            if message:
+                errors[name] = message
+        return errors
+
+    return validate
@@ -0,0 +1,61 @@
+from sqlalchemy import select, update
+
+# 🔹 Per-resource version counters (workflows.version, rigs.version)
+#
+# Every route that changes a workflow's steps, or a RIG's steps / phones,
+# calls bump_version() in the same transaction. Anything derived from those
+# rows (compiled plans, cached responses) is keyed by the version.
+#
+# Changed ids are also recorded on the session (mark_changed) so in-process
+# caches can drop their entries as soon as the transaction commits, and so
+# the change feed (app/changes.py) logs them. Routes that create or delete
+# workflows / RIGs or move phones call mark_changed() directly.
+
+CHANGED_KEY = "changed_resources"
+
+def mark_changed(db, model, resource_ids):
+    """
+    Record (table, id) pairs changed in the current transaction.
+    """
+    db.info.setdefault(CHANGED_KEY, set()).update(
+        (model.__tablename__, resource_id) for resource_id in resource_ids
+    )
+
+def bump_version(db, model, resource_id):
+    """
+    Increment model.version for resource_id (caller commits).
+    """
+    db.execute(
+        update(model)
+        .where(model.id == resource_id)
+        .values(version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    mark_changed(db, model, [resource_id])
+
+def bump_versions(db, model, resource_ids):
+    """
+    Increment model.version for several rows with one UPDATE (caller commits).
+    """
+    if resource_ids:
+        db.execute(
+            update(model)
+            .where(model.id.in_(list(resource_ids)))
+            .values(version=model.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        mark_changed(db, model, resource_ids)
+
+def current_version(db, model, resource_id):
+    """
+    Return the version, or None when the row does not exist.
+    """
+    return db.execute(select(model.version).where(model.id == resource_id)).scalar()
+
+def current_versions(db, model, resource_ids):
+    """
+    Return {id: version} for the rows that exist.
+    """
+    if not resource_ids:
+        return {}
+    return dict(db.execute(select(model.id, model.version).where(model.id.in_(list(resource_ids)))).all())
@@ -0,0 +1,56 @@
+"""
+Compare two bench.run result files.
+
+    python -m bench.compare baseline.json candidate.json [--fail-above 20]
+
+Exits with status 1 when any scenario's p95 latency or SQL statements per
+request got worse by more than --fail-above percent.
+"""
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "sql_per_request")
+GATED = ("p95_ms", "sql_per_request")
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--fail-above", type=float, default=None, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline {baseline['meta'].get('revision')} ({baseline['meta']['scale']}) "
+          f"vs candidate {candidate['meta'].get('revision')} ({candidate['meta']['scale']})")
+
+    regressions = []
+    for mode, scenarios in candidate["results"].items():
+        print(f"\n{mode}")
+        print(f"  {'scenario':<20}" + "".join(f"{m:>22}" for m in METRICS))
+        for name, new in scenarios.items():
+            old = baseline["results"].get(mode, {}).get(name)
+            if old is None:
+                continue
+            cells = []
+            for metric in METRICS:
+                pct = change(old.get(metric), new.get(metric))
+                cells.append(f"{new.get(metric)!s:>12} ({pct:+6.1f}%)" if pct is not None else f"{new.get(metric)!s:>22}")
+                if args.fail_above is not None and metric in GATED and pct is not None and pct > args.fail_above:
+                    regressions.append(f"{mode}/{name} {metric} {pct:+.1f}%")
+            print(f"  {name:<20}" + "".join(f"{c:>22}" for c in cells))
+
+    if regressions:
+        print("\n❌ Regressions above threshold:\n  " + "\n  ".join(regressions))
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
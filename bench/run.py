@@ -0,0 +1,219 @@
+"""
+Benchmark the API against a synthetic fleet.
+
+    python -m bench.run --scale small --out bench-small.json
+    python -m bench.run --scale full --db /tmp/bench-full.db --reuse
+    python -m bench.compare bench-old.json bench-new.json
+
+Seeds a fresh database (migrations + seed_database catalog + synthetic
+rows), then drives every scenario through the Flask test client and over
+HTTP with concurrent keep-alive clients. Reports p50/p95/p99 latency,
+throughput and SQL statements per request as JSON.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+SCALES = {
+    "small": {"rigs": 10, "phones": 500, "workflows": 100, "steps": 20, "rig_steps": 5},
+    "medium": {"rigs": 100, "phones": 5000, "workflows": 1000, "steps": 100, "rig_steps": 10},
+    "full": {"rigs": 1000, "phones": 50000, "workflows": 10000, "steps": 200, "rig_steps": 10},
+}
+
+# (name, method, path builder(rng, scale))
+SCENARIOS = [
+    ("actions", "GET", lambda r, s: "/actions"),
+    ("rig_action_config", "GET", lambda r, s: "/rig_actions/3/config"),
+    ("phones_page", "GET", lambda r, s: f"/phones?limit=100&after={r.randint(0, max(s['phones'] - 100, 0))}"),
+    ("workflows_page", "GET", lambda r, s: f"/workflows?limit=100&after={r.randint(0, max(s['workflows'] - 100, 0))}"),
+    ("rigs_page", "GET", lambda r, s: "/rigs?limit=100"),
+    ("rigs_overview", "GET", lambda r, s: "/rigs/overview?limit=100"),
+    ("rig", "GET", lambda r, s: f"/rigs/{r.randint(1, s['rigs'])}"),
+    ("rig_phones", "GET", lambda r, s: f"/rigs/{r.randint(1, s['rigs'])}/phones"),
+    ("rig_steps", "GET", lambda r, s: f"/rigs/{r.randint(1, s['rigs'])}/steps"),
+    ("rig_plan", "GET", lambda r, s: f"/rigs/{r.randint(1, s['rigs'])}/plan"),
+    ("workflow", "GET", lambda r, s: f"/workflows/{r.randint(1, s['workflows'])}"),
+    ("workflow_expanded", "GET", lambda r, s: f"/workflows/{r.randint(1, s['workflows'])}?expand=steps,config"),
+    ("workflow_steps", "GET", lambda r, s: f"/workflows/{r.randint(1, s['workflows'])}/steps"),
+    ("workflow_plan", "GET", lambda r, s: f"/workflows/{r.randint(1, s['workflows'])}/plan"),
+    ("workflows_active", "GET", lambda r, s: "/workflows/active"),
+]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, wall_seconds, errors, sql_statements):
+    latencies.sort()
+    count = len(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / count) if count else None,
+        "throughput_rps": round(count / wall_seconds, 1) if wall_seconds else None,
+        "sql_per_request": round(sql_statements / count, 2) if count and sql_statements is not None else None,
+    }
+
+def run_in_process(app, metrics, scale, requests, seed):
+    client = app.test_client()
+    results = {}
+    for name, method, path in SCENARIOS:
+        rng = random.Random(seed)
+        for _ in range(5):  # Warm caches / connection pool
+            client.open(path(rng, scale), method=method)
+        rng = random.Random(seed)
+        paths = [path(rng, scale) for _ in range(requests)]
+        _, sql_before = metrics.totals()
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for p in paths:
+            t = time.perf_counter()
+            response = client.open(p, method=method)
+            latencies.append(time.perf_counter() - t)
+            errors += response.status_code >= 400
+        wall = time.perf_counter() - started
+        _, sql_after = metrics.totals()
+        results[name] = summarize(latencies, wall, errors, sql_after - sql_before)
+        print(f"  in-process {name:<20} p50={results[name]['p50_ms']}ms sql/req={results[name]['sql_per_request']}")
+    return results
+
+def _http_worker(host, port, method, paths, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local, local_errors = [], 0
+    try:
+        for p in paths:
+            t = time.perf_counter()
+            conn.request(method, p)
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - t)
+            local_errors += response.status >= 400
+    finally:
+        conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += local_errors
+
+def run_http(base_url, metrics, scale, requests, clients, seed):
+    parts = urlsplit(base_url)
+    results = {}
+    for name, method, path in SCENARIOS:
+        rng = random.Random(seed)
+        paths = [path(rng, scale) for _ in range(requests)]
+        shards = [paths[i::clients] for i in range(clients)]
+        latencies, errors, lock = [], [0], threading.Lock()
+        sql_before = metrics.totals()[1] if metrics else None
+        threads = [
+            threading.Thread(target=_http_worker, args=(parts.hostname, parts.port, method, shard, latencies, errors, lock))
+            for shard in shards if shard
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+        sql = metrics.totals()[1] - sql_before if metrics else None
+        results[name] = summarize(latencies, wall, errors[0], sql)
+        print(f"  http x{clients:<3} {name:<20} p99={results[name]['p99_ms']}ms rps={results[name]['throughput_rps']}")
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API against a synthetic fleet")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--db", default="bench.db", help="SQLite file to (re)create")
+    parser.add_argument("--reuse", action="store_true", help="Reuse --db if it exists instead of reseeding")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent HTTP clients")
+    parser.add_argument("--url", help="Benchmark an already running server instead of an in-process one")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench-results.json")
+    args = parser.parse_args()
+    scale = SCALES[args.scale]
+
+    # Must be set before anything imports app.config
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.db)}"
+    os.environ.setdefault("METRICS_ENABLED", "1")
+
+    from app.database import engine
+
+    if not (args.reuse and os.path.exists(args.db)):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+        from app.seed_database import init_db, seed_database
+        from bench.synthetic import populate
+        started = time.perf_counter()
+        init_db()
+        seed_database()
+        populate(engine, seed=args.seed, **scale)
+        print(f"🌱 Seeded {args.scale} fleet in {time.perf_counter() - started:.1f}s")
+
+    from app import create_app
+    from app.metrics import metrics
+    app = create_app()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "scale": args.scale,
+            "sizes": scale,
+            "requests_per_scenario": args.requests,
+            "clients": args.clients,
+            "python": sys.version.split()[0],
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+
+    print("⏱  In-process (test client)")
+    report["results"]["in_process"] = run_in_process(app, metrics, scale, args.requests, args.seed)
+
+    if args.url:
+        print(f"⏱  HTTP against {args.url}")
+        report["results"]["http"] = run_http(args.url, None, scale, args.requests, args.clients, args.seed)
+    else:
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            print(f"⏱  HTTP (threaded dev server, {args.clients} clients)")
+            report["results"]["http"] = run_http(
+                f"http://127.0.0.1:{server.server_port}", metrics, scale, args.requests, args.clients, args.seed
+            )
+        finally:
+            server.shutdown()
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"✅ Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
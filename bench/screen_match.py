@@ -0,0 +1,145 @@
+"""
+Benchmark swipe_until screen matching on synthetic frames.
+
+    python -m bench.screen_match --width 720 --height 1280 --frames 50 --out bench-match.json
+
+Renders blocky RGBA "screens" with noise, plants a template in half of
+them, and times ScreenMatcher.find() for image targets (hit / miss) and
+word targets, each on a fresh Frame (cold: pyramid and text index built
+by the check) and on an already-checked one (warm). Reports matches per
+second, p50/p95/p99 latency and how many planted targets were found.
+Needs numpy (pip install -r requirements-agent.txt).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from app.screen_match import Frame, ScreenMatcher
+from bench.run import git_revision, percentile
+
+WORDS = ["Settings", "Sign in", "Continue", "Next", "Skip", "Allow", "Open", "Install", "Search", "Cancel"]
+
+def synthetic_screen(rng, width, height, block=16):
+    blocks = rng.integers(0, 256, (height // block + 1, width // block + 1, 3), dtype=np.uint8)
+    screen = np.repeat(np.repeat(blocks, block, axis=0), block, axis=1)[:height, :width]
+    noise = rng.integers(-12, 13, screen.shape)
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[:, :, :3] = np.clip(screen + noise, 0, 255)
+    rgba[:, :, 3] = 255
+    return rgba
+
+def synthetic_template(rng, width, height, block=4):
+    blocks = rng.integers(0, 256, (height // block + 1, width // block + 1, 3), dtype=np.uint8)
+    return np.repeat(np.repeat(blocks, block, axis=0), block, axis=1)[:height, :width]
+
+def make_frames(rng, args, template):
+    """
+    [(rgba bytes, text elements, planted (x, y) or None)]
+    """
+    frames = []
+    for i in range(args.frames):
+        rgba = synthetic_screen(rng, args.width, args.height)
+        planted = None
+        if i % 2 == 0:
+            y = int(rng.integers(0, args.height - template.shape[0]))
+            x = int(rng.integers(0, args.width - template.shape[1]))
+            rgba[y:y + template.shape[0], x:x + template.shape[1], :3] = template
+            planted = (x, y)
+        text = [(word, (int(rng.integers(0, args.width)), int(rng.integers(0, args.height)), 120, 40))
+                for word in rng.choice(WORDS, size=args.text_elements)]
+        frames.append((rgba.tobytes(), text, planted))
+    return frames
+
+def time_checks(frames, args, check):
+    latencies, found, expected = [], 0, 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.seconds or not latencies:
+        for buffer, text, planted in frames:
+            t = time.perf_counter()
+            match = check(buffer, text)
+            latencies.append(time.perf_counter() - t)
+            if planted is not None:
+                expected += 1
+                found += match is not None and (match.x, match.y) == planted
+    wall = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "checks": len(latencies),
+        "matches_per_second": round(len(latencies) / wall, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "planted_found": f"{found}/{expected}" if expected else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark swipe_until screen matching")
+    parser.add_argument("--width", type=int, default=720)
+    parser.add_argument("--height", type=int, default=1280)
+    parser.add_argument("--template", default="96x64", help="WIDTHxHEIGHT of the image target")
+    parser.add_argument("--frames", type=int, default=20, help="Distinct synthetic frames")
+    parser.add_argument("--text-elements", type=int, default=40, help="Text elements per frame")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Minimum time per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench-screen-match.json")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    template_width, template_height = (int(v) for v in args.template.split("x"))
+    template = synthetic_template(rng, template_width, template_height)
+    gray = template[:, :, 0] * 0.299 + template[:, :, 1] * 0.587 + template[:, :, 2] * 0.114
+    matcher = ScreenMatcher(loader=lambda path: gray)
+    frames = make_frames(rng, args, template)
+    misses = [(buffer, text, None) for buffer, text, planted in frames if planted is None]
+
+    def image(buffer, text):
+        return matcher.find(Frame(buffer, args.width, args.height, 4, text), "image", "target", step_id=1)
+
+    warm_frames = {}
+
+    def image_warm(buffer, text):
+        frame = warm_frames.get(id(buffer))
+        if frame is None:
+            frame = warm_frames[id(buffer)] = Frame(buffer, args.width, args.height, 4, text)
+        return matcher.find(frame, "image", "target", step_id=1)
+
+    def word(buffer, text):
+        return matcher.find(Frame(buffer, args.width, args.height, 4, text), "word", "sign in")
+
+    image_warm(*frames[0][:2])  # Build the cached template outside the timings
+    scenarios = {
+        "image_cold": (frames, image),
+        "image_miss_cold": (misses, image),
+        "image_warm": (frames, image_warm),
+        "word_cold": ([(buffer, text, None) for buffer, text, _ in frames], word),
+    }
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "frame": f"{args.width}x{args.height}",
+            "template": args.template,
+            "frames": args.frames,
+            "numpy": np.__version__,
+            "python": sys.version.split()[0],
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    for name, (scenario_frames, check) in scenarios.items():
+        result = report["results"][name] = time_checks(scenario_frames, args, check)
+        print(f"  {name:<16} {result['matches_per_second']:>10} /s   p95 {result['p95_ms']} ms"
+              + (f"   found {result['planted_found']}" if result["planted_found"] else ""))
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"✅ Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
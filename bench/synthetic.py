@@ -0,0 +1,92 @@
+import random
+from sqlalchemy import insert
+from app.models import Phone, RIG, RIGSteps, Workflow, WorkflowSteps, WeekdayEnum
+from app.steps import STEP_ORDER_GAP
+
+# 🔹 Synthetic fleet data for benchmarks
+#
+# Uses the real schema (migrations) and the seed_database.py catalog, then
+# bulk-inserts rigs / phones / workflows / steps with a fixed random seed so
+# every run of the same scale produces the same database.
+
+CHUNK = 10000
+DAYS = [day for day in WeekdayEnum]
+DIRECTIONS = ["Up", "Down", "Left", "Right"]
+
+def _workflow_step_value(rng, action_id):
+    if action_id == 1:
+        return {"x": rng.randint(0, 1000), "y": rng.randint(0, 1000)}
+    if action_id == 2:
+        return {"text": f"input-{rng.randint(0, 9999)}"}
+    if action_id == 3:
+        return {"direction": rng.choice(DIRECTIONS)}
+    if action_id == 4:
+        return {"direction": rng.choice(DIRECTIONS), "type": "word", "value": f"target-{rng.randint(0, 99)}"}
+    return {"seconds": rng.randint(0, 5)}
+
+def _insert_chunked(conn, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(insert(model), rows[start:start + CHUNK])
+
+def populate(engine, rigs, phones, workflows, steps, rig_steps, seed=42):
+    """
+    Fill an empty (migrated and seeded) database. Ids are assigned densely
+    from 1, so benchmarks can pick random ids without querying.
+    """
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        _insert_chunked(conn, Workflow, [
+            {
+                "id": i,
+                "name": f"workflow-{i}",
+                "start_hour": rng.randint(0, 23),
+                "end_hour": rng.randint(0, 23),
+                "start_day": rng.choice(DAYS),
+                "end_day": rng.choice(DAYS),
+            }
+            for i in range(1, workflows + 1)
+        ])
+        per_chunk = max(1, CHUNK // max(steps, 1))
+        for first in range(1, workflows + 1, per_chunk):
+            last = min(first + per_chunk, workflows + 1)
+            rows = []
+            for workflow_id in range(first, last):
+                for order in range(1, steps + 1):
+                    action_id = rng.randint(1, 5)
+                    rows.append({
+                        "workflow_id": workflow_id,
+                        "action_id": action_id,
+                        "selected_value": _workflow_step_value(rng, action_id),
+                        "step_order": order * STEP_ORDER_GAP,
+                    })
+            _insert_chunked(conn, WorkflowSteps, rows)
+
+        _insert_chunked(conn, RIG, [
+            {"id": i, "name": f"rig-{i}", "description": f"Synthetic rig {i}"} for i in range(1, rigs + 1)
+        ])
+        _insert_chunked(conn, Phone, [
+            {"id": i, "rig_id": (i - 1) % rigs + 1 if rigs else None, "serial_number": f"SN{i:08d}"}
+            for i in range(1, phones + 1)
+        ])
+
+        rows = []
+        for rig_id in range(1, rigs + 1):
+            rig_phones = list(range(rig_id, phones + 1, rigs))
+            for order in range(1, rig_steps + 1):
+                kind = rng.randint(1, 3)
+                if kind == 1 and rig_phones:
+                    value = {"phone_id": rng.choice(rig_phones)}
+                elif kind == 3 and workflows:
+                    value = {"workflow_id": rng.randint(1, workflows)}
+                else:
+                    kind, value = 2, {"seconds": rng.randint(0, 5)}
+                rows.append({
+                    "rig_id": rig_id,
+                    "rig_action_id": kind,
+                    "selected_value": value,
+                    "step_order": order * STEP_ORDER_GAP,
+                })
+        _insert_chunked(conn, RIGSteps, rows)
+
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
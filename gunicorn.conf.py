@@ -0,0 +1,26 @@
+# Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# One worker process per core, each with a few threads; the app (and its
+# action catalog) is loaded once in the master before forking.
+from app.config import HOST, PORT, WEB_GRACEFUL_TIMEOUT, WEB_THREADS, WEB_WORKERS
+
+bind = f"{HOST}:{PORT}"
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread"
+preload_app = True
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+timeout = 60
+keepalive = 5
+accesslog = "-"
+
+def post_fork(server, worker):
+    # Connections opened in the master (catalog preload) must not be shared
+    # across processes; each worker starts with an empty pool.
+    from app.database import engine
+    engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    # Graceful shutdown: return pooled connections before the worker exits
+    from app.database import engine
+    engine.dispose()
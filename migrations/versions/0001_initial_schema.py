@@ -0,0 +1,126 @@
+"""Initial schema
+
+Matches the tables previously created by Base.metadata.create_all(). Tables
+that already exist are left untouched, so an existing workflow.db can be
+upgraded in place without stamping it first.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "workflows" not in existing:
+        op.create_table(
+            "workflows",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("start_hour", sa.Integer(), nullable=False),
+            sa.Column("end_hour", sa.Integer(), nullable=False),
+            sa.Column("start_day", sa.Enum(*WEEKDAYS, name="weekday_enum"), nullable=False),
+            sa.Column("end_day", sa.Enum(*WEEKDAYS, name="weekday_enum"), nullable=False),
+        )
+    if "actions" not in existing:
+        op.create_table(
+            "actions",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column(
+                "type",
+                sa.Enum("click", "type_input", "swipe", "swipe_until", "set_time_delay", name="action_type_enum"),
+                nullable=False,
+            ),
+        )
+    if "rigs" not in existing:
+        op.create_table(
+            "rigs",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("description", sa.String(255)),
+        )
+    if "rig_actions" not in existing:
+        op.create_table(
+            "rig_actions",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column(
+                "type",
+                sa.Enum("switch_phone", "set_time_delay", "add_workflow", name="rig_action_type_enum"),
+                nullable=False,
+            ),
+        )
+    if "action_configs" not in existing:
+        op.create_table(
+            "action_configs",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("action_id", sa.Integer(), sa.ForeignKey("actions.id")),
+            sa.Column("option_name", sa.String(100), nullable=False),
+            sa.Column("valid_values", sa.JSON(), nullable=False),
+        )
+    if "workflow_steps" not in existing:
+        op.create_table(
+            "workflow_steps",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("workflow_id", sa.Integer(), sa.ForeignKey("workflows.id")),
+            sa.Column("action_id", sa.Integer(), sa.ForeignKey("actions.id")),
+            sa.Column("selected_value", sa.JSON(), nullable=False),
+            sa.Column("step_order", sa.Integer(), nullable=False),
+        )
+    if "phones" not in existing:
+        op.create_table(
+            "phones",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_id", sa.Integer(), sa.ForeignKey("rigs.id")),
+            sa.Column("serial_number", sa.String(50), nullable=False, unique=True),
+        )
+    if "rig_action_configs" not in existing:
+        op.create_table(
+            "rig_action_configs",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_action_id", sa.Integer(), sa.ForeignKey("rig_actions.id")),
+            sa.Column("option_name", sa.String(100), nullable=False),
+            sa.Column("valid_values", sa.JSON(), nullable=False),
+        )
+    if "rig_steps" not in existing:
+        op.create_table(
+            "rig_steps",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_id", sa.Integer(), sa.ForeignKey("rigs.id")),
+            sa.Column("rig_action_id", sa.Integer(), sa.ForeignKey("rig_actions.id")),
+            sa.Column("selected_value", sa.JSON(), nullable=False),
+            sa.Column("step_order", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        "rig_steps",
+        "rig_action_configs",
+        "phones",
+        "workflow_steps",
+        "action_configs",
+        "rig_actions",
+        "rigs",
+        "actions",
+        "workflows",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,103 @@
+"""Lookup indexes and foreign key cascades
+
+Adds composite indexes for the columns every request filters or sorts on,
+and rebuilds the child tables so their foreign keys cascade (steps, configs)
+or null out (phone -> rig) when the parent row is deleted.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_workflow_steps_workflow_id_step_order", "workflow_steps", ["workflow_id", "step_order"]),
+    ("ix_rig_steps_rig_id_step_order", "rig_steps", ["rig_id", "step_order"]),
+    ("ix_phones_rig_id", "phones", ["rig_id"]),
+    ("ix_action_configs_action_id", "action_configs", ["action_id"]),
+    ("ix_rig_action_configs_rig_action_id", "rig_action_configs", ["rig_action_id"]),
+]
+
+
+def _tables(cascade):
+    """
+    Snapshot of the child tables, with or without ON DELETE rules.
+    """
+    def ondelete(rule):
+        return rule if cascade else None
+
+    metadata = sa.MetaData()
+    # Parent tables only need to exist in the snapshot for FK resolution
+    for parent in ("workflows", "actions", "rigs", "rig_actions"):
+        sa.Table(parent, metadata, sa.Column("id", sa.Integer(), primary_key=True))
+
+    return [
+        sa.Table(
+            "action_configs", metadata,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("action_id", sa.Integer(), sa.ForeignKey("actions.id", ondelete=ondelete("CASCADE"))),
+            sa.Column("option_name", sa.String(100), nullable=False),
+            sa.Column("valid_values", sa.JSON(), nullable=False),
+        ),
+        sa.Table(
+            "workflow_steps", metadata,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("workflow_id", sa.Integer(), sa.ForeignKey("workflows.id", ondelete=ondelete("CASCADE"))),
+            sa.Column("action_id", sa.Integer(), sa.ForeignKey("actions.id")),
+            sa.Column("selected_value", sa.JSON(), nullable=False),
+            sa.Column("step_order", sa.Integer(), nullable=False),
+        ),
+        sa.Table(
+            "phones", metadata,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_id", sa.Integer(), sa.ForeignKey("rigs.id", ondelete=ondelete("SET NULL"))),
+            sa.Column("serial_number", sa.String(50), nullable=False),
+            sa.UniqueConstraint("serial_number"),
+        ),
+        sa.Table(
+            "rig_action_configs", metadata,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_action_id", sa.Integer(), sa.ForeignKey("rig_actions.id", ondelete=ondelete("CASCADE"))),
+            sa.Column("option_name", sa.String(100), nullable=False),
+            sa.Column("valid_values", sa.JSON(), nullable=False),
+        ),
+        sa.Table(
+            "rig_steps", metadata,
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("rig_id", sa.Integer(), sa.ForeignKey("rigs.id", ondelete=ondelete("CASCADE"))),
+            sa.Column("rig_action_id", sa.Integer(), sa.ForeignKey("rig_actions.id")),
+            sa.Column("selected_value", sa.JSON(), nullable=False),
+            sa.Column("step_order", sa.Integer(), nullable=False),
+        ),
+    ]
+
+
+def _rebuild(cascade):
+    for table in _tables(cascade):
+        with op.batch_alter_table(table.name, recreate="always", copy_from=table):
+            pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rebuild(cascade=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    _rebuild(cascade=False)
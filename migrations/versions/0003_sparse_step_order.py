@@ -0,0 +1,46 @@
+"""Sparse step_order
+
+Respaces existing workflow / RIG steps to multiples of STEP_ORDER_GAP, in
+their current order (ties broken by id), so steps can be moved by updating
+a single row (see app/steps.py).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:15:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STEP_ORDER_GAP = 1024
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Numbered like renumber_steps() (position * STEP_ORDER_GAP, ties broken
+    # by id), so steps that shared a step_order can be swapped by move_up / move_down.
+    bind = op.get_bind()
+    for table, parent_key in (("workflow_steps", "workflow_id"), ("rig_steps", "rig_id")):
+        positions = bind.execute(sa.text(
+            f"SELECT id, ROW_NUMBER() OVER (PARTITION BY {parent_key} ORDER BY step_order, id) FROM {table}"
+        )).all()
+        if positions:
+            bind.execute(
+                sa.text(f"UPDATE {table} SET step_order = :step_order WHERE id = :id"),
+                [{"id": step_id, "step_order": position * STEP_ORDER_GAP} for step_id, position in positions],
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sparse values still sort correctly, so there is nothing to undo.
+    pass
@@ -0,0 +1,35 @@
+"""Workflow / RIG version counters
+
+Bumped by every step (and RIG phone) mutation so compiled plans and cached
+responses can be keyed by version.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("workflows", "rigs"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("workflows", "rigs"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("version")
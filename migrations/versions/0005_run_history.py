@@ -0,0 +1,90 @@
+"""Run history: runs, step_events, step_rollups
+
+Append-only execution history written in batches by app.history, indexed
+by (owner, time) for phone / RIG / workflow range queries, plus hourly
+rollups that replace step events past their retention.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RUN_ID = sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+
+INDEXES = [
+    ("ix_runs_phone_id_started_at", "runs", ["phone_id", "started_at"]),
+    ("ix_runs_rig_id_started_at", "runs", ["rig_id", "started_at"]),
+    ("ix_runs_workflow_id_started_at", "runs", ["workflow_id", "started_at"]),
+    ("ix_step_events_run_id", "step_events", ["run_id"]),
+    ("ix_step_events_phone_id_started_at", "step_events", ["phone_id", "started_at"]),
+    ("ix_step_events_rig_id_started_at", "step_events", ["rig_id", "started_at"]),
+    ("ix_step_events_workflow_id_started_at", "step_events", ["workflow_id", "started_at"]),
+    ("ix_step_rollups_phone_id_hour", "step_rollups", ["phone_id", "hour"]),
+    ("ix_step_rollups_rig_id_hour", "step_rollups", ["rig_id", "hour"]),
+    ("ix_step_rollups_workflow_id_hour", "step_rollups", ["workflow_id", "hour"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "runs",
+        sa.Column("id", RUN_ID, primary_key=True, autoincrement=False),
+        sa.Column("phone_id", sa.Integer(), nullable=False),
+        sa.Column("rig_id", sa.Integer()),
+        sa.Column("workflow_id", sa.Integer()),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("started_at", sa.BigInteger(), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False),
+        sa.Column("steps", sa.Integer(), nullable=False),
+        sa.Column("failed_step_id", sa.Integer()),
+        sa.Column("error", sa.String(255)),
+    )
+    op.create_table(
+        "step_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("run_id", RUN_ID, nullable=False),
+        sa.Column("phone_id", sa.Integer(), nullable=False),
+        sa.Column("rig_id", sa.Integer()),
+        sa.Column("workflow_id", sa.Integer()),
+        sa.Column("step_id", sa.Integer()),
+        sa.Column("action", sa.String(20), nullable=False),
+        sa.Column("started_at", sa.BigInteger(), nullable=False),
+        sa.Column("duration_ms", sa.Integer(), nullable=False),
+        sa.Column("ok", sa.Boolean(), nullable=False),
+    )
+    op.create_table(
+        "step_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("hour", sa.BigInteger(), nullable=False),
+        sa.Column("phone_id", sa.Integer(), nullable=False),
+        sa.Column("rig_id", sa.Integer()),
+        sa.Column("workflow_id", sa.Integer()),
+        sa.Column("action", sa.String(20), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("failures", sa.Integer(), nullable=False),
+        sa.Column("total_ms", sa.BigInteger(), nullable=False),
+        sa.Column("max_ms", sa.Integer(), nullable=False),
+    )
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    for table in ("step_rollups", "step_events", "runs"):
+        op.drop_table(table)
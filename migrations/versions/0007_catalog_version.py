@@ -0,0 +1,36 @@
+"""Catalog version: catalog_version
+
+Single-row counter bumped by POST /catalog/refresh and seed_database.py;
+each worker compares it with its in-memory catalog and reloads on change.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    catalog_version = op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+    op.bulk_insert(catalog_version, [{"id": 1, "version": 1}])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("catalog_version")
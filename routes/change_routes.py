@@ -0,0 +1,66 @@
+from flask import Blueprint, Response, request, jsonify
+from app.changes import FEED_TABLES, feed_bounds, snapshot_chunks, wait_for_changes
+from app.config import CHANGES_MAX_WAIT_SECONDS, CHANGES_PAGE_SIZE
+from app.database import db, engine
+from app.listing import ListArgsError, page_args
+
+change_routes = Blueprint("change_routes", __name__)
+
+def _feed_gone(since, oldest, newest):
+    """
+    True when since cannot be continued from: entries after it were
+    trimmed, or it is ahead of this log (database restored or reset).
+    """
+    if since > (newest or 0):
+        return True
+    return oldest is not None and since < oldest - 1
+
+# 🔹 Change Feed
+#   ?since=<seq> (default 0), ?limit= (default / max CHANGES_PAGE_SIZE),
+#   ?wait=<seconds> long-polls until there is at least one change,
+#   ?resources=workflows,rigs limits changes to those tables; next still
+#   moves past the others, so a long-poll may return an empty page.
+#   410 means the node has to re-bootstrap from /changes/snapshot.
+@change_routes.route("/changes", methods=["GET"])
+def get_changes():
+    try:
+        since = int(request.args.get("since", 0))
+        wait = float(request.args.get("wait", 0))
+        limit, _ = page_args()
+        resources = tuple(request.args.get("resources", ",".join(FEED_TABLES)).split(","))
+        if not set(resources) <= set(FEED_TABLES):
+            raise ValueError(f"resources must be a comma-separated subset of {','.join(FEED_TABLES)}")
+        if since < 0 or not 0 <= wait <= CHANGES_MAX_WAIT_SECONDS:
+            raise ValueError(f"since must be >= 0 and wait between 0 and {CHANGES_MAX_WAIT_SECONDS:g}")
+    except (ValueError, ListArgsError) as e:
+        return jsonify({"error": f"Invalid arguments: {e}"}), 400
+
+    oldest, newest = feed_bounds(db)
+    if _feed_gone(since, oldest, newest):
+        return jsonify({
+            "error": "Changes after this seq are no longer available",
+            "oldest_seq": oldest,
+            "latest_seq": newest,
+            "snapshot": "/changes/snapshot",
+        }), 410
+
+    changes, next_seq, more = wait_for_changes(
+        db, since, min(limit or CHANGES_PAGE_SIZE, CHANGES_PAGE_SIZE), wait, resources
+    )
+    return jsonify({"since": since, "next": next_seq, "more": more, "changes": changes})
+
+# 🔹 Snapshot for Bootstrapping (gzip-compressed NDJSON, streamed)
+#   Apply it, then follow GET /changes?since=<X-Change-Seq>.
+@change_routes.route("/changes/snapshot", methods=["GET"])
+def get_changes_snapshot():
+    _, newest = feed_bounds(db)
+    seq = newest or 0
+    db.rollback()  # The stream reads on its own connection
+    return Response(
+        snapshot_chunks(engine, seq),
+        mimetype="application/gzip",
+        headers={
+            "X-Change-Seq": str(seq),
+            "Content-Disposition": f'attachment; filename="snapshot-{seq}.ndjson.gz"',
+        },
+    )
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from app.config import LIST_MAX_LIMIT
+from app.database import db
+from app.history import action_stats, run_steps, runs_between
+from app.listing import ListArgsError, page_args
+from app.schedule import parse_moment
+
+history_routes = Blueprint("history_routes", __name__)
+
+DEFAULT_RANGE = timedelta(hours=24)
+DEFAULT_RUNS = 100
+
+def _time_range():
+    """
+    ?since= / ?until= (ISO 8601 or unix seconds) as epoch ms; the last 24
+    hours by default. Raises ValueError.
+    """
+    until = parse_moment(request.args.get("until"))
+    since = parse_moment(request.args["since"]) if request.args.get("since") else until - DEFAULT_RANGE
+    if since >= until:
+        raise ValueError("since must be before until")
+    return int(since.timestamp() * 1000), int(until.timestamp() * 1000)
+
+def _iso(ms):
+    return datetime.fromtimestamp(ms / 1000).isoformat(timespec="milliseconds")
+
+def _run_timeline(owner, owner_id):
+    try:
+        since, until = _time_range()
+        limit, _ = page_args()
+    except (ValueError, ListArgsError) as e:
+        return jsonify({"error": f"Invalid time range or limit: {e}"}), 400
+    rows = runs_between(db, owner, owner_id, since, until, min(limit or DEFAULT_RUNS, LIST_MAX_LIMIT))
+    return jsonify([
+        {
+            "run_id": r.id,
+            "phone_id": r.phone_id,
+            "rig_id": r.rig_id,
+            "workflow_id": r.workflow_id,
+            "status": r.status,
+            "started_at": _iso(r.started_at),
+            "duration_ms": r.duration_ms,
+            "steps": r.steps,
+            "failed_step_id": r.failed_step_id,
+            "error": r.error
+        } for r in rows
+    ])
+
+def _action_stats(owner, owner_id):
+    try:
+        since, until = _time_range()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time range: {e}"}), 400
+    return jsonify({
+        owner + "_id": owner_id,
+        "since": _iso(since),
+        "until": _iso(until),
+        "actions": action_stats(db, owner, owner_id, since, until)
+    })
+
+# 🔹 Run Timelines (newest first)
+#   ?since=&until= (default: last 24 hours), ?limit= (default 100)
+@history_routes.route("/phones/<int:owner_id>/runs", methods=["GET"])
+def get_phone_runs(owner_id):
+    return _run_timeline("phone", owner_id)
+
+@history_routes.route("/rigs/<int:owner_id>/runs", methods=["GET"])
+def get_rig_runs(owner_id):
+    return _run_timeline("rig", owner_id)
+
+@history_routes.route("/workflows/<int:owner_id>/runs", methods=["GET"])
+def get_workflow_runs(owner_id):
+    return _run_timeline("workflow", owner_id)
+
+# 🔹 Steps of One Run
+@history_routes.route("/runs/<int:run_id>/steps", methods=["GET"])
+def get_run_steps(run_id):
+    return jsonify([
+        {
+            "step_id": r.step_id,
+            "workflow_id": r.workflow_id,
+            "action": r.action,
+            "started_at": _iso(r.started_at),
+            "duration_ms": r.duration_ms,
+            "ok": r.ok
+        } for r in run_steps(db, run_id)
+    ])
+
+# 🔹 Per-Action Latency Stats
+#   ?since=&until= (default: last 24 hours); older data comes from hourly rollups
+@history_routes.route("/phones/<int:owner_id>/step_stats", methods=["GET"])
+def get_phone_step_stats(owner_id):
+    return _action_stats("phone", owner_id)
+
+@history_routes.route("/rigs/<int:owner_id>/step_stats", methods=["GET"])
+def get_rig_step_stats(owner_id):
+    return _action_stats("rig", owner_id)
+
+@history_routes.route("/workflows/<int:owner_id>/step_stats", methods=["GET"])
+def get_workflow_step_stats(owner_id):
+    return _action_stats("workflow", owner_id)
@@ -1,10 +1,16 @@
 from flask import Blueprint, request, jsonify
-from app.database import SessionLocal
+from app.database import chunked, db
 from app.models import Phone, RIG
+from app.listing import list_response
+from app.versions import bump_version, bump_versions, mark_changed
+from app.config import BULK_MAX_PHONES
+from app.enrollment import enroll_phones, parse_serials_csv
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 
 phone_routes = Blueprint("phone_routes", __name__)
-db = SessionLocal()
+
+PHONE_FIELDS = ("id", "rig_id", "serial_number")
 
 # 📌 1️⃣ Create a Phone
 @phone_routes.route("/phones", methods=["POST"])
@@ -13,31 +19,76 @@ def create_phone():
     if "serial_number" not in data:
         return jsonify({"error": "serial_number is required"}), 400
     
-    new_phone = Phone(rig_id="", serial_number=data["serial_number"])
+    new_phone = Phone(rig_id=None, serial_number=data["serial_number"])
     try:
         db.add(new_phone)
+        db.flush()
+        mark_changed(db, Phone, [new_phone.id])
         db.commit()
         return jsonify({"message": "Phone created", "id": new_phone.id}), 201
     except IntegrityError:
         db.rollback()
         return jsonify({"error": "Phone with this serial number already exists"}), 400
 
+# 📌 Enroll Many Phones at Once
+@phone_routes.route("/phones/bulk", methods=["POST"])
+def enroll_phones_bulk():
+    """
+    Body: {"serial_numbers": [...], "rig_id": optional}, a JSON array of
+    serials, or CSV (text/csv body or a multipart "file"; ?rig_id= for the
+    RIG). One transaction; returns a created / existing / error row report.
+    """
+    rig_id = request.args.get("rig_id", type=int)
+    if "file" in request.files:
+        serials = parse_serials_csv(request.files["file"].read().decode("utf-8-sig"))
+    elif request.mimetype == "text/csv":
+        serials = parse_serials_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            serials = data.get("serial_numbers")
+            rig_id = data.get("rig_id", rig_id)
+        else:
+            serials = data
+        if not isinstance(serials, list):
+            return jsonify({"error": "serial_numbers must be a list"}), 400
+
+    if len(serials) > BULK_MAX_PHONES:
+        return jsonify({"error": f"At most {BULK_MAX_PHONES} phones per request"}), 400
+    if rig_id is not None:
+        if not isinstance(rig_id, int) or isinstance(rig_id, bool):
+            return jsonify({"error": "rig_id must be an integer"}), 400
+        if not db.get(RIG, rig_id):
+            return jsonify({"error": "RIG not found"}), 404
+
+    results, counts = enroll_phones(db, serials, rig_id)
+    db.commit()
+    return jsonify({"rig_id": rig_id, **counts, "results": results}), 200
+
 # 📌 2️⃣ Get All Phones
 @phone_routes.route("/phones", methods=["GET"])
 def get_phones():
-    phones = db.query(Phone).all()
-    return jsonify([{"id": p.id, "rig_id": p.rig_id, "serial_number": p.serial_number} for p in phones])
+    """
+    Supports ?limit=&after= keyset pagination, ?fields= and ?stream=ndjson|json.
+    """
+    return list_response(Phone, PHONE_FIELDS, PHONE_FIELDS)
 
 # 📌 3️⃣ Get Phones for a Specific RIG
 @phone_routes.route("/rigs/<int:rig_id>/phones", methods=["GET"])
 def get_phones_for_rig(rig_id):
-    phones = db.query(Phone).filter_by(rig_id=rig_id).all()
-    return jsonify([{"id": p.id, "serial_number": p.serial_number} for p in phones])
+    return list_response(Phone, ("id", "serial_number"), PHONE_FIELDS, Phone.rig_id == rig_id)
 
 # 📌 4️⃣ Assign a Phone to a RIG
 @phone_routes.route("/rigs/<int:rig_id>/phones", methods=["POST"])
 def assign_phone_to_rig(rig_id):
     data = request.json
+    if not db.get(RIG, rig_id):
+        return jsonify({"error": "RIG not found"}), 404
+
+    # {"phone_ids": [...]} assigns many phones with one UPDATE
+    if "phone_ids" in data:
+        return assign_phones_to_rig(rig_id, data["phone_ids"])
+
     if "phone_id" not in data:
         return jsonify({"error": "phone_id is required"}), 400
     
@@ -45,10 +96,40 @@ def assign_phone_to_rig(rig_id):
     if not phone:
         return jsonify({"error": "Phone not found"}), 404
     
+    if phone.rig_id is not None and phone.rig_id != rig_id:
+        bump_version(db, RIG, phone.rig_id)  # Old RIG loses a phone
     phone.rig_id = rig_id
+    mark_changed(db, Phone, [phone.id])
+    bump_version(db, RIG, rig_id)
     db.commit()
     return jsonify({"message": "Phone assigned to RIG"}), 200
 
+def assign_phones_to_rig(rig_id, phone_ids):
+    if not isinstance(phone_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in phone_ids):
+        return jsonify({"error": "phone_ids must be a list of integers"}), 400
+    if len(phone_ids) > BULK_MAX_PHONES:
+        return jsonify({"error": f"At most {BULK_MAX_PHONES} phones per request"}), 400
+
+    # 🔹 Chunked IN lists keep every statement under the bound-parameter limit
+    ids = sorted(set(phone_ids))
+    found = {}
+    for chunk in chunked(ids):
+        found.update(db.execute(select(Phone.id, Phone.rig_id).where(Phone.id.in_(chunk))).all())
+    missing = [i for i in phone_ids if i not in found]
+    if missing:
+        return jsonify({"error": "Phones not found", "phone_ids": missing}), 404
+
+    for chunk in chunked(ids):
+        db.execute(
+            update(Phone).where(Phone.id.in_(chunk)).values(rig_id=rig_id)
+            .execution_options(synchronize_session=False)
+        )
+    mark_changed(db, Phone, found)
+    old_rigs = {old for old in found.values() if old is not None}
+    bump_versions(db, RIG, old_rigs | {rig_id})
+    db.commit()
+    return jsonify({"message": "Phones assigned to RIG", "count": len(found)}), 200
+
 # 📌 5️⃣ Remove a Phone from a RIG
 @phone_routes.route("/rigs/<int:rig_id>/phones/<int:phone_id>", methods=["DELETE"])
 def remove_phone_from_rig(rig_id, phone_id):
@@ -57,13 +138,17 @@ def remove_phone_from_rig(rig_id, phone_id):
         return jsonify({"error": "Phone not found in this RIG"}), 404
     
     phone.rig_id = None  # Unassign phone from RIG
+    mark_changed(db, Phone, [phone_id])
+    bump_version(db, RIG, rig_id)
     db.commit()
     return jsonify({"message": "Phone removed from RIG"}), 200
 
 # 📌 6️⃣ Get a Single Phone by ID
 @phone_routes.route("/phones/<int:phone_id>", methods=["GET"])
 def get_phone(phone_id):
-    phone = db.query(Phone).filter_by(id=phone_id).first()
+    phone = db.execute(
+        select(Phone.id, Phone.rig_id, Phone.serial_number).where(Phone.id == phone_id)
+    ).first()
     if not phone:
         return jsonify({"error": "Phone not found"}), 404
 
@@ -1,9 +1,8 @@
 from flask import Blueprint, jsonify
-from app.database import SessionLocal
-from app.models import RIGAction, RIGActionConfig
+from app.catalog import catalog_response, publish_catalog_change, refresh_catalog
+from app.database import db
 
 rig_action_routes = Blueprint("rig_action_routes", __name__)
-db = SessionLocal()
 
 # ✅ **Get all RIG Actions**
 @rig_action_routes.route("/rig_actions", methods=["GET"])
@@ -11,16 +10,12 @@ def get_rig_actions():
     """
     Returns a list of all available RIG Actions.
     """
-    actions = db.query(RIGAction).all()
-    return jsonify([{"id": a.id, "name": a.name, "type": a.type} for a in actions])
+    return catalog_response("rig_actions")
 
 # ✅ Get details of a specific RIG action
 @rig_action_routes.route("/rig_actions/<int:rig_action_id>", methods=["GET"])
 def get_rig_action(rig_action_id):
-    action = db.query(RIGAction).filter_by(id=rig_action_id).first()
-    if not action:
-        return jsonify({"error": "RIG Action not found"}), 404
-    return jsonify({"id": action.id, "name": action.name, "type": action.type})
+    return catalog_response("rig_action", rig_action_id)
 
 # ✅ **Get RIG Action Configurations**
 @rig_action_routes.route("/rig_actions/<int:rig_action_id>/config", methods=["GET"])
@@ -28,11 +23,20 @@ def get_rig_action_config(rig_action_id):
     """
     Returns configuration options for a given RIG Action.
     """
-    configs = db.query(RIGActionConfig).filter_by(rig_action_id=rig_action_id).all()
-    
-    if not configs:
-        return jsonify({"message": "No configuration found for this RIG action"}), 404
+    return catalog_response("rig_action_config", rig_action_id)
 
-    return jsonify([
-        {"option_name": c.option_name, "valid_values": c.valid_values} for c in configs
-    ])
+# ✅ **Reload the Action / RIG Action catalog** (after re-seeding)
+@rig_action_routes.route("/catalog/refresh", methods=["POST"])
+def refresh_action_catalog():
+    """
+    Reloads this worker at once; the other workers follow within
+    CATALOG_REVALIDATE_SECONDS.
+    """
+    publish_catalog_change(db)
+    db.commit()
+    catalog = refresh_catalog()
+    return jsonify({
+        "message": "Catalog refreshed",
+        "actions": len(catalog.actions),
+        "rig_actions": len(catalog.rig_actions)
+    }), 200
@@ -1,9 +1,18 @@
 from flask import Blueprint, request, jsonify
-from app.database import SessionLocal
+from app.database import db, existing_ids
 from app.models import RIG, RIGSteps, RIGAction, Phone
+from sqlalchemy import select
+from app.catalog import get_catalog
+from app.config import BULK_MAX_DELETE, COPY_MAX_TARGETS, LIST_MAX_LIMIT
+from app.listing import ListArgsError, list_response, page_args
+from app.overview import rig_overview
+from app.plans import PlanError, get_rig_plan, plan_to_dict
+from app.versions import bump_version, bump_versions, mark_changed
+from app.deletion import delete_rigs
+from app.response_cache import response_cache
+from app.steps import validate_step, parse_steps_payload, append_steps, replace_steps, move_step, copy_steps
 
 rig_routes = Blueprint("rig_routes", __name__)
-db = SessionLocal()
 
 # 🔹 Create a RIG
 @rig_routes.route("/rigs", methods=["POST"])
@@ -11,42 +20,167 @@ def create_rig():
     data = request.json
     new_rig = RIG(name=data["name"], description=data["description"])
     db.add(new_rig)
+    db.flush()
+    mark_changed(db, RIG, [new_rig.id])
     db.commit()
     return jsonify({"message": "RIG created", "id": new_rig.id}), 201
 
 # 🔹 Get All RIGs
 @rig_routes.route("/rigs", methods=["GET"])
 def get_rigs():
-    rigs = db.query(RIG).all()
-    return jsonify([{"id": r.id, "name": r.name} for r in rigs])
+    """
+    Supports ?limit=&after= keyset pagination, ?fields= and ?stream=ndjson|json.
+    """
+    return list_response(RIG, ("id", "name"), ("id", "name", "description"))
+
+# 🔹 Fleet overview for dashboards
+@rig_routes.route("/rigs/overview", methods=["GET"])
+def get_rigs_overview():
+    """
+    Every RIG with its phone count, step count and referenced workflow ids.
+    Paginated with ?limit=&after= (X-Next-After header); ?expand=serials
+    adds each RIG's phone_serials.
+    """
+    try:
+        limit, after = page_args()
+    except ListArgsError as e:
+        return jsonify({"error": str(e)}), 400
+    expand = {e.strip() for e in request.args.get("expand", "").split(",") if e.strip()}
+
+    items, next_after = rig_overview(db, min(limit or LIST_MAX_LIMIT, LIST_MAX_LIMIT), after, "serials" in expand)
+    response = jsonify(items)
+    if next_after is not None:
+        response.headers["X-Next-After"] = str(next_after)
+    return response
 
 # 🔹 Assign a Step to a RIG
 @rig_routes.route("/rigs/<int:rig_id>/steps", methods=["POST"])
 def add_rig_step(rig_id):
     data = request.json
-    new_step = RIGSteps(
-        rig_id=rig_id,
-        rig_action_id=data["rig_action_id"],
-        selected_value=data["selected_value"],
-        step_order=data["step_order"]
-    )
-    db.add(new_step)
+
+    # A JSON array appends many steps in one transaction
+    if isinstance(data, list):
+        return append_rig_steps(rig_id, data)
+
+    if not db.get(RIG, rig_id):
+        return jsonify({"error": "RIG not found"}), 404
+
+    step, error = validate_step(data, "rig_action_id", get_catalog().rig_step_validators)
+    if error:
+        return jsonify(error), 400
+
+    # Optional 1-based position, as before steps were spaced out; default is the end
+    position = data.get("step_order")
+    if position is not None and (not isinstance(position, int) or isinstance(position, bool) or position < 1):
+        return jsonify({"error": "step_order must be a positive integer (1-based position)"}), 400
+
+    step_id, = append_steps(db, RIGSteps, "rig_id", RIG, rig_id, [step])
+    if position is not None:
+        move_step(db, RIGSteps, "rig_id", rig_id, db.get(RIGSteps, step_id), position - 1)
+    db.commit()
+    return jsonify({"message": "Step added to RIG", "step_id": step_id}), 201
+
+def append_rig_steps(rig_id, data):
+    if not db.get(RIG, rig_id):
+        return jsonify({"error": "RIG not found"}), 404
+
+    steps, errors = parse_steps_payload(data, "rig_action_id", get_catalog().rig_step_validators)
+    if errors:
+        return jsonify({"error": "Invalid steps", "errors": errors}), 400
+
+    step_ids = append_steps(db, RIGSteps, "rig_id", RIG, rig_id, steps)
+    db.commit()
+    return jsonify({"message": "Steps added to RIG", "step_ids": step_ids}), 201
+
+# 🔹 Replace All RIG Steps (bulk, one transaction)
+@rig_routes.route("/rigs/<int:rig_id>/steps", methods=["PUT"])
+def replace_rig_steps(rig_id):
+    """
+    Accepts an ordered array of {"rig_action_id", "selected_value"}; the array
+    position becomes step_order. The whole array is validated first.
+    """
+    if not db.get(RIG, rig_id):
+        return jsonify({"error": "RIG not found"}), 404
+
+    steps, errors = parse_steps_payload(request.json, "rig_action_id", get_catalog().rig_step_validators)
+    if errors:
+        return jsonify({"error": "Invalid steps", "errors": errors}), 400
+
+    step_ids = replace_steps(db, RIGSteps, "rig_id", rig_id, steps)
+    bump_version(db, RIG, rig_id)
+    db.commit()
+    return jsonify({"message": "RIG steps replaced", "step_ids": step_ids}), 200
+
+# 🔹 Copy this RIG's Step Program to Other RIGs
+@rig_routes.route("/rigs/<int:rig_id>/steps/copy_to", methods=["POST"])
+def copy_rig_steps(rig_id):
+    """
+    {"rig_ids": [...], "mode": "replace" | "append"} copies every step of
+    this RIG to each target with INSERT ... SELECT, in one transaction.
+    replace (the default) overwrites the targets' steps; append adds the
+    copies after them. switch_phone steps are copied as-is, so they still
+    name this RIG's phones.
+    """
+    if not db.get(RIG, rig_id):
+        return jsonify({"error": "RIG not found"}), 404
+    data = request.json or {}
+    rig_ids = data.get("rig_ids")
+    mode = data.get("mode", "replace")
+    if not isinstance(rig_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in rig_ids):
+        return jsonify({"error": "rig_ids must be a list of integers"}), 400
+    if len(rig_ids) > COPY_MAX_TARGETS:
+        return jsonify({"error": f"At most {COPY_MAX_TARGETS} RIGs per request"}), 400
+    if mode not in ("replace", "append"):
+        return jsonify({"error": "mode must be 'replace' or 'append'"}), 400
+    if rig_id in rig_ids:
+        return jsonify({"error": "rig_ids must not include the source RIG"}), 400
+
+    targets = existing_ids(db, RIG, rig_ids)
+    missing = sorted(set(rig_ids) - set(targets))
+    if missing:
+        return jsonify({"error": "RIGs not found", "rig_ids": missing}), 404
+
+    copied = copy_steps(db, RIGSteps, "rig_id", RIG, rig_id, targets, append=(mode == "append"))
+    bump_versions(db, RIG, targets)
     db.commit()
-    return jsonify({"message": "Step added to RIG", "step_id": new_step.id}), 201
+    return jsonify({"message": "RIG steps copied", "rig_ids": targets, "steps_copied": copied}), 200
 
 # 🔹 Get RIG Steps
 @rig_routes.route("/rigs/<int:rig_id>/steps", methods=["GET"])
 def get_rig_steps(rig_id):
-    steps = db.query(RIGSteps).filter_by(rig_id=rig_id).order_by(RIGSteps.step_order).all()
+    return response_cache.respond(RIG, rig_id, "steps", lambda: _render_rig_steps(rig_id))
+
+def _render_rig_steps(rig_id):
+    # ✅ One joined Core query, rows go straight to JSON (no ORM objects)
+    rows = db.execute(
+        select(RIGSteps.id, RIGSteps.step_order, RIGAction.name, RIGSteps.selected_value)
+        .join(RIGAction, RIGAction.id == RIGSteps.rig_action_id)
+        .where(RIGSteps.rig_id == rig_id)
+        .order_by(RIGSteps.step_order)
+    )
     return jsonify([
         {
-            "step_id": s.id,
-            "step_order": s.step_order,
-            "action": db.query(RIGAction).filter_by(id=s.rig_action_id).first().name,
-            "selected_value": s.selected_value
-        } for s in steps
+            "step_id": step_id,
+            "step_order": step_order,
+            "action": action,
+            "selected_value": selected_value
+        } for step_id, step_order, action, selected_value in rows
     ])
 
+# 🔹 Get the Compiled Execution Plan of a RIG
+@rig_routes.route("/rigs/<int:rig_id>/plan", methods=["GET"])
+def get_rig_plan_route(rig_id):
+    """
+    Compiled once per RIG / workflow version and served from the plan cache.
+    """
+    try:
+        plan = get_rig_plan(db, rig_id)
+    except PlanError as e:
+        return jsonify({"error": str(e), "step_id": e.step_id}), 422
+    if plan is None:
+        return jsonify({"error": "RIG not found"}), 404
+    return jsonify(plan_to_dict(plan))
+
 # 🔹 Remove a Step from RIG
 @rig_routes.route("/rigs/<int:rig_id>/steps/<int:step_id>", methods=["DELETE"])
 def remove_rig_step(rig_id, step_id):
@@ -56,6 +190,7 @@ def remove_rig_step(rig_id, step_id):
         return jsonify({"message": "Step not found"}), 404
     
     db.delete(step)
+    bump_version(db, RIG, rig_id)
     db.commit()
     
     return jsonify({"message": "Step removed successfully"}), 200
@@ -77,6 +212,7 @@ def move_rig_step_up(rig_id, step_id):
         return jsonify({"message": "Step is already at the top"}), 400
 
     step.step_order, prev_step.step_order = prev_step.step_order, step.step_order
+    bump_version(db, RIG, rig_id)
     db.commit()
 
     return jsonify({"message": "Step moved up"}), 200
@@ -98,30 +234,68 @@ def move_rig_step_down(rig_id, step_id):
         return jsonify({"message": "Step is already at the bottom"}), 400
 
     step.step_order, next_step.step_order = next_step.step_order, step.step_order
+    bump_version(db, RIG, rig_id)
     db.commit()
     
     return jsonify({"message": "Step moved down"}), 200
 
-# 🔹 Delete a RIG
+# 🔹 Move RIG Step to Any Position
+@rig_routes.route("/rigs/<int:rig_id>/steps/<int:step_id>/move_to", methods=["PUT"])
+def move_rig_step_to(rig_id, step_id):
+    """
+    Body: {"index": n} (0-based). Only the moved step's row is updated.
+    """
+    data = request.json or {}
+    index = data.get("index")
+    if not isinstance(index, int) or isinstance(index, bool) or index < 0:
+        return jsonify({"error": "index must be a non-negative integer"}), 400
+
+    step = db.query(RIGSteps).filter_by(id=step_id, rig_id=rig_id).first()
+    if not step:
+        return jsonify({"message": "Step not found"}), 404
+
+    move_step(db, RIGSteps, "rig_id", rig_id, step, index)
+    bump_version(db, RIG, rig_id)
+    db.commit()
+
+    return jsonify({"message": "Step moved", "step_order": step.step_order}), 200
+
+# 🔹 Delete a RIG (its steps go with it; its phones become unassigned)
 @rig_routes.route("/rigs/<int:rig_id>", methods=["DELETE"])
 def delete_rig(rig_id):
-    rig = db.query(RIG).filter_by(id=rig_id).first()
-    if not rig:
+    if not delete_rigs(db, [rig_id]):
         return jsonify({"message": "RIG not found"}), 404
-    db.delete(rig)
     db.commit()
     return jsonify({"message": "RIG deleted"}), 200
 
+# 🔹 Delete Many RIGs at Once
+@rig_routes.route("/rigs/bulk_delete", methods=["POST"])
+def bulk_delete_rigs():
+    rig_ids = (request.json or {}).get("rig_ids")
+    if not isinstance(rig_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in rig_ids):
+        return jsonify({"error": "rig_ids must be a list of integers"}), 400
+    if len(rig_ids) > BULK_MAX_DELETE:
+        return jsonify({"error": f"At most {BULK_MAX_DELETE} RIGs per request"}), 400
+
+    deleted = delete_rigs(db, rig_ids)
+    db.commit()
+    not_found = sorted(set(rig_ids) - set(deleted))
+    return jsonify({"message": "RIGs deleted", "deleted": deleted, "not_found": not_found}), 200
+
 # 🔹 Get a single RIG by ID
 @rig_routes.route("/rigs/<int:rig_id>", methods=["GET"])
 def get_rig(rig_id):
-    rig = db.query(RIG).filter_by(id=rig_id).first()
+    return response_cache.respond(RIG, rig_id, "detail", lambda: _render_rig(rig_id))
+
+def _render_rig(rig_id):
+    rig = db.execute(select(RIG.id, RIG.name, RIG.description).where(RIG.id == rig_id)).first()
     if not rig:
         return jsonify({"error": "RIG not found"}), 404
     
-    # Fetch phones assigned to this RIG
-    phones = db.query(Phone).filter_by(rig_id=rig_id).all()
-    phone_list = [{"id": p.id, "serial_number": p.serial_number} for p in phones]
+    phones = db.execute(
+        select(Phone.id, Phone.serial_number).where(Phone.rig_id == rig_id).order_by(Phone.id)
+    )
+    phone_list = [{"id": phone_id, "serial_number": serial} for phone_id, serial in phones]
 
     return jsonify({
         "id": rig.id,
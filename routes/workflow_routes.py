@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify
-from app.database import SessionLocal
+from app.database import db
 from app.models import Workflow, WorkflowSteps, Action, WeekdayEnum
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select
+from app.catalog import get_catalog
+from app.listing import list_response
+from app.plans import PlanError, get_workflow_plan, plan_to_dict
+from app.versions import bump_version, mark_changed
+from app.config import BULK_MAX_DELETE
+from app.deletion import delete_workflows
+from app.response_cache import response_cache
+from app.schedule import get_schedule_index, parse_moment, parse_window, valid_hour
+from app.steps import validate_step, parse_steps_payload, append_steps, replace_steps, move_step, copy_steps
 
 workflow_routes = Blueprint("workflow_routes", __name__)
-db = SessionLocal()
 
 # 🔹 Mapping Full Weekday Names to Enum Values
 DAY_MAPPING = {
@@ -27,6 +35,8 @@ def create_workflow():
 
     if not start_day_enum or not end_day_enum:
         return jsonify({"error": "Invalid start_day or end_day. Use Monday-Sunday."}), 400
+    if not valid_hour(data.get("start_hour")) or not valid_hour(data.get("end_hour")):
+        return jsonify({"error": "Invalid start_hour or end_hour. Use integers 0-23."}), 400
 
     new_workflow = Workflow(
         name=data["name"],
@@ -36,43 +46,144 @@ def create_workflow():
         end_day=end_day_enum
     )
     db.add(new_workflow)
+    db.flush()
+    mark_changed(db, Workflow, [new_workflow.id])
     db.commit()
+    get_schedule_index().add_workflow(new_workflow)
     return jsonify({"message": "Workflow created", "id": new_workflow.id}), 201
 
 # 🔹 Get All Workflows
 @workflow_routes.route("/workflows", methods=["GET"])
 def get_workflows():
-    workflows = db.query(Workflow).all()
-    return jsonify([{"id": w.id, "name": w.name} for w in workflows])
+    """
+    Supports ?limit=&after= keyset pagination, ?fields= and ?stream=ndjson|json.
+    """
+    return list_response(
+        Workflow,
+        ("id", "name"),
+        ("id", "name", "start_hour", "end_hour", "start_day", "end_day")
+    )
+
+# 🔹 Workflows Active at a Given Time
+@workflow_routes.route("/workflows/active", methods=["GET"])
+def get_active_workflows():
+    """
+    ?at=<ISO 8601 | unix seconds>, defaults to now. Served from the schedule index.
+    """
+    try:
+        moment = parse_moment(request.args.get("at"))
+    except ValueError:
+        return jsonify({"error": "Invalid at. Use ISO 8601 or unix seconds."}), 400
+    return jsonify(get_schedule_index().active_at(moment))
+
+# 🔹 Workflows Starting Soon
+@workflow_routes.route("/workflows/upcoming", methods=["GET"])
+def get_upcoming_workflows():
+    """
+    ?window=90m|6h|2d (default 60 minutes) and optional ?at=.
+    Returns workflows whose window opens in that range, soonest first.
+    """
+    try:
+        moment = parse_moment(request.args.get("at"))
+        window = parse_window(request.args.get("window"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid at or window: {e}"}), 400
+    return jsonify(get_schedule_index().upcoming(moment, window))
 
 # 🔹 Add a Step to a Workflow
 @workflow_routes.route("/workflows/<int:workflow_id>/steps", methods=["POST"])
 def add_workflow_step(workflow_id):
     data = request.json
 
-    new_step = WorkflowSteps(
-        workflow_id=workflow_id,
-        action_id=data["action_id"],
-        selected_value=data["selected_value"],  # ✅ JSON structure is now consistent!
-        step_order=data["step_order"]
-    )
-    db.add(new_step)
+    # A JSON array appends many steps in one transaction
+    if isinstance(data, list):
+        return append_workflow_steps(workflow_id, data)
+
+    if not db.get(Workflow, workflow_id):
+        return jsonify({"error": "Workflow not found"}), 404
+
+    step, error = validate_step(data, "action_id", get_catalog().step_validators)
+    if error:
+        return jsonify(error), 400
+
+    # Optional 1-based position, as before steps were spaced out; default is the end
+    position = data.get("step_order")
+    if position is not None and (not isinstance(position, int) or isinstance(position, bool) or position < 1):
+        return jsonify({"error": "step_order must be a positive integer (1-based position)"}), 400
+
+    step_id, = append_steps(db, WorkflowSteps, "workflow_id", Workflow, workflow_id, [step])
+    if position is not None:
+        move_step(db, WorkflowSteps, "workflow_id", workflow_id, db.get(WorkflowSteps, step_id), position - 1)
+    db.commit()
+    return jsonify({"message": "Step added", "step_id": step_id}), 201
+
+def append_workflow_steps(workflow_id, data):
+    if not db.get(Workflow, workflow_id):
+        return jsonify({"error": "Workflow not found"}), 404
+
+    steps, errors = parse_steps_payload(data, "action_id", get_catalog().step_validators)
+    if errors:
+        return jsonify({"error": "Invalid steps", "errors": errors}), 400
+
+    step_ids = append_steps(db, WorkflowSteps, "workflow_id", Workflow, workflow_id, steps)
     db.commit()
-    return jsonify({"message": "Step added", "step_id": new_step.id}), 201
+    return jsonify({"message": "Steps added", "step_ids": step_ids}), 201
+
+# 🔹 Replace All Steps in a Workflow (bulk, one transaction)
+@workflow_routes.route("/workflows/<int:workflow_id>/steps", methods=["PUT"])
+def replace_workflow_steps(workflow_id):
+    """
+    Accepts an ordered array of {"action_id", "selected_value"}; the array
+    position becomes step_order. The whole array is validated first.
+    """
+    if not db.get(Workflow, workflow_id):
+        return jsonify({"error": "Workflow not found"}), 404
+
+    steps, errors = parse_steps_payload(request.json, "action_id", get_catalog().step_validators)
+    if errors:
+        return jsonify({"error": "Invalid steps", "errors": errors}), 400
+
+    step_ids = replace_steps(db, WorkflowSteps, "workflow_id", workflow_id, steps)
+    bump_version(db, Workflow, workflow_id)
+    db.commit()
+    return jsonify({"message": "Steps replaced", "step_ids": step_ids}), 200
 
 # 🔹 Get All Steps in a Workflow
 @workflow_routes.route("/workflows/<int:workflow_id>/steps", methods=["GET"])
 def get_workflow_steps(workflow_id):
-    steps = db.query(WorkflowSteps).filter_by(workflow_id=workflow_id).order_by(WorkflowSteps.step_order).all()
+    return response_cache.respond(Workflow, workflow_id, "steps", lambda: _render_workflow_steps(workflow_id))
+
+def _render_workflow_steps(workflow_id):
+    # ✅ One joined Core query, rows go straight to JSON (no ORM objects)
+    rows = db.execute(
+        select(WorkflowSteps.id, WorkflowSteps.step_order, Action.name, WorkflowSteps.selected_value)
+        .join(Action, Action.id == WorkflowSteps.action_id)
+        .where(WorkflowSteps.workflow_id == workflow_id)
+        .order_by(WorkflowSteps.step_order)
+    )
     return jsonify([
         {
-            "step_id": s.id,  # ✅ Added step_id to the response
-            "step_order": s.step_order,
-            "action": db.query(Action).filter_by(id=s.action_id).first().name,
-            "selected_value": s.selected_value
-        } for s in steps
+            "step_id": step_id,  # ✅ Added step_id to the response
+            "step_order": step_order,
+            "action": action,
+            "selected_value": selected_value
+        } for step_id, step_order, action, selected_value in rows
     ])
 
+# 🔹 Get the Compiled Execution Plan of a Workflow
+@workflow_routes.route("/workflows/<int:workflow_id>/plan", methods=["GET"])
+def get_workflow_plan_route(workflow_id):
+    """
+    Compiled once per workflow version and served from the plan cache.
+    """
+    try:
+        plan = get_workflow_plan(db, workflow_id)
+    except PlanError as e:
+        return jsonify({"error": str(e), "step_id": e.step_id}), 422
+    if plan is None:
+        return jsonify({"error": "Workflow not found"}), 404
+    return jsonify(plan_to_dict(plan))
+
 # 🔹 Move Workflow Step Up
 @workflow_routes.route("/workflows/<int:workflow_id>/steps/<int:step_id>/move_up", methods=["PUT"])
 def move_workflow_step_up(workflow_id, step_id):
@@ -89,6 +200,7 @@ def move_workflow_step_up(workflow_id, step_id):
         return jsonify({"message": "Step is already at the top"}), 400
 
     step.step_order, prev_step.step_order = prev_step.step_order, step.step_order
+    bump_version(db, Workflow, workflow_id)
     db.commit()
     
     return jsonify({"message": "Step moved up"}), 200
@@ -109,36 +221,152 @@ def move_workflow_step_down(workflow_id, step_id):
         return jsonify({"message": "Step is already at the bottom"}), 400
 
     step.step_order, next_step.step_order = next_step.step_order, step.step_order
+    bump_version(db, Workflow, workflow_id)
     db.commit()
     
     return jsonify({"message": "Step moved down"}), 200
 
-# 🔹 Delete a Workflow
+# 🔹 Move Workflow Step to Any Position
+@workflow_routes.route("/workflows/<int:workflow_id>/steps/<int:step_id>/move_to", methods=["PUT"])
+def move_workflow_step_to(workflow_id, step_id):
+    """
+    Body: {"index": n} (0-based). Only the moved step's row is updated.
+    """
+    data = request.json or {}
+    index = data.get("index")
+    if not isinstance(index, int) or isinstance(index, bool) or index < 0:
+        return jsonify({"error": "index must be a non-negative integer"}), 400
+
+    step = db.query(WorkflowSteps).filter_by(id=step_id, workflow_id=workflow_id).first()
+    if not step:
+        return jsonify({"message": "Step not found"}), 404
+
+    move_step(db, WorkflowSteps, "workflow_id", workflow_id, step, index)
+    bump_version(db, Workflow, workflow_id)
+    db.commit()
+
+    return jsonify({"message": "Step moved", "step_order": step.step_order}), 200
+
+# 🔹 Clone a Workflow (steps are copied server-side)
+@workflow_routes.route("/workflows/<int:workflow_id>/clone", methods=["POST"])
+def clone_workflow(workflow_id):
+    """
+    Copy the workflow and all of its steps in one transaction. The JSON body
+    may override name, start_hour, end_hour, start_day and end_day.
+    """
+    source = db.get(Workflow, workflow_id)
+    if not source:
+        return jsonify({"error": "Workflow not found"}), 404
+    data = request.get_json(silent=True) or {}
+
+    start_day_enum = DAY_MAPPING.get(data["start_day"]) if "start_day" in data else source.start_day
+    end_day_enum = DAY_MAPPING.get(data["end_day"]) if "end_day" in data else source.end_day
+    if not start_day_enum or not end_day_enum:
+        return jsonify({"error": "Invalid start_day or end_day. Use Monday-Sunday."}), 400
+    start_hour = data.get("start_hour", source.start_hour)
+    end_hour = data.get("end_hour", source.end_hour)
+    if not valid_hour(start_hour) or not valid_hour(end_hour):
+        return jsonify({"error": "Invalid start_hour or end_hour. Use integers 0-23."}), 400
+
+    clone = Workflow(
+        name=data.get("name", f"{source.name} (copy)"),
+        start_hour=start_hour,
+        end_hour=end_hour,
+        start_day=start_day_enum,
+        end_day=end_day_enum
+    )
+    db.add(clone)
+    db.flush()  # Assigns clone.id for the INSERT ... SELECT
+    mark_changed(db, Workflow, [clone.id])
+    copied = copy_steps(db, WorkflowSteps, "workflow_id", Workflow, workflow_id, [clone.id])
+    db.commit()
+    get_schedule_index().add_workflow(clone)
+    return jsonify({"message": "Workflow cloned", "id": clone.id, "steps_copied": copied}), 201
+
+# 🔹 Delete a Workflow (its steps go with it in the same transaction)
 @workflow_routes.route("/workflows/<int:workflow_id>", methods=["DELETE"])
 def delete_workflow(workflow_id):
-    workflow = db.query(Workflow).filter_by(id=workflow_id).first()
-    if not workflow:
+    if not delete_workflows(db, [workflow_id]):
         return jsonify({"message": "Workflow not found"}), 404
-    db.delete(workflow)
     db.commit()
+    get_schedule_index().remove(workflow_id)
     return jsonify({"message": "Workflow deleted"}), 200
 
+# 🔹 Delete Many Workflows at Once
+@workflow_routes.route("/workflows/bulk_delete", methods=["POST"])
+def bulk_delete_workflows():
+    workflow_ids = (request.json or {}).get("workflow_ids")
+    if not isinstance(workflow_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in workflow_ids):
+        return jsonify({"error": "workflow_ids must be a list of integers"}), 400
+    if len(workflow_ids) > BULK_MAX_DELETE:
+        return jsonify({"error": f"At most {BULK_MAX_DELETE} workflows per request"}), 400
+
+    deleted = delete_workflows(db, workflow_ids)
+    db.commit()
+    schedule = get_schedule_index()
+    for workflow_id in deleted:
+        schedule.remove(workflow_id)
+    not_found = sorted(set(workflow_ids) - set(deleted))
+    return jsonify({"message": "Workflows deleted", "deleted": deleted, "not_found": not_found}), 200
+
 # Get a single workflow by ID
 @workflow_routes.route("/workflows/<int:workflow_id>", methods=["GET"])
 def get_workflow(workflow_id):
-    workflow = db.query(Workflow).filter_by(id=workflow_id).first()
+    """
+    Optional ?expand=steps[,config] embeds the ordered steps (and each step's
+    action config) using one extra joined query.
+    """
+    expand = {e.strip() for e in request.args.get("expand", "").split(",") if e.strip()} & {"steps", "config"}
+    variant = "detail:" + ",".join(sorted(expand))
+    return response_cache.respond(Workflow, workflow_id, variant, lambda: _render_workflow(workflow_id, expand))
+
+def _render_workflow(workflow_id, expand):
+    workflow = db.execute(
+        select(
+            Workflow.id, Workflow.name, Workflow.start_hour, Workflow.end_hour,
+            Workflow.start_day, Workflow.end_day
+        ).where(Workflow.id == workflow_id)
+    ).first()
     
     if not workflow:
         return jsonify({"error": "Workflow not found"}), 404
     
-    return jsonify({
+    result = {
         "id": workflow.id,
         "name": workflow.name,
         "start_hour": workflow.start_hour,
         "end_hour": workflow.end_hour,
         "start_day": workflow.start_day.value,  # Convert enum to string
         "end_day": workflow.end_day.value  # Convert enum to string
-    })
+    }
+
+    if "steps" in expand or "config" in expand:
+        rows = db.execute(
+            select(
+                WorkflowSteps.id, WorkflowSteps.step_order, WorkflowSteps.action_id,
+                Action.name, Action.type, WorkflowSteps.selected_value
+            )
+            .join(Action, Action.id == WorkflowSteps.action_id)
+            .where(WorkflowSteps.workflow_id == workflow_id)
+            .order_by(WorkflowSteps.step_order)
+        )
+        # Action configs come from the in-memory catalog, not another query
+        action_configs = get_catalog().action_configs if "config" in expand else None
+        result["steps"] = []
+        for step_id, step_order, action_id, action, action_type, selected_value in rows:
+            step = {
+                "step_id": step_id,
+                "step_order": step_order,
+                "action_id": action_id,
+                "action": action,
+                "action_type": action_type,
+                "selected_value": selected_value
+            }
+            if action_configs is not None:
+                step["config"] = list(action_configs.get(action_id, ()))
+            result["steps"].append(step)
+
+    return jsonify(result)
 
 # 🔹 Delete a Workflow Step
 @workflow_routes.route("/workflows/<int:workflow_id>/steps/<int:step_id>", methods=["DELETE"])
@@ -147,20 +375,9 @@ def delete_workflow_step(workflow_id, step_id):
     if not step:
         return jsonify({"message": "Step not found"}), 404
 
-    step_order_to_remove = step.step_order
-
+    # Remaining steps keep their relative order; no renumbering needed
     db.delete(step)
+    bump_version(db, Workflow, workflow_id)
     db.commit()
 
-    # Reorder the remaining steps
-    remaining_steps = db.query(WorkflowSteps).filter(
-        WorkflowSteps.workflow_id == workflow_id,
-        WorkflowSteps.step_order > step_order_to_remove
-    ).order_by(WorkflowSteps.step_order.asc()).all()
-
-    for s in remaining_steps:
-        s.step_order -= 1
-
-    db.commit()
-
-    return jsonify({"message": "Step deleted and steps reordered"}), 200
+    return jsonify({"message": "Step deleted"}), 200
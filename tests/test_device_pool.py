@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from app.device_pool import PooledDriver
+from app.device_server import DeviceServer
+from app.drivers import DeviceError, FakeDriver
+from app.engine import run_workflow_on_phones
+from app.plans import Click, Delay, Swipe, TypeText, WorkflowPlan
+
+def run_with_server(scenario, latency=0.0, **pool_options):
+    """
+    Start a DeviceServer on an ephemeral port and run
+    scenario(server, driver) against a PooledDriver pointed at it.
+    """
+    async def main():
+        server = DeviceServer(FakeDriver(latency=latency))
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        driver = PooledDriver(f"127.0.0.1:{port}", **pool_options)
+        try:
+            return await scenario(server, driver)
+        finally:
+            await driver.close()
+            listener.close()
+            await listener.wait_closed()
+
+    return asyncio.run(main())
+
+# 🔹 Pipelining
+
+def test_each_run_of_non_delay_ops_is_one_frame():
+    plan = WorkflowPlan(1, 1, (
+        Click(1, 1, 2), TypeText(2, "hi"), Swipe(3, "up"),
+        Delay(4, 0.01),
+        Click(5, 3, 4), Swipe(6, "down"),
+    ))
+
+    async def scenario(server, driver):
+        (result,) = await run_workflow_on_phones(driver, plan, ((1, "A"),))
+        return result, server, driver.stats()["A"]
+
+    result, server, stats = run_with_server(scenario)
+    assert result.status == "completed"
+    assert result.steps == 6
+    # One empty warm-up frame from connect(), then one frame per batch
+    assert server.frames == 3
+    assert stats["frames"] == 3
+    assert stats["commands"] == 5
+    assert [call[0] for call in server.driver.calls["A"] if call[0] != "connect"] == [
+        "click", "type_text", "swipe", "click", "swipe",
+    ]
+
+# 🔹 Reconnects
+
+def test_reconnects_after_the_server_drops_idle_connections():
+    async def scenario(server, driver):
+        await driver.click("A", 1, 1)
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+        await driver.click("A", 2, 2)  # Health check fails, a new connection is opened
+        return driver.stats()["A"]
+
+    stats = run_with_server(scenario, health_check_seconds=0)
+    assert stats["reconnects"] == 1
+    assert stats["connections"] == 1
+
+def test_a_dropped_connection_fails_one_command_and_is_replaced():
+    async def scenario(server, driver):
+        await driver.click("A", 1, 1)
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+        with pytest.raises(DeviceError):
+            await driver.click("A", 2, 2)  # Reused without a health check
+        await driver.click("A", 3, 3)
+        return driver.stats()["A"]
+
+    stats = run_with_server(scenario)
+    assert stats["errors"] == 1
+    assert stats["connections"] == 1
+
+def test_a_connection_whose_frame_was_cancelled_is_not_reused():
+    async def scenario(server, driver):
+        await driver.connect("A")
+        channels = driver._phones["A"]
+        assert channels.open == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(driver.click("A", 1, 1), 0.05)  # Cancelled mid-frame
+        assert channels.open == 0
+        assert not channels.idle
+        # The late reply of the cancelled frame must not answer this one
+        assert await driver.find("A", "word", "Nope") is False
+        return driver.stats()["A"]
+
+    stats = run_with_server(scenario, latency=0.2)
+    assert stats["connections"] == 1
+    assert stats["errors"] == 0
+
+# 🔹 Stats
+
+def test_queue_depth_counts_waiting_and_in_flight_frames():
+    async def scenario(server, driver):
+        await driver.connect("A")  # Handshake outside the measured window
+        clicks = [asyncio.create_task(driver.click("A", i, i)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        during = driver.stats()["A"]
+        await asyncio.gather(*clicks)
+        return during, driver.stats()["A"]
+
+    during, after = run_with_server(scenario, latency=0.1, pool_size=1)
+    assert during["queue_depth"] == 3
+    assert during["connections"] == 1
+    assert after["queue_depth"] == 0
+    assert after["frames"] == 4
+    assert after["idle"] == 1
+
+def test_round_trip_times_are_reported():
+    async def scenario(server, driver):
+        assert driver.stats() == {}
+        await driver.click("A", 1, 1)
+        await driver.click("A", 2, 2)
+        return driver.stats()["A"]
+
+    stats = run_with_server(scenario, latency=0.02)
+    assert stats["frames"] == 2
+    assert stats["rtt_ms_last"] >= 20
+    assert stats["rtt_ms_avg"] >= 20
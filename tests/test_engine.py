@@ -0,0 +1,140 @@
+import asyncio
+import time
+import pytest
+from app.drivers import FakeDriver
+from app.engine import run_rig_plan, run_workflow_on_phones
+from app.plans import (
+    Click, Delay, PlanError, RigPlan, RunWorkflow, SwipeUntil, SwitchPhone, TypeText, WorkflowPlan,
+    compile_workflow_op,
+)
+
+PHONES = ((1, "A"), (2, "B"), (3, "C"))
+
+def rig_plan(*ops, phones=PHONES):
+    return RigPlan(1, 1, phones, tuple(ops), ())
+
+def workflow_plan(*ops):
+    return WorkflowPlan(10, 1, tuple(ops))
+
+def commands(driver, serial):
+    return [call for call in driver.calls.get(serial, []) if call[0] not in ("connect", "disconnect")]
+
+# 🔹 switch_phone scoping
+
+def test_steps_before_switch_phone_run_on_every_phone():
+    driver = FakeDriver()
+    results = asyncio.run(run_rig_plan(driver, rig_plan(Click(1, 5, 5))))
+    assert [r.status for r in results] == ["completed"] * 3
+    for _, serial in PHONES:
+        assert commands(driver, serial) == [("click", 5, 5)]
+
+def test_switch_phone_scopes_following_steps_until_the_next_switch():
+    driver = FakeDriver()
+    plan = rig_plan(
+        Click(1, 1, 1),
+        SwitchPhone(2, 2),
+        TypeText(3, "only B"),
+        SwitchPhone(4, 3),
+        TypeText(5, "only C"),
+    )
+    results = asyncio.run(run_rig_plan(driver, plan))
+    assert [r.steps for r in results] == [1, 2, 2]
+    assert commands(driver, "A") == [("click", 1, 1)]
+    assert commands(driver, "B") == [("click", 1, 1), ("type_text", "only B")]
+    assert commands(driver, "C") == [("click", 1, 1), ("type_text", "only C")]
+
+def test_switch_phone_scopes_a_whole_workflow():
+    driver = FakeDriver()
+    plan = rig_plan(SwitchPhone(1, 1), RunWorkflow(2, 10, workflow_plan(Click(11, 2, 3), TypeText(12, "hi"))))
+    asyncio.run(run_rig_plan(driver, plan))
+    assert commands(driver, "A") == [("click", 2, 3), ("type_text", "hi")]
+    assert commands(driver, "B") == []
+    assert commands(driver, "C") == []
+
+# 🔹 Failure isolation
+
+def test_one_failing_phone_does_not_stop_the_others():
+    driver = FakeDriver(fail_serials={"B"})
+    results = asyncio.run(run_rig_plan(driver, rig_plan(Click(1, 1, 1), TypeText(2, "x"))))
+    by_serial = {r.serial: r for r in results}
+    assert by_serial["B"].status == "failed"
+    assert "offline" in by_serial["B"].error
+    for serial in ("A", "C"):
+        assert by_serial[serial].status == "completed"
+        assert by_serial[serial].steps == 2
+        assert commands(driver, serial) == [("click", 1, 1), ("type_text", "x")]
+
+def test_failed_step_is_reported_with_its_step_id():
+    driver = FakeDriver()
+    plan = rig_plan(SwipeUntil(7, "up", "word", "Missing", 2), Click(8, 1, 1), phones=((1, "A"),))
+    (result,) = asyncio.run(run_rig_plan(driver, plan))
+    assert result.status == "failed"
+    assert result.failed_step == 7
+    assert ("click", 1, 1) not in commands(driver, "A")
+
+# 🔹 Delays are timers, not blocking sleeps
+
+def test_delays_overlap_across_phones():
+    driver = FakeDriver()
+    phones = tuple((i, f"P{i}") for i in range(1, 11))
+    started = time.perf_counter()
+    results = asyncio.run(run_rig_plan(driver, rig_plan(Delay(1, 0.2), Click(2, 1, 1), phones=phones)))
+    elapsed = time.perf_counter() - started
+    assert all(r.status == "completed" for r in results)
+    # Ten phones waiting 0.2s each finish in about one delay, not ten
+    assert elapsed < 1.0
+
+def test_delays_overlap_within_a_shared_semaphore():
+    driver = FakeDriver()
+    plan = workflow_plan(Delay(1, 0.2))
+
+    async def main():
+        semaphore = asyncio.Semaphore(4)
+        return await asyncio.gather(
+            run_workflow_on_phones(driver, plan, PHONES[:2], semaphore=semaphore),
+            run_workflow_on_phones(driver, plan, PHONES[2:], semaphore=semaphore),
+        )
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - started < 0.5
+
+# 🔹 swipe_until
+
+def test_swipe_until_stops_once_the_target_is_found():
+    driver = FakeDriver(targets={("word", "Settings"): 2})
+    plan = rig_plan(SwipeUntil(1, "up", "word", "Settings", 5), phones=((1, "A"),))
+    (result,) = asyncio.run(run_rig_plan(driver, plan))
+    assert result.status == "completed"
+    assert [call[0] for call in commands(driver, "A")] == ["find", "swipe", "find", "swipe", "find"]
+
+def test_swipe_until_fails_after_max_swipes():
+    driver = FakeDriver(targets={("word", "Settings"): 10})
+    plan = rig_plan(SwipeUntil(1, "down", "word", "Settings", 3), phones=((1, "A"),))
+    (result,) = asyncio.run(run_rig_plan(driver, plan))
+    assert result.status == "failed"
+    assert "not found after 3 swipes" in result.error
+    assert [call[0] for call in commands(driver, "A")].count("swipe") == 3
+
+# 🔹 Plan compilation
+
+@pytest.mark.parametrize("action_type, value", [
+    ("click", {"x": 1}),
+    ("click", {"x": "left", "y": 2}),
+    ("click", {"x": 1.5, "y": 2}),
+    ("click", {"x": True, "y": 2}),
+    ("type_input", {"text": 5}),
+    ("swipe", {"direction": "sideways"}),
+    ("swipe_until", {"direction": "up", "type": "video", "value": "x"}),
+    ("set_time_delay", {"seconds": -1}),
+    ("set_time_delay", "soon"),
+    ("teleport", {}),
+])
+def test_bad_selected_value_raises_plan_error(action_type, value):
+    with pytest.raises(PlanError) as info:
+        compile_workflow_op(42, action_type, value)
+    assert info.value.step_id == 42
+
+def test_valid_selected_values_compile():
+    assert compile_workflow_op(1, "click", {"x": 3, "y": "4"}) == Click(1, 3, 4)
+    assert compile_workflow_op(2, "set_time_delay", {"seconds": "1.5"}) == Delay(2, 1.5)
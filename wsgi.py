@@ -0,0 +1,6 @@
+from app import create_app
+
+# WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# Create / upgrade the database first with python main.py (alembic upgrade
+# head); create_app() refuses to start on a schema that is behind.
+app = create_app()